@@ -0,0 +1,27 @@
+"""add per-phase timings to ai_reviews
+
+Revision ID: l1m2n3o4p5q6
+Revises: z1a2b3c4d5e6
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "l1m2n3o4p5q6"
+down_revision: Union[str, None] = "z1a2b3c4d5e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("ai_reviews", sa.Column("timings", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("ai_reviews", "timings")
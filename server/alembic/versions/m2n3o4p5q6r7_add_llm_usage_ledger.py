@@ -0,0 +1,57 @@
+"""add llm usage ledger
+
+Revision ID: m2n3o4p5q6r7
+Revises: l1m2n3o4p5q6
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "m2n3o4p5q6r7"
+down_revision: Union[str, None] = "l1m2n3o4p5q6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_usage",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("api_key_index", sa.Integer(), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("review_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("error_type", sa.String(length=100), nullable=True),
+        sa.Column("max_tokens", sa.Integer(), nullable=True),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("latency_ms", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["review_id"], ["ai_reviews.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_llm_usage_id"), "llm_usage", ["id"], unique=False)
+    op.create_index(op.f("ix_llm_usage_created_at"), "llm_usage", ["created_at"], unique=False)
+    op.create_index("ix_llm_usage_key_created", "llm_usage", ["api_key_index", "created_at"], unique=False)
+    op.create_index("ix_llm_usage_project_created", "llm_usage", ["project_id", "created_at"], unique=False)
+    op.create_index("ix_llm_usage_user_created", "llm_usage", ["user_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_usage_user_created", table_name="llm_usage")
+    op.drop_index("ix_llm_usage_project_created", table_name="llm_usage")
+    op.drop_index("ix_llm_usage_key_created", table_name="llm_usage")
+    op.drop_index(op.f("ix_llm_usage_created_at"), table_name="llm_usage")
+    op.drop_index(op.f("ix_llm_usage_id"), table_name="llm_usage")
+    op.drop_table("llm_usage")
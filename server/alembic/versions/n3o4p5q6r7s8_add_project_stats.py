@@ -0,0 +1,37 @@
+"""add project stats
+
+Revision ID: n3o4p5q6r7s8
+Revises: m2n3o4p5q6r7
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "n3o4p5q6r7s8"
+down_revision: Union[str, None] = "m2n3o4p5q6r7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "project_stats",
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("branches_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("open_prs_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("closed_prs_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("project_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("project_stats")
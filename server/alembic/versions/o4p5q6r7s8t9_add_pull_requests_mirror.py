@@ -0,0 +1,78 @@
+"""add pull requests mirror
+
+Revision ID: o4p5q6r7s8t9
+Revises: n3o4p5q6r7s8
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "o4p5q6r7s8t9"
+down_revision: Union[str, None] = "n3o4p5q6r7s8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pull_requests",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("title", sa.Text(), nullable=False),
+        sa.Column("state", sa.String(length=20), nullable=False),
+        sa.Column("author", sa.String(length=255), nullable=False),
+        sa.Column("source_branch", sa.String(length=255), nullable=False),
+        sa.Column("target_branch", sa.String(length=255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("summary", sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("project_id", "number", name="uq_pull_requests_project_number"),
+    )
+    op.create_index(
+        "ix_pull_requests_project_updated",
+        "pull_requests",
+        ["project_id", sa.text("updated_at DESC"), sa.text("number DESC")],
+    )
+    op.create_index(
+        "ix_pull_requests_project_created",
+        "pull_requests",
+        ["project_id", sa.text("created_at DESC"), sa.text("number DESC")],
+    )
+    op.create_index("ix_pull_requests_project_author", "pull_requests", ["project_id", "author"])
+    op.create_index("ix_pull_requests_project_source_branch", "pull_requests", ["project_id", "source_branch"])
+    op.create_index("ix_pull_requests_project_target_branch", "pull_requests", ["project_id", "target_branch"])
+    op.create_index(
+        "ix_pull_requests_title_search",
+        "pull_requests",
+        [sa.text("to_tsvector('simple', title)")],
+        postgresql_using="gin",
+    )
+
+    op.create_table(
+        "pull_request_sync",
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("synced_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["projects.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("project_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pull_request_sync")
+    op.drop_index("ix_pull_requests_title_search", table_name="pull_requests")
+    op.drop_index("ix_pull_requests_project_target_branch", table_name="pull_requests")
+    op.drop_index("ix_pull_requests_project_source_branch", table_name="pull_requests")
+    op.drop_index("ix_pull_requests_project_author", table_name="pull_requests")
+    op.drop_index("ix_pull_requests_project_created", table_name="pull_requests")
+    op.drop_index("ix_pull_requests_project_updated", table_name="pull_requests")
+    op.drop_table("pull_requests")
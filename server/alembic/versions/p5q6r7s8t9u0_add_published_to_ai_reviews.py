@@ -0,0 +1,31 @@
+"""add published columns to ai_reviews
+
+Revision ID: p5q6r7s8t9u0
+Revises: o4p5q6r7s8t9
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "p5q6r7s8t9u0"
+down_revision: Union[str, None] = "o4p5q6r7s8t9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("ai_reviews", sa.Column("published_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("ai_reviews", sa.Column("published_url", sa.String(length=500), nullable=True))
+    op.add_column("ai_reviews", sa.Column("published_comments", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("ai_reviews", "published_comments")
+    op.drop_column("ai_reviews", "published_url")
+    op.drop_column("ai_reviews", "published_at")
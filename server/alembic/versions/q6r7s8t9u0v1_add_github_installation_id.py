@@ -0,0 +1,29 @@
+"""add github_installation_id to projects
+
+Revision ID: q6r7s8t9u0v1
+Revises: p5q6r7s8t9u0
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "q6r7s8t9u0v1"
+down_revision: Union[str, None] = "p5q6r7s8t9u0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("projects", sa.Column("github_installation_id", sa.BigInteger(), nullable=True))
+    op.create_index("ix_projects_github_installation_id", "projects", ["github_installation_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_projects_github_installation_id", table_name="projects")
+    op.drop_column("projects", "github_installation_id")
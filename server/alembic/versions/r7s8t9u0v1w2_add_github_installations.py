@@ -0,0 +1,45 @@
+"""add github_installations
+
+Revision ID: r7s8t9u0v1w2
+Revises: q6r7s8t9u0v1
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "r7s8t9u0v1w2"
+down_revision: Union[str, None] = "q6r7s8t9u0v1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "github_installations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("installation_id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("account_login", sa.String(length=255), nullable=True),
+        sa.Column("verified_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("installation_id", "user_id", name="uq_github_installations_installation_user"),
+    )
+    op.create_index("ix_github_installations_id", "github_installations", ["id"], unique=False)
+    op.create_index(
+        "ix_github_installations_installation_id", "github_installations", ["installation_id"], unique=False
+    )
+    op.create_index("ix_github_installations_user_id", "github_installations", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_github_installations_user_id", table_name="github_installations")
+    op.drop_index("ix_github_installations_installation_id", table_name="github_installations")
+    op.drop_index("ix_github_installations_id", table_name="github_installations")
+    op.drop_table("github_installations")
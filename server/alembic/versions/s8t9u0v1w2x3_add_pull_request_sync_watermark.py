@@ -0,0 +1,30 @@
+"""add watermark and backfill to pull_request_sync
+
+Revision ID: s8t9u0v1w2x3
+Revises: r7s8t9u0v1w2
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "s8t9u0v1w2x3"
+down_revision: Union[str, None] = "r7s8t9u0v1w2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get no watermark, so their next sync walks the full history and fills any gap
+    op.add_column("pull_request_sync", sa.Column("watermark", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("pull_request_sync", sa.Column("backfill", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("pull_request_sync", "backfill")
+    op.drop_column("pull_request_sync", "watermark")
@@ -0,0 +1,28 @@
+"""add head_sha to ai_reviews
+
+Revision ID: t9u0v1w2x3y4
+Revises: s8t9u0v1w2x3
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "t9u0v1w2x3y4"
+down_revision: Union[str, None] = "s8t9u0v1w2x3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing reviews have no recorded head and are published against the current diff, as before
+    op.add_column("ai_reviews", sa.Column("head_sha", sa.String(length=40), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("ai_reviews", "head_sha")
@@ -1,4 +1,7 @@
+from typing import Any, Dict, List, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -19,6 +22,22 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def upsert(
+    db, model, rows: List[Dict[str, Any]], conflict_columns: List[str], update_columns: Optional[List[str]] = None
+):
+    """INSERT ... ON CONFLICT DO UPDATE, so concurrent writers of the same key cannot fail on the constraint"""
+    if not rows:
+        return
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = insert(model).values(rows)
+    columns = update_columns or [column for column in rows[0] if column not in conflict_columns]
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=conflict_columns, set_={column: statement.excluded[column] for column in columns}
+        )
+    )
+
+
 def get_db():
     db = SessionLocal()
     try:
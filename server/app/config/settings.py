@@ -22,10 +22,77 @@ class Settings(BaseSettings):
     GROQ_API_KEYS: str = ""
     GROQ_MODEL: str = "meta-llama/llama-4-scout-17b-16e-instruct"
     AI_MAX_TOKENS: int = 4000
+    AI_MIN_TOKENS: int = 800
+    AI_TOKENS_PER_ISSUE: int = 150
+    AI_MAX_ESTIMATED_ISSUES: int = 40
+    AI_MAX_CONTINUATIONS: int = 2
+    GROQ_KEY_RPM_LIMIT: int = 0
+    GROQ_KEY_TPM_LIMIT: int = 0
     AI_TIMEOUT: int = 120
+    # "groq" or "openai_compatible"; LLM_BASE_URL points either at a Groq-compatible proxy or a local fake server
+    LLM_PROVIDER: str = "groq"
+    LLM_BASE_URL: str = ""
     MAX_DIFF_SIZE: int = 20000
     MAX_FILES_CONTEXT: int = 5
     MAX_FILE_CONTENT_SIZE: int = 2000
+    MAX_INDEXED_FILES: int = 25
+    MAX_CONTEXT_SYMBOLS: int = 20
+    MAX_SYMBOL_CONTEXT_SIZE: int = 8000
+    SYMBOL_SNIPPET_MAX_LINES: int = 60
+
+    # ---------- GitHub / GitLab HTTP Client ----------
+    HTTP_POOL_MAXSIZE: int = 20
+    HTTP_CONNECT_TIMEOUT: float = 5
+    HTTP_READ_TIMEOUT: float = 10
+    HTTP_CONNECT_RETRIES: int = 2
+    CONDITIONAL_CACHE_MAXSIZE: int = 500
+    # Stale-while-revalidate: expired branch / PR list entries are still served this long while one refresh runs
+    CACHE_STALE_TTL: int = 600
+    CACHE_REFRESH_WORKERS: int = 4
+    PAGINATION_CONCURRENCY: int = 4
+    PAGINATION_MAX_PAGES: int = 30
+    GITHUB_GRAPHQL_ENABLED: bool = True
+    PR_HEAD_CACHE_TTL: int = 30
+    # Background work slows down below SLOWDOWN and stops at RESERVE (fractions of each token's hourly limit)
+    RATE_LIMIT_RESERVE_FRACTION: float = 0.2
+    RATE_LIMIT_SLOWDOWN_FRACTION: float = 0.5
+    RATE_LIMIT_MAX_BACKGROUND_WAIT: float = 30
+    # Back-off after a secondary rate limit that gives no Retry-After (GitHub asks for at least a minute)
+    RATE_LIMIT_SECONDARY_BACKOFF: int = 60
+    # Stored branch / PR counters older than this are refreshed in the background
+    PROJECT_STATS_TTL: int = 600
+    STATS_BATCH_PER_TOKEN_CONCURRENCY: int = 3
+    STATS_BATCH_TIMEOUT: float = 10
+    # Upper bound on the threads one /projects/stats call starts, however many projects and tokens it covers
+    STATS_BATCH_MAX_WORKERS: int = 16
+    # After a PR list page is served, details of its first PR_PREFETCH_COUNT PRs are warmed in the background
+    PR_PREFETCH_COUNT: int = 5
+    PR_PREFETCH_WORKERS: int = 2
+    # PR lists are served from the pull_requests table, synced incrementally when older than the interval
+    PULL_REQUEST_MIRROR_ENABLED: bool = True
+    PULL_REQUEST_SYNC_INTERVAL: int = 60
+    PULL_REQUEST_SYNC_MAX_PAGES: int = 50
+    # Token access checks on project create / update, cached per (token, repository); failures for less time
+    TOKEN_VERIFY_TTL: int = 300
+    TOKEN_VERIFY_NEGATIVE_TTL: int = 60
+    TOKEN_VERIFY_CONCURRENCY: int = 8
+    BULK_IMPORT_MAX_PROJECTS: int = 1000
+
+    # ---------- Repository Mirrors ----------
+    # Bare clones per project; PR diffs and file contents are read from git instead of the API
+    REPO_MIRROR_ENABLED: bool = False
+    REPO_MIRROR_DIR: str = "repo_mirrors"
+    REPO_MIRROR_FETCH_INTERVAL: int = 60
+    REPO_MIRROR_GIT_TIMEOUT: int = 300
+
+    # ---------- Blob Cache ----------
+    # File contents keyed by blob SHA: in-memory LRU (bytes) in front of a shared directory ("" disables it)
+    BLOB_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024
+    BLOB_CACHE_DIR: str = "blob_cache"
+    # Least recently used blobs are swept from the directory above this size (0 = unbounded)
+    BLOB_CACHE_DIR_MAX_BYTES: int = 1024 * 1024 * 1024
+    # Raw file streams up to this size are also kept in the blob cache
+    RAW_STREAM_CACHE_MAX_BYTES: int = 5 * 1024 * 1024
 
     # ---------- Environment Variables ----------
     ENVIRONMENT: str = "development"
@@ -65,6 +132,22 @@ class Settings(BaseSettings):
     STRIPE_PLUS_PRICE_ID: str = ""
     STRIPE_PRO_PRICE_ID: str = ""
 
+    # ---------- GitHub App ----------
+    # Projects with a github_installation_id use installation tokens minted with the App's private key (PEM)
+    GITHUB_APP_ID: str = ""
+    GITHUB_APP_PRIVATE_KEY: str = ""
+    # OAuth credentials of the App; users link installations by authorizing it, which proves their access
+    GITHUB_APP_CLIENT_ID: str = ""
+    GITHUB_APP_CLIENT_SECRET: str = ""
+    # Installation tokens live for an hour; a new one is minted this many seconds before expiry
+    GITHUB_APP_TOKEN_REFRESH_MARGIN: int = 300
+
+    # ---------- Repository Webhooks ----------
+    GITHUB_WEBHOOK_SECRET: str = ""
+    GITLAB_WEBHOOK_SECRET: str = ""
+    # Queue an AI review (as the project owner) when a PR/MR is opened, reopened or pushed to
+    WEBHOOK_AUTO_REVIEW: bool = False
+
     @property
     def allowed_avatar_types_list(self) -> list:
         return [t.strip() for t in self.ALLOWED_AVATAR_TYPES.split(",")]
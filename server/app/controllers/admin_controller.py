@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import get_db, require_admin
+from app.models.user import User
+from app.schemas.ai_review import ReviewTimingsReport
+from app.schemas.llm_usage import LLMUsageRollupResponse
+from app.services import llm_usage_service, review_service
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/ai-reviews/timings", response_model=ReviewTimingsReport)
+def get_review_timings(
+    days: int = Query(7, ge=1, le=90),
+    limit: int = Query(5000, ge=1, le=50000),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    """
+    Per-phase timing percentiles of recent AI reviews.
+
+    Covers GitHub/GitLab fetch, context building, prompt building, key wait, LLM time
+    and DB writes, plus prompt size, retries and how many reviews were truncated.
+    """
+    return review_service.get_timing_percentiles(db, days=days, limit=limit)
+
+
+@router.get("/llm-usage", response_model=LLMUsageRollupResponse)
+def get_llm_usage(
+    bucket: str = Query("hour", regex="^(minute|hour|day)$"),
+    group_by: str = Query("key", regex="^(key|model|project|user)$"),
+    hours: int = Query(24, ge=1, le=24 * 90),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    """
+    LLM usage ledger rolled up per minute, hour or day.
+
+    Grouped by API key, model, project or user: calls, error rate, token burn,
+    and headroom against the configured per-key limits.
+    """
+    return llm_usage_service.get_usage_rollup(db, bucket=bucket, group_by=group_by, hours=hours)
@@ -6,8 +6,14 @@ from sqlalchemy.orm import Session
 from app.core.dependencies import get_current_active_user, get_db
 from app.core.logging_config import security_logger
 from app.models.user import User
-from app.schemas.ai_review import AIReviewCreate, AIReviewResponse, AIReviewWithIssues, ReviewIssueResponse
-from app.services import review_service
+from app.schemas.ai_review import (
+    AIReviewCreate,
+    AIReviewResponse,
+    AIReviewWithIssues,
+    ReviewIssueResponse,
+    ReviewPublishResponse,
+)
+from app.services import review_publish_service, review_service
 
 router = APIRouter(prefix="/ai-reviews", tags=["AI Code Reviews"])
 
@@ -81,6 +87,22 @@ def get_ai_review(review_id: int, current_user: User = Depends(get_current_activ
     )
 
 
+@router.post("/{review_id}/publish", response_model=ReviewPublishResponse)
+def publish_ai_review(
+    review_id: int, current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)
+):
+    """
+    Publish a completed review to its pull request as a single platform review.
+
+    Issues on lines of the current diff become inline comments; the rest are
+    listed in the review body. A review can only be published once.
+    """
+    result = review_publish_service.publish_review(db, review_id, current_user.id)
+
+    security_logger.info(f"AI review #{review_id} published by {current_user.email}")
+    return result
+
+
 @router.get("/projects/{project_id}/pull-requests/{pr_number}", response_model=List[AIReviewResponse])
 def get_reviews_for_pr(
     project_id: int,
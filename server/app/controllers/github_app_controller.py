@@ -0,0 +1,29 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import get_current_active_user, get_db
+from app.models.user import User
+from app.schemas.github_app import GitHubInstallationLinkRequest, GitHubInstallationResponse
+from app.services import github_app_service
+
+router = APIRouter(prefix="/github-app", tags=["GitHub App"])
+
+
+@router.post("/installations", response_model=List[GitHubInstallationResponse], status_code=status.HTTP_200_OK)
+def link_installations(
+    link_data: GitHubInstallationLinkRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Link the App installations the authorizing GitHub user can access, so projects can use them"""
+    return github_app_service.link_installations(db, current_user.id, link_data.code)
+
+
+@router.get("/installations", response_model=List[GitHubInstallationResponse], status_code=status.HTTP_200_OK)
+def get_installations(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    return github_app_service.list_installations(db, current_user.id)
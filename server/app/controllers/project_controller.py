@@ -1,20 +1,23 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_active_user, get_db
 from app.core.logging_config import security_logger
 from app.models.user import User, UserRole
 from app.schemas.project import (
+    ProjectBulkCreate,
+    ProjectBulkCreateResponse,
     ProjectCreateGitHub,
     ProjectCreateGitLab,
     ProjectListResponse,
     ProjectResponse,
     ProjectResponseWithStats,
+    ProjectStatsBatchResponse,
     ProjectUpdate,
 )
-from app.services import project_service
+from app.services import project_service, project_stats_service
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
@@ -47,6 +50,17 @@ def create_gitlab_project(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/bulk", response_model=ProjectBulkCreateResponse, status_code=status.HTTP_201_CREATED)
+def bulk_create_projects(
+    project_data: ProjectBulkCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    result = project_service.bulk_create_projects(db, project_data, current_user.id)
+    security_logger.info(f"Bulk project import: {result['created']} project(s) created by user {current_user.email}")
+    return result
+
+
 @router.get("/", response_model=ProjectListResponse, status_code=status.HTTP_200_OK)
 def get_user_projects(
     page: int = Query(1, ge=1),
@@ -62,8 +76,25 @@ def get_user_projects(
     return result
 
 
+@router.get("/stats", response_model=ProjectStatsBatchResponse, status_code=status.HTTP_200_OK)
+def get_projects_stats(
+    background_tasks: BackgroundTasks,
+    refresh: bool = Query(False, description="Recompute every project's counters now"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Stats for all of the caller's projects in one call; failed or timed-out projects carry an `error`"""
+    projects = project_stats_service.get_stats_for_user(db, current_user.id, background_tasks, refresh=refresh)
+    return ProjectStatsBatchResponse(projects=projects)
+
+
 @router.get("/{project_id}", response_model=ProjectResponseWithStats, status_code=status.HTTP_200_OK)
-def get_project(project_id: int, current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+def get_project(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
     if current_user.role in [UserRole.ADMIN, UserRole.SUPERUSER]:
         project = project_service.get_project_by_id(db, project_id)
     else:
@@ -72,7 +103,7 @@ def get_project(project_id: int, current_user: User = Depends(get_current_active
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-    stats = project_service.get_project_stats(project)
+    stats = project_stats_service.get_project_stats(db, project, background_tasks)
 
     project_dict = ProjectResponse.from_orm(project).model_dump()
     project_dict["stats"] = stats
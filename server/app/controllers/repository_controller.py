@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.config.settings import settings
 from app.core.dependencies import get_current_active_user, get_db
 from app.core.logging_config import security_logger
 from app.models.project import PlatformType, Project
@@ -18,7 +22,15 @@ from app.schemas.repository import (
     PullRequestListResponse,
     PullRequestSummary,
 )
-from app.services import github_service, gitlab_service
+from app.services import (
+    github_app_service,
+    github_service,
+    gitlab_service,
+    pr_prefetch_service,
+    pull_request_sync_service,
+    raw_content_service,
+    repo_mirror_service,
+)
 from app.services.cache_service import cache_service
 
 router = APIRouter(prefix="/projects", tags=["Repository"])
@@ -60,7 +72,9 @@ def get_project_branches(
     try:
         if project.platform == PlatformType.GITHUB:
             branches_data = github_service.fetch_branches(
-                token=project.github_token, owner=project.github_repo_owner, repo=project.github_repo_name
+                token=github_app_service.project_token(project),
+                owner=project.github_repo_owner,
+                repo=project.github_repo_name,
             )
         elif project.platform == PlatformType.GITLAB:
             branches_data = gitlab_service.fetch_branches(
@@ -82,69 +96,114 @@ def get_project_branches(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch branches")
 
 
+def _fetch_pull_requests_from_api(project: Project, platform_state: str, page: int, per_page: int, refresh: bool):
+    """One page of PRs/MRs straight from the platform API (through the response cache)"""
+    if project.platform == PlatformType.GITHUB:
+        if refresh:
+            cache_service.invalidate(
+                "github:prs",
+                owner=project.github_repo_owner,
+                repo=project.github_repo_name,
+                state=platform_state,
+                page=page,
+                per_page=per_page,
+            )
+            security_logger.info(f"Cache invalidated for project {project.id} PRs (refresh requested)")
+        prs_data = github_service.fetch_pull_requests(
+            token=github_app_service.project_token(project),
+            owner=project.github_repo_owner,
+            repo=project.github_repo_name,
+            state=platform_state,
+            page=page,
+            per_page=per_page,
+        )
+        return prs_data["pull_requests"]
+
+    if refresh:
+        cache_service.invalidate(
+            "gitlab:mrs",
+            project_id=project.gitlab_project_id,
+            state=platform_state,
+            page=page,
+            per_page=per_page,
+        )
+        security_logger.info(f"Cache invalidated for project {project.id} MRs (refresh requested)")
+    mrs_data = gitlab_service.fetch_merge_requests(
+        token=project.gitlab_token,
+        project_id=project.gitlab_project_id,
+        state=platform_state,
+        page=page,
+        per_page=per_page,
+    )
+    return mrs_data["merge_requests"]
+
+
 @router.get("/{project_id}/pull-requests", response_model=PullRequestListResponse)
 def get_pull_requests(
     project_id: int,
+    background_tasks: BackgroundTasks,
     state: str = Query("open", regex="^(open|opened|closed|merged|all)$"),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     refresh: bool = Query(False, description="Bypass cache and fetch fresh data"),
+    author: Optional[str] = Query(None, description="Only PRs opened by this user"),
+    branch: Optional[str] = Query(None, description="Only PRs from or into this branch"),
+    search: Optional[str] = Query(None, max_length=200, description="Full-text search in titles"),
+    sort: str = Query("updated", regex="^(updated|created)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
 
     project = _get_project_with_permission(project_id, current_user, db)
 
-    try:
-        # Clear cache if refresh requested
-        if refresh:
-            if project.platform == PlatformType.GITHUB:
-                cache_service.invalidate(
-                    "github:prs",
-                    owner=project.github_repo_owner,
-                    repo=project.github_repo_name,
-                    state=state if state in ["open", "closed", "all"] else "open",
-                    page=page,
-                    per_page=per_page,
-                )
-            elif project.platform == PlatformType.GITLAB:
-                cache_service.invalidate(
-                    "gitlab:mrs",
-                    project_id=project.gitlab_project_id,
-                    state="opened" if state == "open" else state,
-                    page=page,
-                    per_page=per_page,
-                )
-            security_logger.info(f"Cache invalidated for project {project_id} PRs (refresh requested)")
+    if not settings.PULL_REQUEST_MIRROR_ENABLED and (author or branch or search or cursor or sort != "updated"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filtering, sorting and cursors need the local PR table (PULL_REQUEST_MIRROR_ENABLED)",
+        )
 
+    try:
+        next_cursor = None
         if project.platform == PlatformType.GITHUB:
             # GitHub uses 'open', 'closed', 'all'
-            github_state = state if state in ["open", "closed", "all"] else "open"
-            prs_data = github_service.fetch_pull_requests(
-                token=project.github_token,
-                owner=project.github_repo_owner,
-                repo=project.github_repo_name,
-                state=github_state,
-                page=page,
-                per_page=per_page,
-            )
-            pull_requests = prs_data["pull_requests"]
-
+            platform_state = state if state in ["open", "closed", "all"] else "open"
         elif project.platform == PlatformType.GITLAB:
-            gitlab_state = "opened" if state == "open" else state
-            mrs_data = gitlab_service.fetch_merge_requests(
-                token=project.gitlab_token,
-                project_id=project.gitlab_project_id,
-                state=gitlab_state,
-                page=page,
-                per_page=per_page,
-            )
-            pull_requests = mrs_data["merge_requests"]
-
+            platform_state = "opened" if state == "open" else state
         else:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported platform")
 
+        if settings.PULL_REQUEST_MIRROR_ENABLED:
+            try:
+                pull_requests, next_cursor = pull_request_sync_service.list_pull_requests(
+                    db,
+                    project,
+                    background_tasks,
+                    states=None if platform_state == "all" else [platform_state],
+                    author=author,
+                    branch=branch,
+                    search=search,
+                    sort=sort,
+                    cursor=cursor,
+                    page=page,
+                    per_page=per_page,
+                    refresh=refresh,
+                )
+            except pull_request_sync_service.PullRequestSyncFailed as e:
+                # The platform API can serve a plain listing, but not the table's filters or cursors
+                if author or branch or search or cursor or sort != "updated":
+                    raise HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail="Pull requests could not be synced; try again shortly",
+                    )
+                security_logger.warning(f"PR sync failed for project {project_id}, listing from the API: {e}")
+                pull_requests = _fetch_pull_requests_from_api(project, platform_state, page, per_page, refresh)
+
+        else:
+            pull_requests = _fetch_pull_requests_from_api(project, platform_state, page, per_page, refresh)
+
         prs = [PullRequestSummary(**pr) for pr in pull_requests]
+        pr_prefetch_service.queue_prefetch(project, pull_requests)
 
         security_logger.info(f"User {current_user.email} fetched {len(prs)} PRs/MRs from project {project.name}")
 
@@ -155,6 +214,7 @@ def get_pull_requests(
             page=page,
             per_page=per_page,
             pull_requests=prs,
+            next_cursor=next_cursor,
         )
 
     except HTTPException:
@@ -165,7 +225,7 @@ def get_pull_requests(
 
 
 @router.get("/{project_id}/pull-requests/{pr_number}", response_model=PullRequestDetailsResponse)
-def get_pull_request_details(
+async def get_pull_request_details(
     project_id: int,
     pr_number: int,
     current_user: User = Depends(get_current_active_user),
@@ -176,14 +236,14 @@ def get_pull_request_details(
 
     try:
         if project.platform == PlatformType.GITHUB:
-            pr_data = github_service.fetch_pull_request_details(
-                token=project.github_token,
+            pr_data = await github_service.fetch_pull_request_details_async(
+                token=github_app_service.project_token(project),
                 owner=project.github_repo_owner,
                 repo=project.github_repo_name,
                 pr_number=pr_number,
             )
         elif project.platform == PlatformType.GITLAB:
-            pr_data = gitlab_service.fetch_merge_request_details(
+            pr_data = await gitlab_service.fetch_merge_request_details_async(
                 token=project.gitlab_token, project_id=project.gitlab_project_id, mr_iid=pr_number
             )
         else:
@@ -211,27 +271,46 @@ def get_file_content(
     project_id: int,
     path: str = Query(..., description="File path in the repository"),
     branch: str = Query("main", description="Branch name"),
+    raw: bool = Query(False, description="Stream the decoded file bytes instead of JSON"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
 
     project = _get_project_with_permission(project_id, current_user, db)
 
-    try:
-        if project.platform == PlatformType.GITHUB:
-            file_data = github_service.fetch_file_content(
-                token=project.github_token,
-                owner=project.github_repo_owner,
-                repo=project.github_repo_name,
-                file_path=path,
-                branch=branch,
+    if raw:
+        try:
+            status_code, headers, body = raw_content_service.open_raw_file(
+                project, path, branch, range_header=range_header, if_none_match=if_none_match
             )
-        elif project.platform == PlatformType.GITLAB:
-            file_data = gitlab_service.fetch_file_content(
-                token=project.gitlab_token, project_id=project.gitlab_project_id, file_path=path, branch=branch
+        except HTTPException:
+            raise
+        except Exception as e:
+            security_logger.error(f"Error streaming file content: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch file content"
             )
-        else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported platform")
+        return StreamingResponse(body, status_code=status_code, headers=headers, media_type=headers["Content-Type"])
+
+    try:
+        file_data = repo_mirror_service.fetch_file_content(project, path, branch)
+        if file_data is None:
+            if project.platform == PlatformType.GITHUB:
+                file_data = github_service.fetch_file_content(
+                    token=github_app_service.project_token(project),
+                    owner=project.github_repo_owner,
+                    repo=project.github_repo_name,
+                    file_path=path,
+                    branch=branch,
+                )
+            elif project.platform == PlatformType.GITLAB:
+                file_data = gitlab_service.fetch_file_content(
+                    token=project.gitlab_token, project_id=project.gitlab_project_id, file_path=path, branch=branch
+                )
+            else:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported platform")
 
         file_content = FileContent(**file_data)
 
@@ -258,20 +337,22 @@ def get_file_diff(
     project = _get_project_with_permission(project_id, current_user, db)
 
     try:
-        if project.platform == PlatformType.GITHUB:
-            diff_data = github_service.fetch_file_diff(
-                token=project.github_token,
-                owner=project.github_repo_owner,
-                repo=project.github_repo_name,
-                pr_number=pr_number,
-                file_path=path,
-            )
-        elif project.platform == PlatformType.GITLAB:
-            diff_data = gitlab_service.fetch_file_diff(
-                token=project.gitlab_token, project_id=project.gitlab_project_id, mr_iid=pr_number, file_path=path
-            )
-        else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported platform")
+        diff_data = repo_mirror_service.fetch_file_diff(project, pr_number, path)
+        if diff_data is None:
+            if project.platform == PlatformType.GITHUB:
+                diff_data = github_service.fetch_file_diff(
+                    token=github_app_service.project_token(project),
+                    owner=project.github_repo_owner,
+                    repo=project.github_repo_name,
+                    pr_number=pr_number,
+                    file_path=path,
+                )
+            elif project.platform == PlatformType.GITLAB:
+                diff_data = gitlab_service.fetch_file_diff(
+                    token=project.gitlab_token, project_id=project.gitlab_project_id, mr_iid=pr_number, file_path=path
+                )
+            else:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported platform")
 
         file_diff = FileDiff(**diff_data)
 
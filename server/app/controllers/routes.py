@@ -1,8 +1,10 @@
 from fastapi import FastAPI
 
 from app.controllers import (
+    admin_controller,
     ai_review_controller,
     auth_controller,
+    github_app_controller,
     payment_controller,
     pr_comment_controller,
     project_controller,
@@ -10,6 +12,7 @@ from app.controllers import (
     subscription_controller,
     team_controller,
     user_controller,
+    webhook_controller,
 )
 
 
@@ -17,9 +20,12 @@ def register_routes(app: FastAPI) -> None:
     app.include_router(auth_controller.router)
     app.include_router(user_controller.router)
     app.include_router(project_controller.router)
+    app.include_router(github_app_controller.router)
     app.include_router(repository_controller.router)
     app.include_router(ai_review_controller.router)
     app.include_router(pr_comment_controller.router)
     app.include_router(team_controller.router)
     app.include_router(subscription_controller.router)
     app.include_router(payment_controller.router)
+    app.include_router(admin_controller.router)
+    app.include_router(webhook_controller.router)
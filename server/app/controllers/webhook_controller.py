@@ -0,0 +1,68 @@
+"""
+Webhook Controller
+Receives GitHub / GitLab repository events to invalidate cached API data and optionally trigger AI reviews.
+"""
+
+import json
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.core.dependencies import get_db
+from app.services import webhook_service
+
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+
+
+async def _json_payload(request: Request) -> tuple:
+    body = await request.body()
+    try:
+        return body, json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+
+
+@router.post("/github")
+async def github_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    x_github_event: str = Header(None, alias="X-GitHub-Event"),
+    x_hub_signature_256: str = Header(None, alias="X-Hub-Signature-256"),
+    db: Session = Depends(get_db),
+):
+    """Handle GitHub push / pull_request / comment events"""
+    if not settings.GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GitHub webhooks are not configured")
+
+    body, payload = await _json_payload(request)
+    if not webhook_service.verify_github_signature(settings.GITHUB_WEBHOOK_SECRET, body, x_hub_signature_256):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook signature")
+
+    if x_github_event == "ping":
+        return {"status": "ok", "event": "ping"}
+
+    result = webhook_service.handle_github_event(db, x_github_event, payload)
+    queued = webhook_service.queue_reviews(background_tasks, result["reviews"])
+    return {"status": "ok", "event": result["event"], "projects": result["projects"], "reviews_queued": queued}
+
+
+@router.post("/gitlab")
+async def gitlab_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    x_gitlab_event: str = Header(None, alias="X-Gitlab-Event"),
+    x_gitlab_token: str = Header(None, alias="X-Gitlab-Token"),
+    db: Session = Depends(get_db),
+):
+    """Handle GitLab push / merge_request / note events"""
+    if not settings.GITLAB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GitLab webhooks are not configured")
+
+    if not webhook_service.verify_gitlab_token(settings.GITLAB_WEBHOOK_SECRET, x_gitlab_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook token")
+
+    _, payload = await _json_payload(request)
+    result = webhook_service.handle_gitlab_event(db, x_gitlab_event, payload)
+    queued = webhook_service.queue_reviews(background_tasks, result["reviews"])
+    return {"status": "ok", "event": result["event"], "projects": result["projects"], "reviews_queued": queued}
@@ -12,6 +12,8 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from app.config.settings import settings
 from app.controllers.routes import register_routes
 from app.core.exception_config import register_exception_handlers
+from app.services.cache_service import cache_service
+from app.services.http_client import close_async_clients, close_sessions
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,8 +40,12 @@ def setup_static_files(app: FastAPI) -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🚀 Application starting up...")
+    cache_service.start_invalidation_listener()
     yield
     logger.info("🛑 Application shutting down...")
+    cache_service.stop_invalidation_listener()
+    close_sessions()
+    await close_async_clients()
 
 
 app = FastAPI(
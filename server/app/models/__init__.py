@@ -1,10 +1,14 @@
 from app.models.ai_review import AIReview
 from app.models.comment_reaction import CommentReaction
+from app.models.github_installation import GitHubInstallation
+from app.models.llm_usage import LLMUsage
 from app.models.password_reset import PasswordResetCode
 from app.models.pr_comment import PRComment
 from app.models.project import PlatformType, Project
 from app.models.project_invitation import ProjectInvitation, ProjectInvitationRole, ProjectInvitationStatus
 from app.models.project_member import ProjectMember, ProjectMemberRole
+from app.models.project_statistics import ProjectStatistics
+from app.models.pull_request import PullRequestRecord, PullRequestSyncState
 from app.models.usage_tracking import UsageTracking
 from app.models.user import SubscriptionTier, User, UserRole
 
@@ -24,4 +28,9 @@ __all__ = [
     "ProjectInvitationStatus",
     "UsageTracking",
     "PasswordResetCode",
+    "LLMUsage",
+    "ProjectStatistics",
+    "PullRequestRecord",
+    "PullRequestSyncState",
+    "GitHubInstallation",
 ]
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import JSON, Column, DateTime, Enum, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -41,11 +41,18 @@ class AIReview(Base):
     ai_model = Column(String(100), nullable=False, default="llama-3.3-70b-versatile")
     tokens_used = Column(Integer, default=0)
     processing_time_seconds = Column(Integer, nullable=True)
+    timings = Column(JSON, nullable=True)
     api_key_used = Column(Integer, nullable=True)
     requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(Text, nullable=True)
+    # PR head commit the issues' line numbers refer to
+    head_sha = Column(String(40), nullable=True)
+    # Set once the issues were posted to the PR/MR as a platform review
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    published_url = Column(String(500), nullable=True)
+    published_comments = Column(Integer, nullable=True)
 
     # Relationships
     project = relationship("Project", back_populates="ai_reviews")
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.config.database import Base
+
+
+class GitHubInstallation(Base):
+    """A GitHub App installation a user proved access to through the App's OAuth flow.
+
+    Projects may only be connected through installations linked to the user connecting them.
+    """
+
+    __tablename__ = "github_installations"
+    __table_args__ = (UniqueConstraint("installation_id", "user_id", name="uq_github_installations_installation_user"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    installation_id = Column(BigInteger, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    account_login = Column(String(255), nullable=True)
+    verified_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<GitHubInstallation {self.installation_id} user={self.user_id}>"
@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+
+from app.config.database import Base
+
+
+class LLMUsage(Base):
+    """One row per LLM call attempt, successful or not"""
+
+    __tablename__ = "llm_usage"
+    __table_args__ = (
+        Index("ix_llm_usage_key_created", "api_key_index", "created_at"),
+        Index("ix_llm_usage_project_created", "project_id", "created_at"),
+        Index("ix_llm_usage_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(BigInteger, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    api_key_index = Column(Integer, nullable=False)
+    model = Column(String(100), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="SET NULL"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    review_id = Column(Integer, ForeignKey("ai_reviews.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String(20), nullable=False)
+    error_type = Column(String(100), nullable=True)
+    max_tokens = Column(Integer, nullable=True)
+    prompt_tokens = Column(Integer, default=0, nullable=False)
+    completion_tokens = Column(Integer, default=0, nullable=False)
+    total_tokens = Column(Integer, default=0, nullable=False)
+    latency_ms = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<LLMUsage {self.id} key#{self.api_key_index} {self.status} {self.total_tokens} tokens>"
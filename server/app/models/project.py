@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Enum, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -23,6 +23,8 @@ class Project(Base):
     github_token = Column(String, nullable=True)
     github_repo_owner = Column(String, nullable=True)
     github_repo_name = Column(String, nullable=True)
+    # Set for projects that authenticate through the GitHub App instead of a personal token
+    github_installation_id = Column(BigInteger, nullable=True, index=True)
     gitlab_project_id = Column(String, nullable=True)
     gitlab_token = Column(String, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
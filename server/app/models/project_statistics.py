@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.sql import func
+
+from app.config.database import Base
+
+
+class ProjectStatistics(Base):
+    """Precomputed repository counters for a project, refreshed in the background"""
+
+    __tablename__ = "project_stats"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    branches_count = Column(Integer, default=0, nullable=False)
+    open_prs_count = Column(Integer, default=0, nullable=False)
+    closed_prs_count = Column(Integer, default=0, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(String(500), nullable=True)
+
+    def __repr__(self):
+        return f"<ProjectStatistics project={self.project_id} refreshed_at={self.refreshed_at}>"
@@ -0,0 +1,54 @@
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, text
+from sqlalchemy.sql import func
+
+from app.config.database import Base
+
+
+class PullRequestRecord(Base):
+    """Local copy of a project's PR/MR list, kept current by incremental sync"""
+
+    __tablename__ = "pull_requests"
+    __table_args__ = (
+        UniqueConstraint("project_id", "number", name="uq_pull_requests_project_number"),
+        # Keyset pagination for both sort orders, newest first
+        Index("ix_pull_requests_project_updated", "project_id", text("updated_at DESC"), text("number DESC")),
+        Index("ix_pull_requests_project_created", "project_id", text("created_at DESC"), text("number DESC")),
+        Index("ix_pull_requests_project_author", "project_id", "author"),
+        Index("ix_pull_requests_project_source_branch", "project_id", "source_branch"),
+        Index("ix_pull_requests_project_target_branch", "project_id", "target_branch"),
+        Index("ix_pull_requests_title_search", text("to_tsvector('simple', title)"), postgresql_using="gin"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    number = Column(Integer, nullable=False)
+    title = Column(Text, nullable=False)
+    # As the platform reports it: open/closed (GitHub), opened/closed/merged/locked (GitLab)
+    state = Column(String(20), nullable=False)
+    author = Column(String(255), nullable=False)
+    source_branch = Column(String(255), nullable=False)
+    target_branch = Column(String(255), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    # The full list entry, returned as is
+    summary = Column(JSON, nullable=False)
+
+    def __repr__(self):
+        return f"<PullRequestRecord project={self.project_id} #{self.number} {self.state}>"
+
+
+class PullRequestSyncState(Base):
+    """When a project's PR list was last synced, how far it is complete, and the last sync error"""
+
+    __tablename__ = "pull_request_sync"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(String(500), nullable=True)
+    # Every PR updated up to here is stored; the next walk stops at it
+    watermark = Column(DateTime(timezone=True), nullable=True)
+    # {"since", "resume", "top"} of a walk that hit PULL_REQUEST_SYNC_MAX_PAGES and is continued by the next sync
+    backfill = Column(JSON, nullable=True)
+
+    def __repr__(self):
+        return f"<PullRequestSyncState project={self.project_id} synced_at={self.synced_at}>"
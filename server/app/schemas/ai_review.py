@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -55,10 +55,13 @@ class AIReviewResponse(BaseModel):
     ai_model: str
     tokens_used: int
     processing_time_seconds: Optional[int]
+    timings: Optional[Dict[str, Any]] = None
     requested_by: int
     created_at: datetime
     completed_at: Optional[datetime]
     error_message: Optional[str]
+    published_at: Optional[datetime] = None
+    published_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -70,8 +73,34 @@ class AIReviewWithIssues(AIReviewResponse):
     requester_username: str
 
 
+class ReviewPublishResponse(BaseModel):
+    review_id: int
+    published_at: datetime
+    url: Optional[str] = None
+    inline_comments: int
+    # Issues without a line in the current diff, listed in the review body instead
+    summary_issues: int
+
+
 class ReviewListResponse(BaseModel):
     reviews: List[AIReviewResponse]
     total: int
     page: int
     per_page: int
+
+
+class MetricPercentiles(BaseModel):
+    count: int
+    mean: float
+    p50: float
+    p90: float
+    p95: float
+    p99: float
+    max: float
+
+
+class ReviewTimingsReport(BaseModel):
+    days: int
+    reviews: int
+    metrics: Dict[str, MetricPercentiles]
+    flag_counts: Dict[str, int]
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class GitHubInstallationLinkRequest(BaseModel):
+    # `code` GitHub appends to the App's callback URL after the user authorizes it
+    code: str = Field(..., min_length=1)
+
+
+class GitHubInstallationResponse(BaseModel):
+    installation_id: int
+    account_login: Optional[str] = None
+    verified_at: datetime
+
+    class Config:
+        from_attributes = True
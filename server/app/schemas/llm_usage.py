@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class LLMUsageBucket(BaseModel):
+    bucket_start: datetime
+    group: Optional[str] = None
+    calls: int
+    errors: int
+    rate_limited: int
+    error_rate: float
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    avg_latency_ms: Optional[float] = None
+    requests_per_minute: float
+    tokens_per_minute: float
+    requests_headroom: Optional[float] = None
+    tokens_headroom: Optional[float] = None
+
+
+class LLMUsageLimits(BaseModel):
+    requests_per_minute_per_key: Optional[int] = None
+    tokens_per_minute_per_key: Optional[int] = None
+
+
+class LLMUsageRollupResponse(BaseModel):
+    bucket: str
+    group_by: str
+    hours: int
+    limits: LLMUsageLimits
+    buckets: List[LLMUsageBucket]
@@ -3,6 +3,7 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field, validator
 
+from app.config.settings import settings
 from app.models.project import PlatformType
 
 
@@ -15,9 +16,17 @@ class ProjectBase(BaseModel):
 
 class ProjectCreateGitHub(ProjectBase):
     platform: PlatformType = PlatformType.GITHUB
-    github_token: str
+    github_token: Optional[str] = None
     github_repo_owner: str
     github_repo_name: str
+    # GitHub App installation with access to the repository, instead of a personal token
+    github_installation_id: Optional[int] = None
+
+    @validator("github_installation_id", always=True)
+    def validate_credentials(cls, v, values):
+        if not v and not values.get("github_token"):
+            raise ValueError("Either github_token or github_installation_id is required")
+        return v
 
     @validator("platform")
     def validate_platform(cls, v):
@@ -50,11 +59,48 @@ class ProjectCreateGitLab(ProjectBase):
         return v
 
 
+class ProjectBulkCreate(BaseModel):
+    platform: PlatformType
+    # "owner/repo" for GitHub, "group/project" paths for GitLab; capped here, before any of them is verified
+    repositories: List[str] = Field([], max_length=settings.BULK_IMPORT_MAX_PROJECTS)
+    # GitHub organization or user / GitLab group (with subgroups) whose repositories are all imported
+    organization: Optional[str] = None
+    include_archived: bool = False
+    github_token: Optional[str] = None
+    github_installation_id: Optional[int] = None
+    gitlab_token: Optional[str] = None
+
+    @validator("repositories", each_item=True)
+    def validate_repository(cls, v):
+        v = v.strip().strip("/")
+        if "/" not in v:
+            raise ValueError("Repositories must be given as owner/repo (GitHub) or group/project (GitLab)")
+        return v
+
+    @validator("organization", always=True)
+    def validate_source(cls, v, values):
+        if not v and not values.get("repositories"):
+            raise ValueError("Either repositories or organization is required")
+        if v and values.get("repositories"):
+            raise ValueError("Give either repositories or organization, not both")
+        return v
+
+    @validator("gitlab_token", always=True)
+    def validate_credentials(cls, v, values):
+        if values.get("platform") == PlatformType.GITHUB:
+            if not values.get("github_token") and not values.get("github_installation_id"):
+                raise ValueError("Either github_token or github_installation_id is required")
+        elif not v:
+            raise ValueError("gitlab_token is required")
+        return v
+
+
 class ProjectUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     description: Optional[str] = None
     repository_url: Optional[str] = None
     github_token: Optional[str] = None
+    github_installation_id: Optional[int] = None
     gitlab_token: Optional[str] = None
     is_active: Optional[bool] = None
 
@@ -67,6 +113,7 @@ class ProjectResponse(ProjectBase):
     updated_at: Optional[datetime] = None
     github_repo_owner: Optional[str] = None
     github_repo_name: Optional[str] = None
+    github_installation_id: Optional[int] = None
     gitlab_project_id: Optional[str] = None
 
     class Config:
@@ -99,6 +146,31 @@ class ProjectResponseWithStats(ProjectResponse):
     stats: ProjectStats
 
 
+class ProjectStatsResult(BaseModel):
+    project_id: int
+    name: str
+    stats: Optional[ProjectStats] = None
+    error: Optional[str] = None
+
+
+class ProjectStatsBatchResponse(BaseModel):
+    projects: List[ProjectStatsResult]
+
+
+class ProjectBulkResult(BaseModel):
+    repository: str
+    status: str
+    project_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ProjectBulkCreateResponse(BaseModel):
+    created: int
+    skipped: int
+    failed: int
+    results: List[ProjectBulkResult]
+
+
 class ProjectListResponse(BaseModel):
     total: int
     page: int
@@ -53,6 +53,8 @@ class PullRequestSummary(BaseModel):
     upvotes: Optional[int] = None
     downvotes: Optional[int] = None
     work_in_progress: Optional[bool] = None
+    review_decision: Optional[str] = None
+    labels: List[str] = []
 
 
 class PullRequestListResponse(BaseModel):
@@ -62,6 +64,8 @@ class PullRequestListResponse(BaseModel):
     page: int
     per_page: int
     pull_requests: List[PullRequestSummary]
+    # Pass as `cursor` to get the next page (only when served from the local PR table)
+    next_cursor: Optional[str] = None
 
 
 # ==================== Pull Request Details Schemas ====================
@@ -84,6 +88,7 @@ class FileChange(BaseModel):
     diff: Optional[str] = None
     previous_filename: Optional[str] = None
     previous_path: Optional[str] = None
+    sha: Optional[str] = None
 
 
 class PullRequestStats(BaseModel):
@@ -102,6 +107,7 @@ class PullRequestDetails(BaseModel):
     author: PullRequestAuthor
     source_branch: str
     target_branch: str
+    head_sha: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     merged_at: Optional[datetime] = None
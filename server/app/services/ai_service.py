@@ -1,12 +1,17 @@
 import json
 import re
+import threading
 import time
-from typing import Dict, List, Optional
-
-from groq import Groq
+from typing import Callable, Dict, List, Optional, Tuple
 
 from app.config.settings import settings
 from app.core.logging_config import security_logger
+from app.services.llm_providers import LLMRateLimitError, create_provider
+
+DIFF_FILE_MARKER = "\n--- a/"
+AI_SUMMARY_TOKENS = 400
+CHARS_PER_TOKEN = 4
+RATING_SEVERITY = {"LGTM": 0, "Needs Work": 1, "Major Issues": 2}
 
 
 class MultiKeyGroqService:
@@ -15,76 +20,219 @@ class MultiKeyGroqService:
             raise ValueError("At least one Groq API key is required")
 
         self.api_keys = api_keys
-        self.clients = [Groq(api_key=key) for key in api_keys]
+        self.clients = [create_provider(key) for key in api_keys]
         self.current_key_index = 0
         self.key_last_used = {}
         self.key_cooldown = 60
+        # The instance is shared by concurrent reviews (see get_ai_service); rotation state changes under this lock
+        self._key_lock = threading.Lock()
 
-        security_logger.info(f"Initialized Groq AI service with {len(api_keys)} API keys")
+        security_logger.info(f"Initialized AI service with {len(api_keys)} API keys (provider: {self.clients[0].name})")
 
     def _get_next_client(self) -> tuple:
         """Get next available client using round-robin with cooldown"""
-        attempts = 0
-        while attempts < len(self.clients):
-            idx = (self.current_key_index + attempts) % len(self.clients)
-            last_used = self.key_last_used.get(idx, 0)
+        with self._key_lock:
+            attempts = 0
+            while attempts < len(self.clients):
+                idx = (self.current_key_index + attempts) % len(self.clients)
+                last_used = self.key_last_used.get(idx, 0)
 
-            if time.time() - last_used > self.key_cooldown:
-                self.current_key_index = (idx + 1) % len(self.clients)
-                self.key_last_used[idx] = time.time()
-                security_logger.info(f"Using Groq API key #{idx + 1}")
-                return self.clients[idx], idx
+                if time.time() - last_used > self.key_cooldown:
+                    self.current_key_index = (idx + 1) % len(self.clients)
+                    self.key_last_used[idx] = time.time()
+                    security_logger.info(f"Using Groq API key #{idx + 1}")
+                    return self.clients[idx], idx
 
-            attempts += 1
+                attempts += 1
 
-        security_logger.warning("All API keys in cooldown, using key #1")
-        idx = 0
-        self.key_last_used[idx] = time.time()
-        return self.clients[idx], idx
+            security_logger.warning("All API keys in cooldown, using key #1")
+            idx = 0
+            self.key_last_used[idx] = time.time()
+            return self.clients[idx], idx
 
     async def analyze_code(
-        self, pr_diff: str, pr_details: Dict, file_contents: Optional[Dict[str, str]] = None
+        self,
+        pr_diff: str,
+        pr_details: Dict,
+        file_contents: Optional[Dict[str, str]] = None,
+        symbol_context: Optional[List[Dict]] = None,
+        metrics: Optional[Dict] = None,
+        usage_recorder: Optional[Callable[[Dict], None]] = None,
     ) -> Dict:
+        """Review a diff. If `metrics` is given it is filled in place, so timings survive a failed call.
+        `usage_recorder` is called once per LLM call attempt, failed attempts included."""
+        if metrics is None:
+            metrics = {}
+        metrics.update(
+            {
+                "prompt_build_ms": 0,
+                "llm_ms": 0,
+                "prompt_chars": 0,
+                "estimated_prompt_tokens": 0,
+                "llm_calls": 0,
+                "retries": 0,
+                "max_tokens": 0,
+                "truncated": False,
+                "continuations": 0,
+            }
+        )
 
-        prompt = self._build_prompt(pr_diff, pr_details, file_contents)
+        pr_diff = pr_diff[: settings.MAX_DIFF_SIZE]
+        build_start = time.perf_counter()
+        prompt = self._build_prompt(pr_diff, pr_details, file_contents, symbol_context)
+        max_tokens = self._estimate_output_budget(pr_diff)
+        metrics["prompt_build_ms"] += _elapsed_ms(build_start)
+
+        content, truncated, tokens_used, key_index = self._complete(prompt, max_tokens, metrics, usage_recorder)
+        result = self._salvage_truncated_response(content) if truncated else self._parse_response(content)
+        continuations = 0
+
+        # A truncated answer only lost its tail: re-ask for the files it did not get to
+        while truncated and continuations < settings.AI_MAX_CONTINUATIONS:
+            remaining_diff, kept_issues = self._remaining_diff(pr_diff, result["issues"])
+            if not remaining_diff:
+                break
+
+            continuations += 1
+            security_logger.warning(
+                f"AI response truncated at {max_tokens} tokens, continuing with "
+                f"{remaining_diff.count(DIFF_FILE_MARKER)} remaining file(s)"
+            )
+
+            # If nothing at all was salvaged the estimate was too low, so grow it for the retry
+            if not result["issues"]:
+                if max_tokens >= settings.AI_MAX_TOKENS:
+                    break
+                max_tokens = settings.AI_MAX_TOKENS
+            else:
+                max_tokens = self._estimate_output_budget(remaining_diff)
+
+            build_start = time.perf_counter()
+            prompt = self._build_prompt(remaining_diff, pr_details, file_contents, symbol_context, continuation=True)
+            metrics["prompt_build_ms"] += _elapsed_ms(build_start)
+
+            content, truncated, call_tokens, key_index = self._complete(prompt, max_tokens, metrics, usage_recorder)
+            tokens_used += call_tokens
+
+            partial = self._salvage_truncated_response(content) if truncated else self._parse_response(content)
+            result["issues"] = kept_issues + partial["issues"]
+            result["rating"] = max(result["rating"], partial["rating"], key=_rating_severity)
+
+        result["tokens_used"] = tokens_used
+        result["api_key_used"] = key_index + 1
+        result["truncated"] = truncated
+        result["continuations"] = continuations
+        metrics["continuations"] = continuations
+
+        security_logger.info(
+            f"AI analysis successful: {len(result['issues'])} issues found, {tokens_used} tokens used, "
+            f"{continuations} continuation(s)"
+        )
+        return result
+
+    def _complete(
+        self, prompt: str, max_tokens: int, metrics: Dict, usage_recorder: Optional[Callable[[Dict], None]] = None
+    ) -> Tuple[str, bool, int, int]:
+        """Run one chat completion, rotating keys on failure. Returns (content, truncated, tokens, key index)"""
+        metrics["prompt_chars"] += len(prompt)
+        metrics["estimated_prompt_tokens"] += len(prompt) // CHARS_PER_TOKEN
+        metrics["max_tokens"] = max(metrics["max_tokens"], max_tokens)
 
+        key_index = 0
         for attempt in range(len(self.clients)):
+            if attempt:
+                metrics["retries"] += 1
+            call = {"api_key_index": 0, "model": settings.GROQ_MODEL, "max_tokens": max_tokens}
+            llm_start = None
             try:
                 client, key_index = self._get_next_client()
+                call["api_key_index"] = key_index + 1
 
-                security_logger.info(f"Calling Groq AI (attempt {attempt + 1}/{len(self.clients)})")
-
-                response = client.chat.completions.create(
-                    model=settings.GROQ_MODEL,
-                    messages=[
-                        {"role": "system", "content": self._get_system_prompt()},
-                        {"role": "user", "content": prompt},
-                    ],
-                    temperature=0.2,
-                    max_tokens=settings.AI_MAX_TOKENS,
-                    timeout=settings.AI_TIMEOUT,
+                security_logger.info(
+                    f"Calling Groq AI (attempt {attempt + 1}/{len(self.clients)}, max_tokens={max_tokens})"
                 )
 
-                content = response.choices[0].message.content
-                tokens_used = response.usage.total_tokens
-
-                result = self._parse_response(content)
-                result["tokens_used"] = tokens_used
-                result["api_key_used"] = key_index + 1
-
-                security_logger.info(
-                    f"AI analysis successful: {len(result['issues'])} issues found, " f"{tokens_used} tokens used"
+                metrics["llm_calls"] += 1
+                llm_start = time.perf_counter()
+                try:
+                    response = client.complete(
+                        messages=[
+                            {"role": "system", "content": self._get_system_prompt()},
+                            {"role": "user", "content": prompt},
+                        ],
+                        model=settings.GROQ_MODEL,
+                        max_tokens=max_tokens,
+                        temperature=0.2,
+                        timeout=settings.AI_TIMEOUT,
+                    )
+                finally:
+                    call["latency_ms"] = _elapsed_ms(llm_start)
+                    metrics["llm_ms"] += call["latency_ms"]
+
+                truncated = response["finish_reason"] == "length"
+                metrics["truncated"] = metrics["truncated"] or truncated
+
+                call.update(
+                    {
+                        "status": "success",
+                        "prompt_tokens": response["prompt_tokens"],
+                        "completion_tokens": response["completion_tokens"],
+                        "total_tokens": response["total_tokens"],
+                    }
                 )
-                return result
+                self._record_usage(usage_recorder, call)
+                return response["content"] or "", truncated, response["total_tokens"], key_index
 
             except Exception as e:
                 security_logger.error(f"Groq API error with key #{key_index + 1}: {e}")
+                if llm_start is not None:
+                    call["status"] = "rate_limited" if isinstance(e, LLMRateLimitError) else "error"
+                    call["error_type"] = type(e).__name__
+                    self._record_usage(usage_recorder, call)
                 if attempt == len(self.clients) - 1:
                     raise Exception(f"All {len(self.clients)} API keys failed. Last error: {str(e)}")
                 continue
 
         raise Exception("All API keys failed")
 
+    def _record_usage(self, usage_recorder: Optional[Callable[[Dict], None]], call: Dict) -> None:
+        if not usage_recorder:
+            return
+        try:
+            usage_recorder(call)
+        except Exception as e:
+            # Accounting must never fail a review
+            security_logger.warning(f"Failed to record LLM usage: {e}")
+
+    def _estimate_output_budget(self, pr_diff: str) -> int:
+        """Size max_tokens from the diff instead of reserving AI_MAX_TOKENS for every call"""
+        files = max(pr_diff.count(DIFF_FILE_MARKER), 1)
+        lines = pr_diff.splitlines()
+        hunks = sum(1 for line in lines if line.startswith("@@"))
+        changed = sum(1 for line in lines if line[:1] in "+-" and not line.startswith(("+++", "---")))
+
+        estimated_issues = min(files + hunks // 2 + changed // 40, settings.AI_MAX_ESTIMATED_ISSUES)
+        budget = AI_SUMMARY_TOKENS + estimated_issues * settings.AI_TOKENS_PER_ISSUE
+        return max(settings.AI_MIN_TOKENS, min(budget, settings.AI_MAX_TOKENS))
+
+    def _remaining_diff(self, pr_diff: str, issues: List[Dict]) -> Tuple[str, List[Dict]]:
+        """Diff of the files the truncated answer had not finished, plus the issues worth keeping.
+
+        Issues are requested in diff order, so every file before the last one mentioned is complete.
+        The last mentioned file may have been cut mid-way: it is reviewed again and its partial issues dropped.
+        """
+        chunks = [DIFF_FILE_MARKER + chunk for chunk in pr_diff.split(DIFF_FILE_MARKER)[1:]]
+        filenames = [chunk[len(DIFF_FILE_MARKER) :].split("\n", 1)[0].strip() for chunk in chunks]
+
+        mentioned = [filenames.index(issue.get("file")) for issue in issues if issue.get("file") in filenames]
+        if not mentioned:
+            return "".join(chunks), []
+
+        resume_at = max(mentioned)
+        done = set(filenames[:resume_at])
+        kept_issues = [issue for issue in issues if issue.get("file") in done]
+        return "".join(chunks[resume_at:]), kept_issues
+
     def _get_system_prompt(self) -> str:
         return """You are an expert code reviewer. Analyze code changes and identify:
 
@@ -126,9 +274,18 @@ Provide overall assessment:
       "suggestion": "Add null check: if user is not None:..."
     }
   ]
-}"""
+}
+
+List issues in the order their files appear in the diff."""
 
-    def _build_prompt(self, pr_diff: str, pr_details: Dict, file_contents: Optional[Dict] = None) -> str:
+    def _build_prompt(
+        self,
+        pr_diff: str,
+        pr_details: Dict,
+        file_contents: Optional[Dict] = None,
+        symbol_context: Optional[List[Dict]] = None,
+        continuation: bool = False,
+    ) -> str:
 
         title = pr_details.get("title", "N/A")
         description = pr_details.get("description", pr_details.get("body", "N/A"))
@@ -140,7 +297,14 @@ Provide overall assessment:
 
         files_changed = len(pr_details.get("files", []))
 
-        prompt = f"""Review this pull request:
+        intro = "Review this pull request:"
+        if continuation:
+            intro = (
+                "Continue reviewing this pull request. Earlier files were already reviewed; "
+                "report issues only for the files in the diff below:"
+            )
+
+        prompt = f"""{intro}
 
 **Title**: {title}
 **Description**: {description or 'No description provided'}
@@ -158,6 +322,14 @@ Provide overall assessment:
             for path, content in list(file_contents.items())[: settings.MAX_FILES_CONTEXT]:
                 prompt += f"\n**{path}**:\n```\n{content[:settings.MAX_FILE_CONTENT_SIZE]}\n```\n"
 
+        if symbol_context:
+            prompt += "\n**Referenced Definitions** (code the changes call or use, at the PR head):\n"
+            for definition in symbol_context:
+                prompt += (
+                    f"\n**{definition['path']}:{definition['line']}** (`{definition['name']}`):\n"
+                    f"```\n{definition['snippet']}\n```\n"
+                )
+
         prompt += "\nAnalyze the changes thoroughly and provide your code review as JSON."
         return prompt
 
@@ -192,14 +364,70 @@ Provide overall assessment:
                 "tokens_used": 0,
             }
 
+    def _salvage_truncated_response(self, response: str) -> Dict:
+        """Recover the summary, rating and every complete issue object from JSON cut off at max_tokens"""
+        summary_match = re.search(r'"summary"\s*:\s*"((?:[^"\\]|\\.)*)"', response)
+        rating_match = re.search(r'"rating"\s*:\s*"([^"]*)"', response)
+
+        issues = []
+        issues_match = re.search(r'"issues"\s*:\s*\[', response)
+        if issues_match:
+            decoder = json.JSONDecoder()
+            position = issues_match.end()
+            while True:
+                next_object = response.find("{", position)
+                if next_object == -1:
+                    break
+                try:
+                    issue, position = decoder.raw_decode(response, next_object)
+                except json.JSONDecodeError:
+                    break
+                if isinstance(issue, dict):
+                    issues.append(issue)
+
+        summary = "No summary provided"
+        if summary_match:
+            try:
+                summary = json.loads(f'"{summary_match.group(1)}"')
+            except json.JSONDecodeError:
+                summary = summary_match.group(1)
+
+        return {
+            "summary": summary,
+            "rating": rating_match.group(1) if rating_match else "Needs Work",
+            "issues": issues,
+            "tokens_used": 0,
+        }
+
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def _rating_severity(rating: str) -> int:
+    return RATING_SEVERITY.get(rating, RATING_SEVERITY["Needs Work"])
+
+
+_ai_service: Optional[MultiKeyGroqService] = None
+_ai_service_lock = threading.Lock()
+
 
 def get_ai_service() -> MultiKeyGroqService:
-    api_keys = settings.groq_api_keys_list
-    if not api_keys:
-        security_logger.error("GROQ_API_KEYS environment variable is not configured")
-        raise ValueError(
-            "AI service not configured. Please set GROQ_API_KEYS environment variable. "
-            "Get free API keys from https://console.groq.com"
-        )
-    security_logger.info(f"AI service initialized with {len(api_keys)} API key(s)")
-    return MultiKeyGroqService(api_keys=api_keys)
+    """Shared service instance, so key rotation and cooldowns hold across reviews"""
+    global _ai_service
+    if _ai_service is not None:
+        return _ai_service
+
+    with _ai_service_lock:
+        if _ai_service is not None:
+            return _ai_service
+        api_keys = settings.groq_api_keys_list
+        if not api_keys:
+            security_logger.error("GROQ_API_KEYS environment variable is not configured")
+            raise ValueError(
+                "AI service not configured. Please set GROQ_API_KEYS environment variable. "
+                "Get free API keys from https://console.groq.com"
+            )
+        security_logger.info(f"AI service initialized with {len(api_keys)} API key(s)")
+        _ai_service = MultiKeyGroqService(api_keys=api_keys)
+    return _ai_service
@@ -0,0 +1,134 @@
+import os
+import re
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+
+_SHA_PATTERN = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+# A sweep starts after this fraction of the disk budget was written, and trims the directory to (1 - it)
+SWEEP_FRACTION = 0.1
+
+
+class BlobCache:
+    """Content-addressed file contents keyed by git blob SHA.
+
+    A blob never changes, so entries have no TTL: a byte-bounded LRU in memory, backed by a
+    directory on disk that every worker on the host shares. The directory is kept under
+    `disk_bytes` by sweeping the blobs least recently read (file mtimes are touched on reads).
+    """
+
+    def __init__(self, memory_bytes: int, directory: str, disk_bytes: int = 0):
+        self.memory = LRUCache(maxsize=memory_bytes, getsizeof=len)
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        # Start counting at the threshold, so the first write after startup checks what earlier runs left behind
+        self._written_since_sweep = disk_bytes * SWEEP_FRACTION
+        self._sweeping = False
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.directory, sha[:2], sha[2:])
+
+    def get(self, sha: str) -> Optional[bytes]:
+        if not _SHA_PATTERN.fullmatch(sha or ""):
+            return None
+
+        with self._lock:
+            content = self.memory.get(sha)
+        if content is not None:
+            return content
+
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(sha), "rb") as blob_file:
+                content = blob_file.read()
+            os.utime(self._path(sha))
+        except OSError:
+            return None
+
+        self._remember(sha, content)
+        return content
+
+    def put(self, sha: str, content: bytes) -> None:
+        if not _SHA_PATTERN.fullmatch(sha or ""):
+            return
+
+        self._remember(sha, content)
+        if not self.directory or os.path.exists(self._path(sha)):
+            return
+        try:
+            os.makedirs(os.path.dirname(self._path(sha)), exist_ok=True)
+            # Write then rename, so a concurrent reader never sees a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self._path(sha)))
+            with os.fdopen(fd, "wb") as blob_file:
+                blob_file.write(content)
+            os.replace(tmp_path, self._path(sha))
+        except OSError as e:
+            security_logger.warning(f"Failed to write blob {sha} to disk cache: {e}")
+            return
+        self._note_written(len(content))
+
+    def _note_written(self, size: int) -> None:
+        if not self.disk_bytes:
+            return
+        with self._lock:
+            self._written_since_sweep += size
+            if self._sweeping or self._written_since_sweep < self.disk_bytes * SWEEP_FRACTION:
+                return
+            self._written_since_sweep = 0
+            self._sweeping = True
+        threading.Thread(target=self._sweep, name="blob-cache-sweep", daemon=True).start()
+
+    def _disk_entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _sweep(self) -> None:
+        """Delete the least recently used blobs until the directory is back under its low-water mark"""
+        try:
+            entries = self._disk_entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.disk_bytes:
+                return
+            target = self.disk_bytes * (1 - SWEEP_FRACTION)
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Another worker's sweep got there first
+                    continue
+                total -= size
+                removed += 1
+            security_logger.info(f"Blob cache sweep removed {removed} blob(s), {int(total)} bytes left on disk")
+        except Exception as e:
+            security_logger.warning(f"Blob cache sweep failed: {e}")
+        finally:
+            with self._lock:
+                self._sweeping = False
+
+    def _remember(self, sha: str, content: bytes) -> None:
+        if len(content) > self.memory.maxsize:
+            return
+        with self._lock:
+            self.memory[sha] = content
+
+
+blob_cache = BlobCache(settings.BLOB_CACHE_MEMORY_BYTES, settings.BLOB_CACHE_DIR, settings.BLOB_CACHE_DIR_MAX_BYTES)
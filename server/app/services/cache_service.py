@@ -1,48 +1,221 @@
-import hashlib
-from typing import Any, Optional
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
 
-from cachetools import TTLCache
+from cachetools import LRUCache, TLRUCache
 
+from app.config.settings import settings
 from app.core.logging_config import security_logger
+from app.services import rate_limit_governor
+from app.services.redis_cache import REDIS_AVAILABLE, redis_client
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class _Entry(NamedTuple):
+    value: Any
+    fresh_until: float
+    expires_at: float
 
 
 class CacheService:
     def __init__(self):
-        self.cache = TTLCache(maxsize=1000, ttl=300)
+        # Each entry carries its own soft (fresh_until) and hard (expires_at) deadline
+        self.cache = TLRUCache(maxsize=1000, ttu=lambda _key, entry, _now: entry.expires_at, timer=time.time)
+        self._lock = threading.RLock()
+        # Raw API bodies with their ETag / Last-Modified; outlive the TTL entries so refetches can be conditional
+        self.validators = LRUCache(maxsize=settings.CONDITIONAL_CACHE_MAXSIZE)
+        # Identifies this worker's own invalidation broadcasts so they are not applied twice
+        self.instance_id = uuid.uuid4().hex
+        self._pubsub_thread = None
+        self._refresh_pool = ThreadPoolExecutor(
+            max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh"
+        )
+        self._refreshing = set()
+        # Invalidations seen by keys with a refresh in flight; a refresh started before one must not store its result
+        self._generations: Dict[str, int] = {}
 
     def _generate_key(self, prefix: str, **kwargs) -> str:
-        key_data = f"{prefix}:" + ":".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
-        return hashlib.md5(key_data.encode()).hexdigest()
+        # Kept readable (not hashed) so entries can be invalidated by a subset of their fields
+        return f"{prefix}:" + ":".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
+
+    def _entry(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            return self.cache.get(key)
 
     def get(self, prefix: str, **kwargs) -> Optional[Any]:
+        """Value while it is fresh; stale entries are only served through get_or_fetch"""
+        entry = self._entry(self._generate_key(prefix, **kwargs))
+        if entry is None or entry.fresh_until <= time.time():
+            return None
+        security_logger.info(f"[CACHE HIT] {prefix} - {kwargs}")
+        return entry.value
+
+    def peek(self, prefix: str, **kwargs) -> Optional[Any]:
+        """Value even past its TTL (until hard expiry), without logging a hit or starting a refresh"""
+        entry = self._entry(self._generate_key(prefix, **kwargs))
+        return entry.value if entry is not None else None
+
+    def set(self, prefix: str, value: Any, ttl: int = 300, stale_ttl: int = 0, **kwargs):
+        """Store for `ttl` seconds, plus `stale_ttl` seconds during which get_or_fetch may still serve it"""
+        now = time.time()
+        with self._lock:
+            self.cache[self._generate_key(prefix, **kwargs)] = _Entry(value, now + ttl, now + ttl + stale_ttl)
+        security_logger.info(f"[CACHE SET] {prefix} - {kwargs} (TTL: {ttl}s, stale: {stale_ttl}s)")
+
+    def get_or_fetch(
+        self, prefix: str, fetch: Callable[[], Any], ttl: int = 300, stale_ttl: Optional[int] = None, **kwargs
+    ) -> Any:
+        """Stale-while-revalidate read.
+
+        Fresh entries are returned as is. Within `stale_ttl` after expiry the stale value is returned at once and
+        a single background refresh is started for the key; only a missing (or hard-expired) entry blocks on fetch.
+        """
+        stale_ttl = settings.CACHE_STALE_TTL if stale_ttl is None else stale_ttl
         key = self._generate_key(prefix, **kwargs)
-        value = self.cache.get(key)
-        if value is not None:
-            security_logger.info(f"[CACHE HIT] {prefix} - {kwargs}")
+        entry = self._entry(key)
+
+        if entry is not None:
+            if entry.fresh_until > time.time():
+                security_logger.info(f"[CACHE HIT] {prefix} - {kwargs}")
+            else:
+                security_logger.info(f"[CACHE STALE] {prefix} - {kwargs}")
+                self._refresh_later(key, prefix, fetch, ttl, stale_ttl, kwargs)
+            return entry.value
+
+        security_logger.info(f"[CACHE MISS] {prefix} - {kwargs}")
+        value = fetch()
+        self.set(prefix, value, ttl=ttl, stale_ttl=stale_ttl, **kwargs)
         return value
 
-    def set(self, prefix: str, value: Any, ttl: int = 300, **kwargs):
-        key = self._generate_key(prefix, **kwargs)
-        self.cache[key] = value
-        security_logger.info(f"[CACHE SET] {prefix} - {kwargs} (TTL: {ttl}s)")
+    def _refresh_later(self, key: str, prefix: str, fetch: Callable[[], Any], ttl: int, stale_ttl: int, kwargs):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._generations[key] = 0
+
+        def refresh():
+            try:
+                # Nobody is waiting on this call, so it yields API budget to interactive requests
+                with rate_limit_governor.background():
+                    value = fetch()
+                with self._lock:
+                    if self._generations.get(key):
+                        # Invalidated while fetching (e.g. by a push webhook): the value may predate the change
+                        security_logger.info(f"[CACHE REFRESH DISCARDED] {prefix} - {kwargs}")
+                        return
+                    self.set(prefix, value, ttl=ttl, stale_ttl=stale_ttl, **kwargs)
+            except Exception as e:
+                security_logger.warning(f"[CACHE REFRESH FAILED] {prefix} - {kwargs}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+                    self._generations.pop(key, None)
+
+        self._refresh_pool.submit(refresh)
+
+    def _drop(self, key: str) -> Optional[_Entry]:
+        """Remove an entry and outdate any refresh in flight for it (caller holds the lock)"""
+        if key in self._generations:
+            self._generations[key] += 1
+        return self.cache.pop(key, None)
 
     def invalidate(self, prefix: str, **kwargs):
         key = self._generate_key(prefix, **kwargs)
-        if key in self.cache:
-            del self.cache[key]
+        with self._lock:
+            removed = self._drop(key)
+        if removed is not None:
             security_logger.info(f"[CACHE INVALIDATE] {prefix} - {kwargs}")
 
+    def invalidate_matching(self, prefix: str, broadcast: bool = True, **fields) -> int:
+        """Drop every entry under prefix whose key contains all the given fields, e.g. all pages of a PR list.
+
+        With broadcast, the same invalidation is published to the other workers through Redis.
+        """
+        segments = [f":{k}={v}:" for k, v in fields.items()]
+        with self._lock:
+            keys = [
+                key
+                for key in {*self.cache.keys(), *self._generations}
+                if key.startswith(f"{prefix}:") and all(segment in f"{key}:" for segment in segments)
+            ]
+            for key in keys:
+                self._drop(key)
+
+        if keys:
+            security_logger.info(f"[CACHE INVALIDATE] {prefix} - {fields} ({len(keys)} entries)")
+        if broadcast:
+            self._publish_invalidation(prefix, fields)
+        return len(keys)
+
+    def _publish_invalidation(self, prefix: str, fields: Dict[str, Any]):
+        if not REDIS_AVAILABLE or not redis_client:
+            return
+        message = {"origin": self.instance_id, "prefix": prefix, "fields": fields}
+        try:
+            redis_client.publish(INVALIDATION_CHANNEL, json.dumps(message, default=str))
+        except Exception as e:
+            security_logger.warning(f"Failed to broadcast cache invalidation for {prefix}: {e}")
+
+    def _on_invalidation(self, message: Dict[str, Any]):
+        try:
+            data = json.loads(message["data"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if data.get("origin") == self.instance_id:
+            return
+        self.invalidate_matching(data["prefix"], broadcast=False, **data.get("fields", {}))
+
+    def start_invalidation_listener(self):
+        """Apply invalidations broadcast by other workers (no-op without Redis)"""
+        if not REDIS_AVAILABLE or not redis_client or self._pubsub_thread:
+            return
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as e:
+            security_logger.warning(f"Cache invalidation listener not started: {e}")
+
+    def stop_invalidation_listener(self):
+        if self._pubsub_thread:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+
+    def get_validated(self, prefix: str, **kwargs) -> Optional[Dict[str, Any]]:
+        """Stored {"etag", "last_modified", "body", "meta"} for a previous response, if any"""
+        key = self._generate_key(prefix, **kwargs)
+        with self._lock:
+            return self.validators.get(key)
+
+    def set_validated(
+        self, prefix: str, headers: Mapping[str, str], body: Any, meta: Optional[Dict[str, str]] = None, **kwargs
+    ):
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        key = self._generate_key(prefix, **kwargs)
+        entry = {"etag": etag, "last_modified": last_modified, "body": body, "meta": meta or {}}
+        with self._lock:
+            self.validators[key] = entry
+
     def clear_project(self, project_id: int):
         keys_to_delete = []
-        for key in list(self.cache.keys()):
-            try:
-                if str(project_id) in str(key):
-                    keys_to_delete.append(key)
-            except Exception as e:
-                security_logger.warning(f"Failed to process cache key: {e}")
+        with self._lock:
+            for key in {*self.cache.keys(), *self._generations}:
+                try:
+                    if str(project_id) in str(key):
+                        keys_to_delete.append(key)
+                except Exception as e:
+                    security_logger.warning(f"Failed to process cache key: {e}")
 
-        for key in keys_to_delete:
-            del self.cache[key]
+            for key in keys_to_delete:
+                self._drop(key)
 
         if keys_to_delete:
             security_logger.info(f"[CACHE CLEAR] Cleared {len(keys_to_delete)} cache entries for project {project_id}")
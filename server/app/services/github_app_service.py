@@ -0,0 +1,195 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from fastapi import HTTPException, status
+from jose import jwt
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.models.github_installation import GitHubInstallation
+from app.models.project import Project
+from app.services.http_client import GITHUB_API_URL, get_session, github_session, request_timeout
+
+GITHUB_OAUTH_URL = "https://github.com/login/oauth/access_token"
+
+# installation id -> (token, expiry as epoch seconds), shared by every project under the installation
+_tokens: Dict[int, Tuple[str, float]] = {}
+_tokens_lock = threading.Lock()
+_mint_locks: Dict[int, threading.Lock] = {}
+
+
+def is_configured() -> bool:
+    return bool(settings.GITHUB_APP_ID and settings.GITHUB_APP_PRIVATE_KEY)
+
+
+def _private_key() -> str:
+    # Env files usually carry the PEM on one line with literal \n
+    return settings.GITHUB_APP_PRIVATE_KEY.replace("\\n", "\n")
+
+
+def app_jwt() -> str:
+    """Short-lived RS256 JWT that authenticates as the App itself"""
+    now = int(time.time())
+    # Backdated to allow for clock drift; GitHub rejects an expiry more than 10 minutes out
+    payload = {"iat": now - 60, "exp": now + 540, "iss": settings.GITHUB_APP_ID}
+    return jwt.encode(payload, _private_key(), algorithm="RS256")
+
+
+def _mint(installation_id: int) -> Tuple[str, float]:
+    if not is_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="GitHub App authentication is not configured"
+        )
+
+    headers = {"Authorization": f"Bearer {app_jwt()}", "Accept": "application/vnd.github+json"}
+    try:
+        response = github_session().post(
+            f"{GITHUB_API_URL}/app/installations/{installation_id}/access_tokens",
+            headers=headers,
+            timeout=request_timeout(),
+        )
+    except requests.RequestException as e:
+        security_logger.error(f"GitHub App token request failed for installation {installation_id}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API")
+
+    if response.status_code != 201:
+        security_logger.error(
+            f"GitHub App token minting failed for installation {installation_id}: {response.status_code}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail="Failed to obtain a GitHub App installation token"
+        )
+
+    data = response.json()
+    expires_at = datetime.fromisoformat(data["expires_at"].replace("Z", "+00:00")).timestamp()
+    security_logger.info(f"Minted GitHub App token for installation {installation_id}")
+    return data["token"], expires_at
+
+
+def installation_token(installation_id: int) -> str:
+    """Installation access token, reused until GITHUB_APP_TOKEN_REFRESH_MARGIN seconds before it expires"""
+    cached = _tokens.get(installation_id)
+    if cached and cached[1] - settings.GITHUB_APP_TOKEN_REFRESH_MARGIN > time.time():
+        return cached[0]
+
+    with _tokens_lock:
+        mint_lock = _mint_locks.setdefault(installation_id, threading.Lock())
+    # One mint per installation at a time; concurrent callers wait and reuse its token
+    with mint_lock:
+        cached = _tokens.get(installation_id)
+        if cached and cached[1] - settings.GITHUB_APP_TOKEN_REFRESH_MARGIN > time.time():
+            return cached[0]
+        token, expires_at = _mint(installation_id)
+        _tokens[installation_id] = (token, expires_at)
+        return token
+
+
+def _exchange_code(code: str) -> str:
+    """User-to-server token for the code GitHub passed to the App's callback"""
+    if not (settings.GITHUB_APP_CLIENT_ID and settings.GITHUB_APP_CLIENT_SECRET):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="GitHub App authorization is not configured"
+        )
+    try:
+        response = get_session("https://github.com").post(
+            GITHUB_OAUTH_URL,
+            headers={"Accept": "application/json"},
+            data={
+                "client_id": settings.GITHUB_APP_CLIENT_ID,
+                "client_secret": settings.GITHUB_APP_CLIENT_SECRET,
+                "code": code,
+            },
+            timeout=request_timeout(),
+        )
+    except requests.RequestException as e:
+        security_logger.error(f"GitHub App code exchange failed: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub")
+
+    access_token = response.json().get("access_token") if response.status_code == 200 else None
+    if not access_token:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired authorization code")
+    return access_token
+
+
+def _user_installations(user_token: str) -> List[Dict[str, Any]]:
+    """Installations of this App that the authorizing GitHub user can access"""
+    installations, page = [], 1
+    while True:
+        try:
+            response = github_session().get(
+                f"{GITHUB_API_URL}/user/installations",
+                headers={"Authorization": f"Bearer {user_token}", "Accept": "application/vnd.github+json"},
+                params={"per_page": 100, "page": page},
+                timeout=request_timeout(),
+            )
+        except requests.RequestException as e:
+            security_logger.error(f"Listing GitHub App installations failed: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API"
+            )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY, detail="Failed to list GitHub App installations"
+            )
+
+        batch = response.json().get("installations", [])
+        installations.extend(batch)
+        if len(batch) < 100:
+            return installations
+        page += 1
+
+
+def link_installations(db: Session, user_id: int, code: str) -> List[GitHubInstallation]:
+    """Link every installation the user can access on GitHub to their account, proven by an OAuth code"""
+    user_token = _exchange_code(code)
+    linked = {
+        row.installation_id: row for row in db.query(GitHubInstallation).filter(GitHubInstallation.user_id == user_id)
+    }
+    for installation in _user_installations(user_token):
+        if str(installation.get("app_id")) != str(settings.GITHUB_APP_ID):
+            continue
+        row = linked.get(installation["id"])
+        if row is None:
+            row = linked[installation["id"]] = GitHubInstallation(installation_id=installation["id"], user_id=user_id)
+            db.add(row)
+        row.account_login = (installation.get("account") or {}).get("login")
+    db.commit()
+
+    security_logger.info(f"User ID {user_id} linked {len(linked)} GitHub App installation(s)")
+    return list_installations(db, user_id)
+
+
+def list_installations(db: Session, user_id: int) -> List[GitHubInstallation]:
+    return (
+        db.query(GitHubInstallation)
+        .filter(GitHubInstallation.user_id == user_id)
+        .order_by(GitHubInstallation.installation_id)
+        .all()
+    )
+
+
+def require_installation_access(db: Session, user_id: int, installation_id: int):
+    """Only installations the user linked may be used: minting never happens for an unproven id"""
+    linked = (
+        db.query(GitHubInstallation.id)
+        .filter(GitHubInstallation.user_id == user_id, GitHubInstallation.installation_id == installation_id)
+        .first()
+    )
+    if not linked:
+        security_logger.warning(f"User ID {user_id} used unlinked GitHub App installation {installation_id}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This GitHub App installation is not linked to your account",
+        )
+
+
+def project_token(project: Project) -> Optional[str]:
+    """Token for GitHub API calls on a project's behalf: an installation token for projects connected
+    through the GitHub App, else the personal token stored on the project"""
+    if project.github_installation_id:
+        return installation_token(project.github_installation_id)
+    return project.github_token
@@ -1,162 +1,231 @@
-from typing import Any, Dict, List, Optional
-
+import asyncio
+import base64
+import posixpath
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import httpx
 import requests
 from fastapi import HTTPException, status
 
+from app.config.settings import settings
 from app.core.logging_config import security_logger
+from app.services import rate_limit_governor
+from app.services.blob_cache import blob_cache
 from app.services.cache_service import cache_service
+from app.services.http_client import (
+    GITHUB_API_URL,
+    conditional_headers,
+    github_async_client,
+    github_session,
+    request_timeout,
+    token_fingerprint,
+)
+from app.services.pagination import collect, iter_pages, iter_pages_async, link_page_info, pagination_headers
+
+MAX_PER_PAGE = 100
 
 
 class GitHubAPIError(Exception):
     pass
 
 
-def _make_github_request(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def _github_resource(endpoint: str) -> str:
+    """GitHub budgets core, search and GraphQL requests separately"""
+    if endpoint == "/graphql":
+        return "graphql"
+    if endpoint.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+def _github_call(
+    method: str,
+    endpoint: str,
+    token: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+    stream: bool = False,
+) -> requests.Response:
+    """Send one request through the pooled GitHub session"""
+    headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json", **(extra_headers or {})}
+
+    rate_limit_governor.acquire("github", token, _github_resource(endpoint))
+    try:
+        response = github_session().request(
+            method,
+            f"{GITHUB_API_URL}{endpoint}",
+            headers=headers,
+            params=params,
+            json=data,
+            timeout=request_timeout(),
+            stream=stream,
+        )
+    except requests.RequestException as e:
+        security_logger.error(f"GitHub API {method} request failed: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API")
 
-    base_url = "https://api.github.com"
-    url = f"{base_url}{endpoint}"
+    rate_limit_governor.record(
+        "github",
+        token,
+        response.headers,
+        _github_resource(endpoint),
+        status_code=response.status_code,
+        body=response.text if response.status_code in (403, 429) else None,
+    )
+    return response
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "CodeReview-App",
-    }
 
+async def _github_call_async(
+    method: str,
+    endpoint: str,
+    token: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    """Async counterpart of _github_call, using the shared httpx client"""
+    headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json", **(extra_headers or {})}
+
+    await rate_limit_governor.acquire_async("github", token, _github_resource(endpoint))
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-
-        rate_limit_remaining = response.headers.get("X-RateLimit-Remaining")
-        rate_limit_reset = response.headers.get("X-RateLimit-Reset")
-        security_logger.info(f"GitHub API: {endpoint} | Rate limit remaining: {rate_limit_remaining}")
-
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitHub token")
-        elif response.status_code == 403:
-            if rate_limit_remaining == "0":
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail=f"GitHub API rate limit exceeded. Resets at {rate_limit_reset}",
-                )
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitHub")
-        elif response.status_code != 200:
+        response = await github_async_client().request(
+            method, f"{GITHUB_API_URL}{endpoint}", headers=headers, params=params, json=data
+        )
+    except httpx.HTTPError as e:
+        security_logger.error(f"GitHub API {method} request failed: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API")
+
+    rate_limit_governor.record(
+        "github",
+        token,
+        response.headers,
+        _github_resource(endpoint),
+        status_code=response.status_code,
+        body=response.text if response.status_code in (403, 429) else None,
+    )
+    return response
+
+
+def _handle_github_response(
+    response: Union[requests.Response, httpx.Response], endpoint: str, expected: Tuple[int, ...]
+) -> None:
+    rate_limit_remaining = response.headers.get("X-RateLimit-Remaining")
+    rate_limit_reset = response.headers.get("X-RateLimit-Reset")
+    security_logger.info(f"GitHub API: {endpoint} | Rate limit remaining: {rate_limit_remaining}")
+
+    if response.status_code in expected:
+        return
+    if response.status_code == 401:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitHub token")
+    elif response.status_code == 403:
+        if rate_limit_remaining == "0":
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitHub API error: {response.status_code}"
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"GitHub API rate limit exceeded. Resets at {rate_limit_reset}",
             )
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions.")
+    elif response.status_code == 404:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitHub")
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitHub API error: {response.status_code}"
+    )
 
-        return response.json()
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitHub API request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API")
+def _validator_key(endpoint: str, token: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # ETags vary by credentials, so the token is part of the key
+    return {"endpoint": endpoint, "params": sorted((params or {}).items()), "token": token_fingerprint(token)}
 
 
-def _make_github_post_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    base_url = "https://api.github.com"
-    url = f"{base_url}{endpoint}"
+def _conditional_body(
+    response: Union[requests.Response, httpx.Response],
+    endpoint: str,
+    stored: Optional[Dict[str, Any]],
+    validator_key: Dict[str, Any],
+) -> Tuple[Any, Dict[str, str]]:
+    """(body, pagination headers), reusing the stored body on 304 Not Modified (which GitHub does not charge
+    against the rate limit)"""
+    if response.status_code == 304 and stored is not None:
+        security_logger.info(f"GitHub API: {endpoint} | 304 Not Modified")
+        return stored["body"], stored["meta"]
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "CodeReview-App",
-    }
+    _handle_github_response(response, endpoint, (200,))
+    body = response.json()
+    meta = pagination_headers(response.headers)
+    cache_service.set_validated("github:conditional", response.headers, body, meta=meta, **validator_key)
+    return body, meta
 
-    try:
-        response = requests.post(url, headers=headers, json=data, timeout=10)
 
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitHub token")
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitHub")
-        elif response.status_code not in [200, 201]:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitHub API error: {response.status_code}"
-            )
+def _make_github_request(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return _make_github_page(endpoint, token, params)[0]
 
-        return response.json()
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitHub API POST request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API")
+def _make_github_page(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, str]]:
+    validator_key = _validator_key(endpoint, token, params)
+    stored = cache_service.get_validated("github:conditional", **validator_key)
 
+    response = _github_call("GET", endpoint, token, params=params, extra_headers=conditional_headers(stored))
+    return _conditional_body(response, endpoint, stored, validator_key)
 
-def create_pr_comment(token: str, owner: str, repo: str, pr_number: int, comment_body: str) -> Dict[str, Any]:
-    endpoint = f"/repos/{owner}/{repo}/issues/{pr_number}/comments"
-    payload = {"body": comment_body}
-    response = _make_github_post_request(endpoint, token, data=payload)
 
-    return {"comment_id": response["id"], "html_url": response["html_url"], "created_at": response["created_at"]}
+async def _make_github_request_async(
+    endpoint: str, token: str, params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    return (await _make_github_page_async(endpoint, token, params))[0]
 
 
-def _make_github_patch_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    base_url = "https://api.github.com"
-    url = f"{base_url}{endpoint}"
+async def _make_github_page_async(
+    endpoint: str, token: str, params: Optional[Dict[str, Any]] = None
+) -> Tuple[Any, Dict[str, str]]:
+    validator_key = _validator_key(endpoint, token, params)
+    stored = cache_service.get_validated("github:conditional", **validator_key)
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "CodeReview-App",
-    }
+    response = await _github_call_async(
+        "GET", endpoint, token, params=params, extra_headers=conditional_headers(stored)
+    )
+    return _conditional_body(response, endpoint, stored, validator_key)
 
-    try:
-        response = requests.patch(url, headers=headers, json=data, timeout=10)
 
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitHub token")
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitHub")
-        elif response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitHub API error: {response.status_code}"
-            )
+def _iter_github_pages(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """Every item of a paginated list endpoint, requested with the largest page size"""
+    params = {**(params or {}), "per_page": MAX_PER_PAGE}
+    return iter_pages(
+        lambda page: _make_github_page(endpoint, token, {**params, "page": page}), link_page_info, endpoint
+    )
 
-        return response.json()
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitHub API PATCH request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API")
+def _iter_github_pages_async(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Any]:
+    params = {**(params or {}), "per_page": MAX_PER_PAGE}
+    return iter_pages_async(
+        lambda page: _make_github_page_async(endpoint, token, {**params, "page": page}), link_page_info, endpoint
+    )
 
 
-def _make_github_delete_request(endpoint: str, token: str) -> None:
-    base_url = "https://api.github.com"
-    url = f"{base_url}{endpoint}"
+def _make_github_post_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    response = _github_call("POST", endpoint, token, data=data)
+    _handle_github_response(response, endpoint, (200, 201))
+    return response.json()
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "CodeReview-App",
-    }
 
-    try:
-        response = requests.delete(url, headers=headers, timeout=10)
+def create_pr_comment(token: str, owner: str, repo: str, pr_number: int, comment_body: str) -> Dict[str, Any]:
+    endpoint = f"/repos/{owner}/{repo}/issues/{pr_number}/comments"
+    payload = {"body": comment_body}
+    response = _make_github_post_request(endpoint, token, data=payload)
 
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitHub token")
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitHub")
-        elif response.status_code != 204:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitHub API error: {response.status_code}"
-            )
+    return {"comment_id": response["id"], "html_url": response["html_url"], "created_at": response["created_at"]}
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitHub API DELETE request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitHub API")
+
+def _make_github_patch_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    response = _github_call("PATCH", endpoint, token, data=data)
+    _handle_github_response(response, endpoint, (200,))
+    return response.json()
+
+
+def _make_github_delete_request(endpoint: str, token: str) -> None:
+    response = _github_call("DELETE", endpoint, token)
+    _handle_github_response(response, endpoint, (204,))
 
 
 def update_pr_comment(token: str, owner: str, repo: str, comment_id: int, new_body: str) -> Dict[str, Any]:
@@ -199,16 +268,25 @@ def create_inline_pr_comment(
     return {"comment_id": response["id"], "html_url": response["html_url"]}
 
 
-def fetch_branches(token: str, owner: str, repo: str) -> List[Dict[str, Any]]:
-    cached = cache_service.get("github:branches", owner=owner, repo=repo)
-    if cached:
-        return cached
+def create_pr_review(
+    token: str, owner: str, repo: str, pr_number: int, commit_id: str, body: str, comments: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Submit a review and all of its inline comments in a single request.
+
+    Each comment is {"path", "line", "side", "body"} plus optional "start_line"/"start_side" for a range.
+    The COMMENT event neither approves nor requests changes.
+    """
+    endpoint = f"/repos/{owner}/{repo}/pulls/{pr_number}/reviews"
+    payload = {"commit_id": commit_id, "body": body, "event": "COMMENT", "comments": comments}
+    response = _make_github_post_request(endpoint, token, data=payload)
+
+    return {"review_id": response["id"], "html_url": response.get("html_url")}
+
 
-    security_logger.info(f"[CACHE MISS] Fetching branches from {owner}/{repo}")
+def _load_branches(token: str, owner: str, repo: str) -> List[Dict[str, Any]]:
     endpoint = f"/repos/{owner}/{repo}/branches"
-    branches_data = _make_github_request(endpoint, token)
     branches = []
-    for branch in branches_data:
+    for branch in _iter_github_pages(endpoint, token):
         branches.append(
             {
                 "name": branch["name"],
@@ -217,71 +295,402 @@ def fetch_branches(token: str, owner: str, repo: str) -> List[Dict[str, Any]]:
             }
         )
 
-    cache_service.set("github:branches", branches, ttl=300, owner=owner, repo=repo)
     security_logger.info(f"Fetched {len(branches)} branches from {owner}/{repo}")
     return branches
 
 
-def fetch_pull_requests(
-    token: str, owner: str, repo: str, state: str = "open", page: int = 1, per_page: int = 20
-) -> Dict[str, Any]:
-    cached = cache_service.get("github:prs", owner=owner, repo=repo, state=state, page=page, per_page=per_page)
-    if cached:
-        return cached
+def fetch_branches(token: str, owner: str, repo: str) -> List[Dict[str, Any]]:
+    return cache_service.get_or_fetch(
+        "github:branches", lambda: _load_branches(token, owner, repo), ttl=300, owner=owner, repo=repo
+    )
+
+
+def fetch_organization_repositories(token: str, owner: str) -> List[Dict[str, Any]]:
+    """Every repository of an organization (or, failing that, a user) that the token can see"""
+    try:
+        items = list(_iter_github_pages(f"/orgs/{owner}/repos", token, {"type": "all"}))
+    except HTTPException as e:
+        if e.status_code != status.HTTP_404_NOT_FOUND:
+            raise
+        items = list(_iter_github_pages(f"/users/{owner}/repos", token, {"type": "owner"}))
+
+    repositories = [
+        {
+            "owner": repo["owner"]["login"],
+            "name": repo["name"],
+            "description": repo.get("description"),
+            "html_url": repo["html_url"],
+            "archived": repo.get("archived", False),
+        }
+        for repo in items
+    ]
+    security_logger.info(f"Fetched {len(repositories)} repositories of {owner}")
+    return repositories
+
+
+PULL_REQUEST_FIELDS = """
+fragment PullRequestFields on PullRequest {
+  number
+  title
+  state
+  isDraft
+  author { login avatarUrl }
+  headRefName
+  baseRefName
+  createdAt
+  updatedAt
+  comments { totalCount }
+  commits { totalCount }
+  changedFiles
+  additions
+  deletions
+  reviewDecision
+  labels(first: 20) { nodes { name } }
+}
+"""
+
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $states: [PullRequestState!], $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: $states, first: $first, after: $after, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { endCursor hasNextPage }
+      nodes { ...PullRequestFields }
+    }
+  }
+}
+""" + PULL_REQUEST_FIELDS
+
+PULL_REQUESTS_BY_UPDATE_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { endCursor hasNextPage }
+      nodes { ...PullRequestFields }
+    }
+  }
+}
+""" + PULL_REQUEST_FIELDS
+
+PULL_REQUEST_CURSORS_QUERY = """
+query($owner: String!, $name: String!, $states: [PullRequestState!], $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: $states, first: $first, after: $after, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { endCursor hasNextPage }
+    }
+  }
+}
+"""
+
+GRAPHQL_PR_STATES = {"open": ["OPEN"], "closed": ["CLOSED", "MERGED"], "all": None}
+
+
+def _make_github_graphql_request(query: str, variables: Dict[str, Any], token: str) -> Dict[str, Any]:
+    """Run a GraphQL query; GraphQL reports most failures as 200 with an `errors` list"""
+    response = _github_call("POST", "/graphql", token, data={"query": query, "variables": variables})
+    _handle_github_response(response, "/graphql", (200,))
+    payload = response.json()
+    if payload.get("errors"):
+        raise GitHubAPIError("; ".join(error.get("message", "unknown error") for error in payload["errors"]))
+    return payload["data"]
+
+
+REPOSITORY_COUNTS_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    open: pullRequests(states: [OPEN]) { totalCount }
+    closed: pullRequests(states: [CLOSED, MERGED]) { totalCount }
+    branches: refs(refPrefix: "refs/heads/") { totalCount }
+  }
+}
+"""
+
+
+def _pull_requests_after_cursor(
+    token: str, owner: str, repo: str, state: str, page: int, per_page: int
+) -> Tuple[bool, Optional[str]]:
+    """(page exists, cursor to start it from). End cursors are remembered per page; missing ones are walked
+    forward from the nearest known page, requesting only pageInfo"""
+    cursor_key = {"owner": owner, "repo": repo, "state": state, "per_page": per_page}
+
+    known_page, cursor = 0, None
+    for candidate in range(page - 1, 0, -1):
+        candidate_cursor = cache_service.get("github:pr_cursor", page=candidate, **cursor_key)
+        if candidate_cursor is not None:
+            known_page, cursor = candidate, candidate_cursor
+            break
+
+    for walk_page in range(known_page + 1, page):
+        data = _make_github_graphql_request(
+            PULL_REQUEST_CURSORS_QUERY,
+            {"owner": owner, "name": repo, "states": GRAPHQL_PR_STATES[state], "first": per_page, "after": cursor},
+            token,
+        )
+        page_info = data["repository"]["pullRequests"]["pageInfo"]
+        if not page_info["hasNextPage"]:
+            return False, None
+        cursor = page_info["endCursor"]
+        cache_service.set("github:pr_cursor", cursor, ttl=300, page=walk_page, **cursor_key)
+
+    return True, cursor
+
+
+def _pr_summary_graphql(pr: Dict[str, Any]) -> Dict[str, Any]:
+    # Deleted users come back as a null author
+    author = pr.get("author") or {"login": "ghost", "avatarUrl": None}
+    return {
+        "number": pr["number"],
+        "title": pr["title"],
+        "state": "open" if pr["state"] == "OPEN" else "closed",
+        "author": author["login"],
+        "author_avatar": author["avatarUrl"],
+        "source_branch": pr["headRefName"],
+        "target_branch": pr["baseRefName"],
+        "created_at": pr["createdAt"],
+        "updated_at": pr["updatedAt"],
+        "comments_count": pr["comments"]["totalCount"],
+        "commits_count": pr["commits"]["totalCount"],
+        "changed_files_count": pr["changedFiles"],
+        "additions": pr["additions"],
+        "deletions": pr["deletions"],
+        "work_in_progress": pr["isDraft"],
+        "review_decision": pr.get("reviewDecision"),
+        "labels": [label["name"] for label in pr["labels"]["nodes"]],
+    }
+
+
+def _pr_summary_rest(pr: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "number": pr["number"],
+        "title": pr["title"],
+        "state": pr["state"],
+        "author": pr["user"]["login"],
+        "author_avatar": pr["user"]["avatar_url"],
+        "source_branch": pr["head"]["ref"],
+        "target_branch": pr["base"]["ref"],
+        "created_at": pr["created_at"],
+        "updated_at": pr["updated_at"],
+        "comments_count": pr.get("comments", 0),
+        "commits_count": pr.get("commits", None),
+        "changed_files_count": pr.get("changed_files", None),
+        "additions": pr.get("additions", None),
+        "deletions": pr.get("deletions", None),
+        "work_in_progress": pr.get("draft"),
+        "labels": [label["name"] for label in pr.get("labels", [])],
+    }
+
 
-    security_logger.info(f"[CACHE MISS] Fetching PRs from {owner}/{repo} (state={state})")
+def _fetch_pull_requests_graphql(
+    token: str, owner: str, repo: str, state: str, page: int, per_page: int
+) -> List[Dict[str, Any]]:
+    found, cursor = _pull_requests_after_cursor(token, owner, repo, state, page, per_page)
+    if not found:
+        return []
 
+    data = _make_github_graphql_request(
+        PULL_REQUESTS_QUERY,
+        {"owner": owner, "name": repo, "states": GRAPHQL_PR_STATES[state], "first": per_page, "after": cursor},
+        token,
+    )
+    connection = data["repository"]["pullRequests"]
+    cache_service.set(
+        "github:pr_cursor",
+        connection["pageInfo"]["endCursor"],
+        ttl=300,
+        owner=owner,
+        repo=repo,
+        state=state,
+        per_page=per_page,
+        page=page,
+    )
+
+    return [_pr_summary_graphql(pr) for pr in connection["nodes"]]
+
+
+def _fetch_pull_requests_rest(
+    token: str, owner: str, repo: str, state: str, page: int, per_page: int
+) -> List[Dict[str, Any]]:
     endpoint = f"/repos/{owner}/{repo}/pulls"
-    params = {"state": state, "page": page, "per_page": min(per_page, 100)}
+    params = {"state": state, "page": page, "per_page": per_page}
 
-    prs_data = _make_github_request(endpoint, token, params)
-    pull_requests = []
-    for pr in prs_data:
-        pull_requests.append(
-            {
-                "number": pr["number"],
-                "title": pr["title"],
-                "state": pr["state"],
-                "author": pr["user"]["login"],
-                "author_avatar": pr["user"]["avatar_url"],
-                "source_branch": pr["head"]["ref"],
-                "target_branch": pr["base"]["ref"],
-                "created_at": pr["created_at"],
-                "updated_at": pr["updated_at"],
-                "comments_count": pr.get("comments", 0),
-                "commits_count": pr.get("commits", None),
-                "changed_files_count": pr.get("changed_files", None),
-                "additions": pr.get("additions", None),
-                "deletions": pr.get("deletions", None),
+    return [_pr_summary_rest(pr) for pr in _make_github_request(endpoint, token, params)]
+
+
+def _search_total(token: str, query: str) -> int:
+    data = _make_github_request("/search/issues", token, {"q": query, "per_page": 1})
+    return data["total_count"]
+
+
+def _count_branches(token: str, owner: str, repo: str) -> int:
+    # With one item per page, the last page number is the item count
+    body, meta = _make_github_page(f"/repos/{owner}/{repo}/branches", token, {"per_page": 1})
+    _, last_page = link_page_info(meta)
+    return last_page or len(body)
+
+
+def fetch_repository_counts(token: str, owner: str, repo: str) -> Dict[str, int]:
+    """Branch and PR totals from count-only queries (GraphQL totalCount, else search total_count)"""
+    if settings.GITHUB_GRAPHQL_ENABLED:
+        try:
+            data = _make_github_graphql_request(REPOSITORY_COUNTS_QUERY, {"owner": owner, "name": repo}, token)
+            repository = data["repository"]
+            return {
+                "branches_count": repository["branches"]["totalCount"],
+                "open_prs_count": repository["open"]["totalCount"],
+                "closed_prs_count": repository["closed"]["totalCount"],
             }
-        )
+        except (GitHubAPIError, HTTPException, KeyError, TypeError) as e:
+            security_logger.warning(f"GraphQL counts failed for {owner}/{repo}, falling back to REST: {e}")
+
+    return {
+        "branches_count": _count_branches(token, owner, repo),
+        "open_prs_count": _search_total(token, f"repo:{owner}/{repo} type:pr state:open"),
+        "closed_prs_count": _search_total(token, f"repo:{owner}/{repo} type:pr state:closed"),
+    }
+
+
+def _load_pull_requests(token: str, owner: str, repo: str, state: str, page: int, per_page: int) -> Dict[str, Any]:
+    per_page = min(per_page, 100)
+    pull_requests = None
+    if settings.GITHUB_GRAPHQL_ENABLED:
+        try:
+            # One query returns the counts, review state and labels the REST list endpoint leaves out
+            pull_requests = _fetch_pull_requests_graphql(token, owner, repo, state, page, per_page)
+        except (GitHubAPIError, HTTPException, KeyError, TypeError) as e:
+            security_logger.warning(f"GraphQL PR list failed for {owner}/{repo}, falling back to REST: {e}")
+
+    if pull_requests is None:
+        pull_requests = _fetch_pull_requests_rest(token, owner, repo, state, page, per_page)
 
     security_logger.info(f"Fetched {len(pull_requests)} PRs from {owner}/{repo}")
 
-    result = {"pull_requests": pull_requests, "page": page, "per_page": per_page, "total": len(pull_requests)}
+    return {"pull_requests": pull_requests, "page": page, "per_page": per_page, "total": len(pull_requests)}
+
 
-    ttl = 120 if state == "open" else 300
-    cache_service.set("github:prs", result, ttl=ttl, owner=owner, repo=repo, state=state, page=page, per_page=per_page)
+def fetch_pull_requests(
+    token: str, owner: str, repo: str, state: str = "open", page: int = 1, per_page: int = 20
+) -> Dict[str, Any]:
+    return cache_service.get_or_fetch(
+        "github:prs",
+        lambda: _load_pull_requests(token, owner, repo, state, page, per_page),
+        ttl=120 if state == "open" else 300,
+        owner=owner,
+        repo=repo,
+        state=state,
+        page=page,
+        per_page=per_page,
+    )
 
-    return result
 
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
-def fetch_pull_request_details(token: str, owner: str, repo: str, pr_number: int) -> Dict[str, Any]:
-    cached = cache_service.get("github:pr_details", owner=owner, repo=repo, pr_number=pr_number)
-    if cached:
-        return cached
 
-    security_logger.info(f"[CACHE MISS] Fetching PR #{pr_number} details from {owner}/{repo}")
+def _walk_updated_graphql(
+    token: str, owner: str, repo: str, since: Optional[datetime], cursor: Optional[str], max_pages: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    pull_requests = []
+    for _ in range(max_pages):
+        data = _make_github_graphql_request(
+            PULL_REQUESTS_BY_UPDATE_QUERY,
+            {"owner": owner, "name": repo, "first": MAX_PER_PAGE, "after": cursor},
+            token,
+        )
+        connection = data["repository"]["pullRequests"]
+        for pr in connection["nodes"]:
+            if since and _parse_timestamp(pr["updatedAt"]) < since:
+                return pull_requests, None
+            pull_requests.append(_pr_summary_graphql(pr))
+        if not connection["pageInfo"]["hasNextPage"]:
+            return pull_requests, None
+        cursor = connection["pageInfo"]["endCursor"]
+    return pull_requests, f"graphql:{cursor}"
+
+
+def _walk_updated_rest(
+    token: str, owner: str, repo: str, since: Optional[datetime], page: int, max_pages: int
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    endpoint = f"/repos/{owner}/{repo}/pulls"
+    params = {"state": "all", "sort": "updated", "direction": "desc", "per_page": MAX_PER_PAGE}
+    pull_requests, last_page = [], page + max_pages - 1
+    while page:
+        if page > last_page:
+            return pull_requests, f"rest:{page}"
+        body, meta = _make_github_page(endpoint, token, {**params, "page": page})
+        for pr in body:
+            if since and _parse_timestamp(pr["updated_at"]) < since:
+                return pull_requests, None
+            pull_requests.append(_pr_summary_rest(pr))
+        page, _ = link_page_info(meta)
+    return pull_requests, None
+
+
+def fetch_pull_requests_updated_since(
+    token: str,
+    owner: str,
+    repo: str,
+    since: Optional[datetime] = None,
+    resume: Optional[str] = None,
+    max_pages: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """PRs in any state updated at or after `since` (all of them without it), most recently updated first.
+
+    Neither API filters by update time, so pages are walked in updated order until an older PR shows up. A walk
+    stops after `max_pages` (default PULL_REQUEST_SYNC_MAX_PAGES) pages and returns a resume token to continue
+    it from; None when it is complete. Pages shifted by PRs updated in between are seen twice, never skipped.
+    """
+    max_pages = max_pages or settings.PULL_REQUEST_SYNC_MAX_PAGES
+    kind, _, position = (resume or "").partition(":")
+    if settings.GITHUB_GRAPHQL_ENABLED and kind != "rest":
+        try:
+            return _walk_updated_graphql(token, owner, repo, since, position or None, max_pages)
+        except (GitHubAPIError, HTTPException, KeyError, TypeError) as e:
+            security_logger.warning(f"GraphQL PR sync failed for {owner}/{repo}, falling back to REST: {e}")
+    # A GraphQL cursor means nothing to REST, which then starts over at the first page
+    return _walk_updated_rest(token, owner, repo, since, int(position) if kind == "rest" else 1, max_pages)
+
+
+def _pr_details_endpoints(owner: str, repo: str, pr_number: int) -> Tuple[str, str, str]:
+    base = f"/repos/{owner}/{repo}/pulls/{pr_number}"
+    return base, f"{base}/commits", f"{base}/files"
+
+
+def _pr_file_entry(file: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "filename": file["filename"],
+        "status": file["status"],
+        "additions": file["additions"],
+        "deletions": file["deletions"],
+        "changes": file["changes"],
+        "patch": file.get("patch", ""),
+        "previous_filename": file.get("previous_filename"),
+        "sha": file.get("sha"),
+    }
 
-    pr_endpoint = f"/repos/{owner}/{repo}/pulls/{pr_number}"
-    pr_data = _make_github_request(pr_endpoint, token)
 
-    commits_endpoint = f"/repos/{owner}/{repo}/pulls/{pr_number}/commits"
-    commits_data = _make_github_request(commits_endpoint, token)
+def _remember_pr_files(owner: str, repo: str, pr_number: int, head_sha: str, files: List[Dict[str, Any]]) -> None:
+    """Seed the head and file-index caches from a full details fetch, so the diff viewer needs no extra listing"""
+    cache_service.set(
+        "github:pr_head",
+        {"sha": head_sha, "fetched_at": time.time()},
+        ttl=settings.PR_HEAD_CACHE_TTL,
+        owner=owner,
+        repo=repo,
+        pr_number=pr_number,
+    )
+    cache_service.set(
+        "github:pr_file_index",
+        {file["filename"]: file for file in files},
+        ttl=3600,
+        owner=owner,
+        repo=repo,
+        pr_number=pr_number,
+        head_sha=head_sha,
+    )
 
-    files_endpoint = f"/repos/{owner}/{repo}/pulls/{pr_number}/files"
-    files_data = _make_github_request(files_endpoint, token)
 
+def _build_pr_details(
+    pr_data: Dict[str, Any], commits_data: Iterable[Dict], files_data: Iterable[Dict]
+) -> Dict[str, Any]:
     commits = []
     for commit in commits_data:
         commits.append(
@@ -298,16 +707,7 @@ def fetch_pull_request_details(token: str, owner: str, repo: str, pr_number: int
     total_deletions = 0
 
     for file in files_data:
-        files.append(
-            {
-                "filename": file["filename"],
-                "status": file["status"],
-                "additions": file["additions"],
-                "deletions": file["deletions"],
-                "changes": file["changes"],
-                "patch": file.get("patch", ""),
-            }
-        )
+        files.append(_pr_file_entry(file))
         total_additions += file["additions"]
         total_deletions += file["deletions"]
 
@@ -319,6 +719,7 @@ def fetch_pull_request_details(token: str, owner: str, repo: str, pr_number: int
         "author": {"username": pr_data["user"]["login"], "avatar_url": pr_data["user"]["avatar_url"]},
         "source_branch": pr_data["head"]["ref"],
         "target_branch": pr_data["base"]["ref"],
+        "head_sha": pr_data["head"]["sha"],
         "created_at": pr_data["created_at"],
         "updated_at": pr_data["updated_at"],
         "merged_at": pr_data.get("merged_at"),
@@ -334,74 +735,237 @@ def fetch_pull_request_details(token: str, owner: str, repo: str, pr_number: int
         },
     }
 
-    cache_service.set("github:pr_details", pr_details, ttl=180, owner=owner, repo=repo, pr_number=pr_number)
-    security_logger.info(f"Fetched PR #{pr_number} details from {owner}/{repo}")
     return pr_details
 
 
-def fetch_file_content(token: str, owner: str, repo: str, file_path: str, branch: str = "main") -> Dict[str, Any]:
-    cached = cache_service.get("github:file_content", owner=owner, repo=repo, file_path=file_path, branch=branch)
+def fetch_pull_request_details(
+    token: str, owner: str, repo: str, pr_number: int, force: bool = False
+) -> Dict[str, Any]:
+    """PR details with commits and files; `force` skips the cached copy and overwrites it once the fetch succeeds"""
+    cached = None if force else cache_service.get("github:pr_details", owner=owner, repo=repo, pr_number=pr_number)
     if cached:
         return cached
 
-    security_logger.info(f"[CACHE MISS] Fetching file content: {file_path} from {owner}/{repo}@{branch}")
+    security_logger.info(f"[CACHE MISS] Fetching PR #{pr_number} details from {owner}/{repo}")
 
-    endpoint = f"/repos/{owner}/{repo}/contents/{file_path}"
-    params = {"ref": branch}
+    pr_endpoint, commits_endpoint, files_endpoint = _pr_details_endpoints(owner, repo, pr_number)
+    pr_details = _build_pr_details(
+        _make_github_request(pr_endpoint, token),
+        _iter_github_pages(commits_endpoint, token),
+        _iter_github_pages(files_endpoint, token),
+    )
 
-    file_data = _make_github_request(endpoint, token, params)
+    cache_service.set(
+        "github:pr_details",
+        pr_details,
+        ttl=180,
+        stale_ttl=settings.CACHE_STALE_TTL,
+        owner=owner,
+        repo=repo,
+        pr_number=pr_number,
+    )
+    _remember_pr_files(owner, repo, pr_number, pr_details["head_sha"], pr_details["files"])
+    security_logger.info(f"Fetched PR #{pr_number} details from {owner}/{repo}")
+    return pr_details
 
-    file_info = {
-        "path": file_data["path"],
-        "name": file_data["name"],
-        "size": file_data["size"],
-        "sha": file_data["sha"],
-        "encoding": file_data["encoding"],
-        "content": file_data["content"],
-        "branch": branch,
-        "download_url": file_data.get("download_url"),
-    }
+
+async def fetch_pull_request_details_async(token: str, owner: str, repo: str, pr_number: int) -> Dict[str, Any]:
+    """Same result as fetch_pull_request_details, with the PR, commits and files pages in flight together"""
+    cached = cache_service.get("github:pr_details", owner=owner, repo=repo, pr_number=pr_number)
+    if cached:
+        return cached
+
+    security_logger.info(f"[CACHE MISS] Fetching PR #{pr_number} details from {owner}/{repo}")
+
+    pr_endpoint, commits_endpoint, files_endpoint = _pr_details_endpoints(owner, repo, pr_number)
+    pr_data, commits_data, files_data = await asyncio.gather(
+        _make_github_request_async(pr_endpoint, token),
+        collect(_iter_github_pages_async(commits_endpoint, token)),
+        collect(_iter_github_pages_async(files_endpoint, token)),
+    )
+    pr_details = _build_pr_details(pr_data, commits_data, files_data)
 
     cache_service.set(
-        "github:file_content", file_info, ttl=600, owner=owner, repo=repo, file_path=file_path, branch=branch
+        "github:pr_details",
+        pr_details,
+        ttl=180,
+        stale_ttl=settings.CACHE_STALE_TTL,
+        owner=owner,
+        repo=repo,
+        pr_number=pr_number,
     )
-    security_logger.info(f"Fetched file content: {file_path} from {owner}/{repo}@{branch}")
+    _remember_pr_files(owner, repo, pr_number, pr_details["head_sha"], pr_details["files"])
+    security_logger.info(f"Fetched PR #{pr_number} details from {owner}/{repo}")
+    return pr_details
+
+
+def _find_file_entry(token: str, owner: str, repo: str, file_path: str, branch: str) -> Dict[str, Any]:
+    """Contents-API entry (path, name, size, sha, ...) for a file, found through the branch's cached tree.
+
+    One tree fetch resolves every file of the branch until a push invalidates it; paths missing from a
+    truncated tree fall back to the directory listing, which carries no file bodies either.
+    """
+    tree_entry = _tree_entries(token, owner, repo, branch).get(file_path)
+    if tree_entry:
+        sha, size = tree_entry
+        return {"path": file_path, "name": posixpath.basename(file_path), "size": size, "sha": sha, "type": "file"}
+
+    directory = posixpath.dirname(file_path)
+    endpoint = f"/repos/{owner}/{repo}/contents/{directory}" if directory else f"/repos/{owner}/{repo}/contents"
+    listing = _make_github_request(endpoint, token, {"ref": branch})
+    if isinstance(listing, list):
+        for entry in listing:
+            if entry["path"] == file_path and entry["type"] == "file":
+                return entry
+
+    # Listings stop at 1,000 entries; ask for the file itself (its body then seeds the blob cache)
+    entry = _make_github_request(f"/repos/{owner}/{repo}/contents/{file_path}", token, {"ref": branch})
+    if not isinstance(entry, dict) or entry.get("type") != "file":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"'{file_path}' is not a file")
+    if entry.get("encoding") == "base64" and entry.get("content"):
+        blob_cache.put(entry["sha"], base64.b64decode(entry["content"]))
+    return entry
+
+
+def _fetch_blob_bytes(token: str, owner: str, repo: str, sha: str) -> bytes:
+    content = blob_cache.get(sha)
+    if content is not None:
+        return content
+
+    endpoint = f"/repos/{owner}/{repo}/git/blobs/{sha}"
+    response = _github_call("GET", endpoint, token, extra_headers={"Accept": "application/vnd.github.raw+json"})
+    _handle_github_response(response, endpoint, (200,))
+    content = response.content
+    blob_cache.put(sha, content)
+    return content
+
+
+def open_blob_stream(
+    token: str, owner: str, repo: str, sha: str, byte_range: Optional[str] = None
+) -> requests.Response:
+    """Streaming response with a blob's raw bytes, 206 if the Range was honoured; the caller must close it"""
+    endpoint = f"/repos/{owner}/{repo}/git/blobs/{sha}"
+    headers = {"Accept": "application/vnd.github.raw+json"}
+    if byte_range:
+        headers["Range"] = byte_range
+    response = _github_call("GET", endpoint, token, extra_headers=headers, stream=True)
+    try:
+        _handle_github_response(response, endpoint, (200, 206))
+    except HTTPException:
+        response.close()
+        raise
+    return response
+
+
+def resolve_file(token: str, owner: str, repo: str, file_path: str, branch: str = "main") -> Dict[str, Any]:
+    """File metadata (path, name, size, blob sha) at a branch; cached per branch, unlike the body"""
+    file_info = cache_service.get("github:file_content", owner=owner, repo=repo, file_path=file_path, branch=branch)
+    if not file_info:
+        security_logger.info(f"[CACHE MISS] Resolving file: {file_path} in {owner}/{repo}@{branch}")
+        entry = _find_file_entry(token, owner, repo, file_path, branch)
+        file_info = {
+            "path": entry["path"],
+            "name": entry["name"],
+            "size": entry["size"],
+            "sha": entry["sha"],
+            "branch": branch,
+            "download_url": entry.get("download_url"),
+        }
+        cache_service.set(
+            "github:file_content", file_info, ttl=600, owner=owner, repo=repo, file_path=file_path, branch=branch
+        )
+
     return file_info
 
 
-def fetch_file_diff(token: str, owner: str, repo: str, pr_number: int, file_path: str) -> Dict[str, Any]:
-    cached = cache_service.get("github:file_diff", owner=owner, repo=repo, pr_number=pr_number, file_path=file_path)
-    if cached:
+def fetch_file_content(token: str, owner: str, repo: str, file_path: str, branch: str = "main") -> Dict[str, Any]:
+    file_info = resolve_file(token, owner, repo, file_path, branch)
+    content = _fetch_blob_bytes(token, owner, repo, file_info["sha"])
+    return {**file_info, "encoding": "base64", "content": base64.b64encode(content).decode()}
+
+
+def fetch_pr_head_sha(token: str, owner: str, repo: str, pr_number: int) -> str:
+    """Current head commit of a PR, cached for PR_HEAD_CACHE_TTL seconds"""
+    cached = cache_service.get("github:pr_head", owner=owner, repo=repo, pr_number=pr_number)
+    if cached and time.time() - cached["fetched_at"] < settings.PR_HEAD_CACHE_TTL:
+        return cached["sha"]
+
+    # Conditional request: while the PR is unchanged this is a free 304
+    pr_data = _make_github_request(f"/repos/{owner}/{repo}/pulls/{pr_number}", token)
+    head_sha = pr_data["head"]["sha"]
+    cache_service.set(
+        "github:pr_head",
+        {"sha": head_sha, "fetched_at": time.time()},
+        ttl=settings.PR_HEAD_CACHE_TTL,
+        owner=owner,
+        repo=repo,
+        pr_number=pr_number,
+    )
+    return head_sha
+
+
+def fetch_pr_file_index(token: str, owner: str, repo: str, pr_number: int) -> Dict[str, Dict[str, Any]]:
+    """Changed files of a PR keyed by path; entries only change when the PR head does"""
+    head_sha = fetch_pr_head_sha(token, owner, repo, pr_number)
+    cached = cache_service.get("github:pr_file_index", owner=owner, repo=repo, pr_number=pr_number, head_sha=head_sha)
+    if cached is not None:
         return cached
 
-    security_logger.info(f"[CACHE MISS] Fetching diff for {file_path} in PR #{pr_number} from {owner}/{repo}")
+    security_logger.info(f"[CACHE MISS] Indexing files of PR #{pr_number}@{head_sha[:7]} from {owner}/{repo}")
 
     files_endpoint = f"/repos/{owner}/{repo}/pulls/{pr_number}/files"
-    files_data = _make_github_request(files_endpoint, token)
+    files = [_pr_file_entry(file) for file in _iter_github_pages(files_endpoint, token)]
+    _remember_pr_files(owner, repo, pr_number, head_sha, files)
+    return {file["filename"]: file for file in files}
 
-    target_file = None
-    for file in files_data:
-        if file["filename"] == file_path:
-            target_file = file
-            break
 
+def fetch_file_diff(token: str, owner: str, repo: str, pr_number: int, file_path: str) -> Dict[str, Any]:
+    target_file = fetch_pr_file_index(token, owner, repo, pr_number).get(file_path)
     if not target_file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"File '{file_path}' not found in PR #{pr_number}"
         )
 
-    file_diff = {
+    return {
         "path": target_file["filename"],
         "status": target_file["status"],
         "additions": target_file["additions"],
         "deletions": target_file["deletions"],
         "changes": target_file["changes"],
-        "patch": target_file.get("patch", ""),
-        "previous_filename": target_file.get("previous_filename"),
+        "patch": target_file["patch"],
+        "previous_filename": target_file["previous_filename"],
     }
 
-    cache_service.set(
-        "github:file_diff", file_diff, ttl=300, owner=owner, repo=repo, pr_number=pr_number, file_path=file_path
-    )
-    security_logger.info(f"Fetched diff for {file_path} in PR #{pr_number} from {owner}/{repo}")
-    return file_diff
+
+def _tree_entries(token: str, owner: str, repo: str, ref: str) -> Dict[str, List]:
+    """Map every blob path in the repository at `ref` to [blob SHA, size]"""
+    cached = cache_service.get("github:tree", owner=owner, repo=repo, ref=ref)
+    if cached:
+        return cached
+
+    security_logger.info(f"[CACHE MISS] Fetching tree of {owner}/{repo}@{ref}")
+
+    endpoint = f"/repos/{owner}/{repo}/git/trees/{ref}"
+    tree_data = _make_github_request(endpoint, token, {"recursive": "1"})
+
+    if tree_data.get("truncated"):
+        security_logger.warning(f"Tree of {owner}/{repo}@{ref} was truncated by GitHub")
+
+    tree = {
+        entry["path"]: [entry["sha"], entry.get("size", 0)]
+        for entry in tree_data.get("tree", [])
+        if entry.get("type") == "blob"
+    }
+
+    cache_service.set("github:tree", tree, ttl=600, owner=owner, repo=repo, ref=ref)
+    return tree
+
+
+def fetch_repository_tree(token: str, owner: str, repo: str, ref: str) -> Dict[str, str]:
+    """Map every blob path in the repository at `ref` to its blob SHA"""
+    return {path: sha for path, (sha, _) in _tree_entries(token, owner, repo, ref).items()}
+
+
+def fetch_blob_content(token: str, owner: str, repo: str, sha: str) -> str:
+    """Fetch a blob by SHA and return it decoded as text"""
+    return _fetch_blob_bytes(token, owner, repo, sha).decode("utf-8", errors="replace")
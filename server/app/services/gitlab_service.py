@@ -1,147 +1,218 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import base64
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import httpx
 import requests
 from fastapi import HTTPException, status
 
+from app.config.settings import settings
 from app.core.logging_config import security_logger
+from app.services import rate_limit_governor
+from app.services.blob_cache import blob_cache
 from app.services.cache_service import cache_service
+from app.services.http_client import (
+    GITLAB_API_URL,
+    conditional_headers,
+    gitlab_async_client,
+    gitlab_session,
+    request_timeout,
+    token_fingerprint,
+)
+from app.services.pagination import collect, gitlab_page_info, iter_pages, iter_pages_async, pagination_headers
+
+MAX_PER_PAGE = 100
 
 
 class GitLabAPIError(Exception):
     pass
 
 
-def _make_gitlab_request(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Any:
+def _gitlab_call(
+    method: str,
+    endpoint: str,
+    token: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+    stream: bool = False,
+) -> requests.Response:
+    """Send one request through the pooled GitLab session"""
+    headers = {"Authorization": f"Bearer {token}", **(extra_headers or {})}
+
+    rate_limit_governor.acquire("gitlab", token)
+    try:
+        response = gitlab_session().request(
+            method,
+            f"{GITLAB_API_URL}{endpoint}",
+            headers=headers,
+            params=params,
+            json=data,
+            timeout=request_timeout(),
+            stream=stream,
+        )
+    except requests.RequestException as e:
+        security_logger.error(f"GitLab API {method} request failed: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitLab API")
+
+    rate_limit_governor.record(
+        "gitlab",
+        token,
+        response.headers,
+        status_code=response.status_code,
+        body=response.text if response.status_code in (403, 429) else None,
+    )
+    return response
 
-    base_url = "https://gitlab.com/api/v4"
-    url = f"{base_url}{endpoint}"
 
-    headers = {"Authorization": f"Bearer {token}", "User-Agent": "CodeReview-App"}
+async def _gitlab_call_async(
+    method: str,
+    endpoint: str,
+    token: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    """Async counterpart of _gitlab_call, using the shared httpx client"""
+    headers = {"Authorization": f"Bearer {token}", **(extra_headers or {})}
 
+    await rate_limit_governor.acquire_async("gitlab", token)
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-
-        rate_limit_remaining = response.headers.get("RateLimit-Remaining")
-        rate_limit_reset = response.headers.get("RateLimit-Reset")
-        security_logger.info(f"GitLab API: {endpoint} | Rate limit remaining: {rate_limit_remaining}")
-
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitLab token")
-        elif response.status_code == 403:
-            if rate_limit_remaining == "0":
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail=f"GitLab API rate limit exceeded. Resets at {rate_limit_reset}",
-                )
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitLab")
-        elif response.status_code != 200:
+        response = await gitlab_async_client().request(
+            method, f"{GITLAB_API_URL}{endpoint}", headers=headers, params=params, json=data
+        )
+    except httpx.HTTPError as e:
+        security_logger.error(f"GitLab API {method} request failed: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitLab API")
+
+    rate_limit_governor.record(
+        "gitlab",
+        token,
+        response.headers,
+        status_code=response.status_code,
+        body=response.text if response.status_code in (403, 429) else None,
+    )
+    return response
+
+
+def _handle_gitlab_response(
+    response: Union[requests.Response, httpx.Response], endpoint: str, expected: Tuple[int, ...]
+) -> None:
+    rate_limit_remaining = response.headers.get("RateLimit-Remaining")
+    rate_limit_reset = response.headers.get("RateLimit-Reset")
+    security_logger.info(f"GitLab API: {endpoint} | Rate limit remaining: {rate_limit_remaining}")
+
+    if response.status_code in expected:
+        return
+    if response.status_code == 401:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitLab token")
+    elif response.status_code == 403:
+        if rate_limit_remaining == "0":
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitLab API error: {response.status_code}"
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"GitLab API rate limit exceeded. Resets at {rate_limit_reset}",
             )
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions.")
+    elif response.status_code == 404:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitLab")
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitLab API error: {response.status_code}"
+    )
 
-        return response.json()
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitLab API request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitLab API")
+def _validator_key(endpoint: str, token: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # ETags vary by credentials, so the token is part of the key
+    return {"endpoint": endpoint, "params": sorted((params or {}).items()), "token": token_fingerprint(token)}
 
 
-def _make_gitlab_post_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    base_url = "https://gitlab.com/api/v4"
-    url = f"{base_url}{endpoint}"
+def _conditional_body(
+    response: Union[requests.Response, httpx.Response],
+    endpoint: str,
+    stored: Optional[Dict[str, Any]],
+    validator_key: Dict[str, Any],
+) -> Tuple[Any, Dict[str, str]]:
+    """(body, pagination headers), reusing the stored body on 304 Not Modified (which GitLab does not charge
+    against the rate limit)"""
+    if response.status_code == 304 and stored is not None:
+        security_logger.info(f"GitLab API: {endpoint} | 304 Not Modified")
+        return stored["body"], stored["meta"]
 
-    headers = {"Authorization": f"Bearer {token}", "User-Agent": "CodeReview-App"}
+    _handle_gitlab_response(response, endpoint, (200,))
+    body = response.json()
+    meta = pagination_headers(response.headers)
+    cache_service.set_validated("gitlab:conditional", response.headers, body, meta=meta, **validator_key)
+    return body, meta
 
-    try:
-        response = requests.post(url, headers=headers, json=data, timeout=10)
 
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitLab token")
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitLab")
-        elif response.status_code not in [200, 201]:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitLab API error: {response.status_code}"
-            )
+def _make_gitlab_request(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    return _make_gitlab_page(endpoint, token, params)[0]
 
-        return response.json()
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitLab API POST request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitLab API")
+def _make_gitlab_page(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, str]]:
+    validator_key = _validator_key(endpoint, token, params)
+    stored = cache_service.get_validated("gitlab:conditional", **validator_key)
 
+    response = _gitlab_call("GET", endpoint, token, params=params, extra_headers=conditional_headers(stored))
+    return _conditional_body(response, endpoint, stored, validator_key)
 
-def create_mr_comment(token: str, project_id: str, mr_iid: int, comment_body: str) -> Dict[str, Any]:
-    project_id_encoded = project_id.replace("/", "%2F")
-    endpoint = f"/projects/{project_id_encoded}/merge_requests/{mr_iid}/notes"
-    payload = {"body": comment_body}
-    response = _make_gitlab_post_request(endpoint, token, data=payload)
 
-    return {"note_id": response["id"], "web_url": response.get("web_url"), "created_at": response["created_at"]}
+async def _make_gitlab_request_async(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    return (await _make_gitlab_page_async(endpoint, token, params))[0]
 
 
-def _make_gitlab_put_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    base_url = "https://gitlab.com/api/v4"
-    url = f"{base_url}{endpoint}"
+async def _make_gitlab_page_async(
+    endpoint: str, token: str, params: Optional[Dict[str, Any]] = None
+) -> Tuple[Any, Dict[str, str]]:
+    validator_key = _validator_key(endpoint, token, params)
+    stored = cache_service.get_validated("gitlab:conditional", **validator_key)
 
-    headers = {"Authorization": f"Bearer {token}", "User-Agent": "CodeReview-App"}
+    response = await _gitlab_call_async(
+        "GET", endpoint, token, params=params, extra_headers=conditional_headers(stored)
+    )
+    return _conditional_body(response, endpoint, stored, validator_key)
 
-    try:
-        response = requests.put(url, headers=headers, json=data, timeout=10)
 
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitLab token")
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitLab")
-        elif response.status_code != 200:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitLab API error: {response.status_code}"
-            )
+def _iter_gitlab_pages(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """Every item of a paginated list endpoint, requested with the largest page size"""
+    params = {**(params or {}), "per_page": MAX_PER_PAGE}
+    return iter_pages(
+        lambda page: _make_gitlab_page(endpoint, token, {**params, "page": page}), gitlab_page_info, endpoint
+    )
 
-        return response.json()
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitLab API PUT request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitLab API")
+def _iter_gitlab_pages_async(endpoint: str, token: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Any]:
+    params = {**(params or {}), "per_page": MAX_PER_PAGE}
+    return iter_pages_async(
+        lambda page: _make_gitlab_page_async(endpoint, token, {**params, "page": page}), gitlab_page_info, endpoint
+    )
 
 
-def _make_gitlab_delete_request(endpoint: str, token: str) -> None:
-    base_url = "https://gitlab.com/api/v4"
-    url = f"{base_url}{endpoint}"
+def _make_gitlab_post_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    response = _gitlab_call("POST", endpoint, token, data=data)
+    _handle_gitlab_response(response, endpoint, (200, 201))
+    return response.json()
 
-    headers = {"Authorization": f"Bearer {token}", "User-Agent": "CodeReview-App"}
 
-    try:
-        response = requests.delete(url, headers=headers, timeout=10)
+def create_mr_comment(token: str, project_id: str, mr_iid: int, comment_body: str) -> Dict[str, Any]:
+    project_id_encoded = project_id.replace("/", "%2F")
+    endpoint = f"/projects/{project_id_encoded}/merge_requests/{mr_iid}/notes"
+    payload = {"body": comment_body}
+    response = _make_gitlab_post_request(endpoint, token, data=payload)
 
-        if response.status_code == 401:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired GitLab token")
-        elif response.status_code == 403:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Access forbidden. Check token permissions."
-            )
-        elif response.status_code == 404:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Resource not found on GitLab")
-        elif response.status_code != 204:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"GitLab API error: {response.status_code}"
-            )
+    return {"note_id": response["id"], "web_url": response.get("web_url"), "created_at": response["created_at"]}
 
-    except requests.RequestException as e:
-        security_logger.error(f"GitLab API DELETE request failed: {str(e)}")
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Failed to connect to GitLab API")
+
+def _make_gitlab_put_request(endpoint: str, token: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    response = _gitlab_call("PUT", endpoint, token, data=data)
+    _handle_gitlab_response(response, endpoint, (200,))
+    return response.json()
+
+
+def _make_gitlab_delete_request(endpoint: str, token: str) -> None:
+    response = _gitlab_call("DELETE", endpoint, token)
+    _handle_gitlab_response(response, endpoint, (204,))
 
 
 def update_mr_comment(token: str, project_id: str, mr_iid: int, note_id: int, new_body: str) -> Dict[str, Any]:
@@ -180,17 +251,40 @@ def create_inline_mr_comment(
     return {"note_id": response["notes"][0]["id"]}
 
 
-def fetch_branches(token: str, project_id: str) -> List[Dict[str, Any]]:
-    cached = cache_service.get("gitlab:branches", project_id=project_id)
-    if cached:
-        return cached
+def create_mr_review(
+    token: str, project_id: str, mr_iid: int, body: str, comments: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Post a summary and inline comments as draft notes, then publish them together.
+
+    GitLab has no single-request review: this is one request per note plus one publish, but the notes
+    stay private drafts until the publish and reach the MR (and its notification) all at once.
+    Each comment is {"body", "position"}; on failure the drafts created so far are deleted.
+    """
+    project_id_encoded = project_id.replace("/", "%2F")
+    endpoint = f"/projects/{project_id_encoded}/merge_requests/{mr_iid}/draft_notes"
+
+    draft_ids = []
+    try:
+        for note in [{"note": body}] + [{"note": c["body"], "position": c["position"]} for c in comments]:
+            draft_ids.append(_make_gitlab_post_request(endpoint, token, data=note)["id"])
+
+        response = _gitlab_call("POST", f"{endpoint}/bulk_publish", token)
+        _handle_gitlab_response(response, f"{endpoint}/bulk_publish", (200, 204))
+    except Exception:
+        for draft_id in draft_ids:
+            try:
+                _make_gitlab_delete_request(f"{endpoint}/{draft_id}", token)
+            except Exception as e:
+                security_logger.warning(f"Failed to delete draft note {draft_id} on MR !{mr_iid}: {e}")
+        raise
+
+    return {"notes": len(draft_ids)}
 
-    security_logger.info(f"[CACHE MISS] Fetching branches from GitLab project {project_id}")
-    endpoint = f"/projects/{project_id.replace('/', '%2F')}/repository/branches"
-    branches_data = _make_gitlab_request(endpoint, token)
 
+def _load_branches(token: str, project_id: str) -> List[Dict[str, Any]]:
+    endpoint = f"/projects/{project_id.replace('/', '%2F')}/repository/branches"
     branches = []
-    for branch in branches_data:
+    for branch in _iter_gitlab_pages(endpoint, token):
         branches.append(
             {
                 "name": branch["name"],
@@ -204,71 +298,185 @@ def fetch_branches(token: str, project_id: str) -> List[Dict[str, Any]]:
             }
         )
 
-    cache_service.set("gitlab:branches", branches, ttl=300, project_id=project_id)
     security_logger.info(f"Fetched {len(branches)} branches from GitLab project {project_id}")
     return branches
 
 
+def fetch_branches(token: str, project_id: str) -> List[Dict[str, Any]]:
+    return cache_service.get_or_fetch(
+        "gitlab:branches", lambda: _load_branches(token, project_id), ttl=300, project_id=project_id
+    )
+
+
+def fetch_group_projects(token: str, group: str) -> List[Dict[str, Any]]:
+    """Every project of a group and its subgroups that the token can see"""
+    endpoint = f"/groups/{group.replace('/', '%2F')}/projects"
+    projects = [
+        {
+            "id": project["id"],
+            "path_with_namespace": project["path_with_namespace"],
+            "name": project["name"],
+            "description": project.get("description"),
+            "web_url": project["web_url"],
+            "archived": project.get("archived", False),
+        }
+        for project in _iter_gitlab_pages(endpoint, token, {"include_subgroups": "true"})
+    ]
+    security_logger.info(f"Fetched {len(projects)} projects of GitLab group {group}")
+    return projects
+
+
+def _count(token: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> int:
+    body, meta = _make_gitlab_page(endpoint, token, {**(params or {}), "per_page": 1})
+    # X-Total is omitted above 10,000 items; with one item per page X-Total-Pages is the same number
+    total = meta.get("X-Total") or meta.get("X-Total-Pages")
+    if total:
+        return int(total)
+    if meta.get("X-Next-Page"):
+        raise GitLabAPIError(f"{endpoint}: collection too large for GitLab to report a total")
+    return len(body)
+
+
+def fetch_project_counts(token: str, project_id: str) -> Dict[str, int]:
+    """Branch and MR totals from X-Total headers of single-item pages"""
+    project_id_encoded = project_id.replace("/", "%2F")
+    merge_requests = f"/projects/{project_id_encoded}/merge_requests"
+    return {
+        "branches_count": _count(token, f"/projects/{project_id_encoded}/repository/branches"),
+        "open_prs_count": _count(token, merge_requests, {"state": "opened"}),
+        "closed_prs_count": _count(token, merge_requests, {"state": "closed"}),
+    }
+
+
+def _mr_summary(mr: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "number": mr["iid"],
+        "title": mr["title"],
+        "state": mr["state"],
+        "author": mr["author"]["username"],
+        "author_avatar": mr["author"]["avatar_url"],
+        "source_branch": mr["source_branch"],
+        "target_branch": mr["target_branch"],
+        "created_at": mr["created_at"],
+        "updated_at": mr["updated_at"],
+        "comments_count": mr.get("user_notes_count", 0),
+        "upvotes": mr.get("upvotes", 0),
+        "downvotes": mr.get("downvotes", 0),
+        "work_in_progress": mr.get("work_in_progress", False),
+        "labels": mr.get("labels", []),
+    }
+
+
+def _load_merge_requests(token: str, project_id: str, state: str, page: int, per_page: int) -> Dict[str, Any]:
+    endpoint = f"/projects/{project_id.replace('/', '%2F')}/merge_requests"
+    params = {"state": state, "page": page, "per_page": min(per_page, 100)}
+
+    merge_requests = [_mr_summary(mr) for mr in _make_gitlab_request(endpoint, token, params)]
+
+    security_logger.info(f"Fetched {len(merge_requests)} MRs from GitLab project {project_id}")
+
+    return {"merge_requests": merge_requests, "page": page, "per_page": per_page, "total": len(merge_requests)}
+
+
 def fetch_merge_requests(
     token: str, project_id: str, state: str = "opened", page: int = 1, per_page: int = 20
 ) -> Dict[str, Any]:
-    cached = cache_service.get("gitlab:mrs", project_id=project_id, state=state, page=page, per_page=per_page)
-    if cached:
-        return cached
+    return cache_service.get_or_fetch(
+        "gitlab:mrs",
+        lambda: _load_merge_requests(token, project_id, state, page, per_page),
+        ttl=120 if state == "opened" else 300,
+        project_id=project_id,
+        state=state,
+        page=page,
+        per_page=per_page,
+    )
 
-    security_logger.info(f"[CACHE MISS] Fetching MRs from GitLab project {project_id} (state={state})")
 
+def fetch_merge_requests_updated_since(
+    token: str,
+    project_id: str,
+    since: Optional[datetime] = None,
+    resume: Optional[str] = None,
+    max_pages: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """MRs in any state updated at or after `since` (all of them without it), most recently updated first.
+
+    Like the GitHub walk, stops after `max_pages` (default PULL_REQUEST_SYNC_MAX_PAGES) pages and returns the
+    page to resume from.
+    """
     endpoint = f"/projects/{project_id.replace('/', '%2F')}/merge_requests"
-    params = {"state": state, "page": page, "per_page": min(per_page, 100)}
+    params = {"state": "all", "order_by": "updated_at", "sort": "desc", "per_page": MAX_PER_PAGE}
+    if since:
+        params["updated_after"] = since.isoformat()
 
-    mrs_data = _make_gitlab_request(endpoint, token, params)
+    merge_requests, page = [], int(resume) if resume else 1
+    last_page = page + (max_pages or settings.PULL_REQUEST_SYNC_MAX_PAGES) - 1
+    while page:
+        if page > last_page:
+            return merge_requests, str(page)
+        body, meta = _make_gitlab_page(endpoint, token, {**params, "page": page})
+        merge_requests.extend(_mr_summary(mr) for mr in body)
+        page, _ = gitlab_page_info(meta)
+    return merge_requests, None
 
-    merge_requests = []
-    for mr in mrs_data:
-        merge_requests.append(
-            {
-                "number": mr["iid"],
-                "title": mr["title"],
-                "state": mr["state"],
-                "author": mr["author"]["username"],
-                "author_avatar": mr["author"]["avatar_url"],
-                "source_branch": mr["source_branch"],
-                "target_branch": mr["target_branch"],
-                "created_at": mr["created_at"],
-                "updated_at": mr["updated_at"],
-                "comments_count": mr.get("user_notes_count", 0),
-                "upvotes": mr.get("upvotes", 0),
-                "downvotes": mr.get("downvotes", 0),
-                "work_in_progress": mr.get("work_in_progress", False),
-            }
-        )
 
-    security_logger.info(f"Fetched {len(merge_requests)} MRs from GitLab project {project_id}")
+def _mr_details_endpoints(project_id: str, mr_iid: int) -> Tuple[str, str, str]:
+    base = f"/projects/{project_id.replace('/', '%2F')}/merge_requests/{mr_iid}"
+    return base, f"{base}/commits", f"{base}/changes"
 
-    result = {"merge_requests": merge_requests, "page": page, "per_page": per_page, "total": len(merge_requests)}
 
-    ttl = 120 if state == "opened" else 300
-    cache_service.set("gitlab:mrs", result, ttl=ttl, project_id=project_id, state=state, page=page, per_page=per_page)
-
-    return result
+def _mr_file_entry(change: Dict[str, Any]) -> Dict[str, Any]:
+    diff_lines = change.get("diff", "").split("\n")
+    additions = sum(1 for line in diff_lines if line.startswith("+") and not line.startswith("+++"))
+    deletions = sum(1 for line in diff_lines if line.startswith("-") and not line.startswith("---"))
 
+    return {
+        "filename": change["new_path"],
+        "status": (
+            "renamed"
+            if change["renamed_file"]
+            else ("deleted" if change["deleted_file"] else ("added" if change["new_file"] else "modified"))
+        ),
+        "additions": additions,
+        "deletions": deletions,
+        "changes": additions + deletions,
+        "diff": change.get("diff", ""),
+        "previous_path": change.get("old_path") if change["renamed_file"] else None,
+    }
 
-def fetch_merge_request_details(token: str, project_id: str, mr_iid: int) -> Dict[str, Any]:
-    cached = cache_service.get("gitlab:mr_details", project_id=project_id, mr_iid=mr_iid)
-    if cached:
-        return cached
 
-    security_logger.info(f"[CACHE MISS] Fetching MR !{mr_iid} details from GitLab project {project_id}")
+def _mr_file_index(files: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Files keyed by new path and, for renames, by old path too (lookups accept either)"""
+    index = {}
+    for file in files:
+        index[file["filename"]] = file
+        if file["previous_path"]:
+            index.setdefault(file["previous_path"], file)
+    return index
 
-    mr_endpoint = f"/projects/{project_id.replace('/', '%2F')}/merge_requests/{mr_iid}"
-    mr_data = _make_gitlab_request(mr_endpoint, token)
 
-    commits_endpoint = f"/projects/{project_id.replace('/', '%2F')}/merge_requests/{mr_iid}/commits"
-    commits_data = _make_gitlab_request(commits_endpoint, token)
+def _remember_mr_files(project_id: str, mr_iid: int, head_sha: str, files: List[Dict[str, Any]]) -> None:
+    """Seed the head and file-index caches from a full details fetch, so the diff viewer needs no extra listing"""
+    cache_service.set(
+        "gitlab:mr_head",
+        {"sha": head_sha, "fetched_at": time.time()},
+        ttl=settings.PR_HEAD_CACHE_TTL,
+        project_id=project_id,
+        mr_iid=mr_iid,
+    )
+    cache_service.set(
+        "gitlab:mr_file_index",
+        _mr_file_index(files),
+        ttl=3600,
+        project_id=project_id,
+        mr_iid=mr_iid,
+        head_sha=head_sha,
+    )
 
-    changes_endpoint = f"/projects/{project_id.replace('/', '%2F')}/merge_requests/{mr_iid}/changes"
-    changes_data = _make_gitlab_request(changes_endpoint, token)
 
+def _build_mr_details(
+    mr_data: Dict[str, Any], commits_data: Iterable[Dict], changes_data: Dict[str, Any]
+) -> Dict[str, Any]:
     commits = []
     for commit in commits_data:
         commits.append(
@@ -285,26 +493,10 @@ def fetch_merge_request_details(token: str, project_id: str, mr_iid: int) -> Dic
     total_deletions = 0
 
     for change in changes_data.get("changes", []):
-        diff_lines = change.get("diff", "").split("\n")
-        additions = sum(1 for line in diff_lines if line.startswith("+") and not line.startswith("+++"))
-        deletions = sum(1 for line in diff_lines if line.startswith("-") and not line.startswith("---"))
-
-        files.append(
-            {
-                "filename": change["new_path"],
-                "status": (
-                    "renamed"
-                    if change["renamed_file"]
-                    else ("deleted" if change["deleted_file"] else ("added" if change["new_file"] else "modified"))
-                ),
-                "additions": additions,
-                "deletions": deletions,
-                "changes": additions + deletions,
-                "diff": change.get("diff", ""),
-            }
-        )
-        total_additions += additions
-        total_deletions += deletions
+        file = _mr_file_entry(change)
+        files.append(file)
+        total_additions += file["additions"]
+        total_deletions += file["deletions"]
 
     mr_details = {
         "number": mr_data["iid"],
@@ -314,6 +506,8 @@ def fetch_merge_request_details(token: str, project_id: str, mr_iid: int) -> Dic
         "author": {"username": mr_data["author"]["username"], "avatar_url": mr_data["author"]["avatar_url"]},
         "source_branch": mr_data["source_branch"],
         "target_branch": mr_data["target_branch"],
+        "head_sha": mr_data.get("sha"),
+        "diff_refs": mr_data.get("diff_refs"),
         "created_at": mr_data["created_at"],
         "updated_at": mr_data["updated_at"],
         "merged_at": mr_data.get("merged_at"),
@@ -330,80 +524,197 @@ def fetch_merge_request_details(token: str, project_id: str, mr_iid: int) -> Dic
         },
     }
 
-    cache_service.set("gitlab:mr_details", mr_details, ttl=180, project_id=project_id, mr_iid=mr_iid)
-    security_logger.info(f"Fetched MR !{mr_iid} details from GitLab project {project_id}")
     return mr_details
 
 
-def fetch_file_content(token: str, project_id: str, file_path: str, branch: str = "main") -> Dict[str, Any]:
-    cached = cache_service.get("gitlab:file_content", project_id=project_id, file_path=file_path, branch=branch)
+def fetch_merge_request_details(token: str, project_id: str, mr_iid: int, force: bool = False) -> Dict[str, Any]:
+    """MR details with commits and changes; `force` skips the cached copy and overwrites it once the fetch succeeds"""
+    cached = None if force else cache_service.get("gitlab:mr_details", project_id=project_id, mr_iid=mr_iid)
     if cached:
         return cached
 
-    security_logger.info(f"[CACHE MISS] Fetching file content: {file_path} from GitLab project {project_id}@{branch}")
+    security_logger.info(f"[CACHE MISS] Fetching MR !{mr_iid} details from GitLab project {project_id}")
 
-    encoded_path = file_path.replace("/", "%2F")
-    endpoint = f"/projects/{project_id.replace('/', '%2F')}/repository/files/{encoded_path}"
-    params = {"ref": branch}
+    mr_endpoint, commits_endpoint, changes_endpoint = _mr_details_endpoints(project_id, mr_iid)
+    mr_details = _build_mr_details(
+        _make_gitlab_request(mr_endpoint, token),
+        _iter_gitlab_pages(commits_endpoint, token),
+        _make_gitlab_request(changes_endpoint, token),
+    )
 
-    file_data = _make_gitlab_request(endpoint, token, params)
+    cache_service.set(
+        "gitlab:mr_details",
+        mr_details,
+        ttl=180,
+        stale_ttl=settings.CACHE_STALE_TTL,
+        project_id=project_id,
+        mr_iid=mr_iid,
+    )
+    _remember_mr_files(project_id, mr_iid, mr_details["head_sha"], mr_details["files"])
+    security_logger.info(f"Fetched MR !{mr_iid} details from GitLab project {project_id}")
+    return mr_details
 
-    file_info = {
-        "path": file_data["file_path"],
-        "name": file_data["file_name"],
-        "size": file_data["size"],
-        "sha": file_data["blob_id"],
-        "encoding": file_data["encoding"],
-        "content": file_data["content"],
-        "branch": branch,
-    }
+
+async def fetch_merge_request_details_async(token: str, project_id: str, mr_iid: int) -> Dict[str, Any]:
+    """Same result as fetch_merge_request_details, with the MR, commits pages and changes in flight together"""
+    cached = cache_service.get("gitlab:mr_details", project_id=project_id, mr_iid=mr_iid)
+    if cached:
+        return cached
+
+    security_logger.info(f"[CACHE MISS] Fetching MR !{mr_iid} details from GitLab project {project_id}")
+
+    mr_endpoint, commits_endpoint, changes_endpoint = _mr_details_endpoints(project_id, mr_iid)
+    mr_data, commits_data, changes_data = await asyncio.gather(
+        _make_gitlab_request_async(mr_endpoint, token),
+        collect(_iter_gitlab_pages_async(commits_endpoint, token)),
+        _make_gitlab_request_async(changes_endpoint, token),
+    )
+    mr_details = _build_mr_details(mr_data, commits_data, changes_data)
 
     cache_service.set(
-        "gitlab:file_content", file_info, ttl=600, project_id=project_id, file_path=file_path, branch=branch
+        "gitlab:mr_details",
+        mr_details,
+        ttl=180,
+        stale_ttl=settings.CACHE_STALE_TTL,
+        project_id=project_id,
+        mr_iid=mr_iid,
     )
-    security_logger.info(f"Fetched file content: {file_path} from GitLab project {project_id}@{branch}")
+    _remember_mr_files(project_id, mr_iid, mr_details["head_sha"], mr_details["files"])
+    security_logger.info(f"Fetched MR !{mr_iid} details from GitLab project {project_id}")
+    return mr_details
+
+
+def _fetch_blob_bytes(token: str, project_id: str, sha: str) -> bytes:
+    content = blob_cache.get(sha)
+    if content is not None:
+        return content
+
+    endpoint = f"/projects/{project_id.replace('/', '%2F')}/repository/blobs/{sha}/raw"
+    response = _gitlab_call("GET", endpoint, token)
+    _handle_gitlab_response(response, endpoint, (200,))
+    content = response.content
+    blob_cache.put(sha, content)
+    return content
+
+
+def open_blob_stream(token: str, project_id: str, sha: str, byte_range: Optional[str] = None) -> requests.Response:
+    """Streaming response with a blob's raw bytes, 206 if the Range was honoured; the caller must close it"""
+    endpoint = f"/projects/{project_id.replace('/', '%2F')}/repository/blobs/{sha}/raw"
+    headers = {}
+    if byte_range:
+        headers["Range"] = byte_range
+    response = _gitlab_call("GET", endpoint, token, extra_headers=headers, stream=True)
+    try:
+        _handle_gitlab_response(response, endpoint, (200, 206))
+    except HTTPException:
+        response.close()
+        raise
+    return response
+
+
+def resolve_file(token: str, project_id: str, file_path: str, branch: str = "main") -> Dict[str, Any]:
+    """File metadata (path, name, size, blob sha) at a branch; cached per branch, unlike the body"""
+    file_info = cache_service.get("gitlab:file_content", project_id=project_id, file_path=file_path, branch=branch)
+    if not file_info:
+        security_logger.info(f"[CACHE MISS] Resolving file: {file_path} in GitLab project {project_id}@{branch}")
+
+        encoded_path = file_path.replace("/", "%2F")
+        endpoint = f"/projects/{project_id.replace('/', '%2F')}/repository/files/{encoded_path}"
+        # HEAD returns the file's metadata (blob id, size) as headers, without the body
+        response = _gitlab_call("HEAD", endpoint, token, params={"ref": branch})
+        _handle_gitlab_response(response, endpoint, (200,))
+
+        file_info = {
+            "path": response.headers.get("X-Gitlab-File-Path", file_path),
+            "name": response.headers.get("X-Gitlab-File-Name", file_path.rsplit("/", 1)[-1]),
+            "size": int(response.headers.get("X-Gitlab-Size", 0)),
+            "sha": response.headers["X-Gitlab-Blob-Id"],
+            "branch": branch,
+        }
+        cache_service.set(
+            "gitlab:file_content", file_info, ttl=600, project_id=project_id, file_path=file_path, branch=branch
+        )
+
     return file_info
 
 
-def fetch_file_diff(token: str, project_id: str, mr_iid: int, file_path: str) -> Dict[str, Any]:
-    cached = cache_service.get("gitlab:file_diff", project_id=project_id, mr_iid=mr_iid, file_path=file_path)
-    if cached:
+def fetch_file_content(token: str, project_id: str, file_path: str, branch: str = "main") -> Dict[str, Any]:
+    file_info = resolve_file(token, project_id, file_path, branch)
+    content = _fetch_blob_bytes(token, project_id, file_info["sha"])
+    return {**file_info, "encoding": "base64", "content": base64.b64encode(content).decode()}
+
+
+def fetch_mr_head_sha(token: str, project_id: str, mr_iid: int) -> str:
+    """Current head commit of an MR, cached for PR_HEAD_CACHE_TTL seconds"""
+    cached = cache_service.get("gitlab:mr_head", project_id=project_id, mr_iid=mr_iid)
+    if cached and time.time() - cached["fetched_at"] < settings.PR_HEAD_CACHE_TTL:
+        return cached["sha"]
+
+    mr_data = _make_gitlab_request(f"/projects/{project_id.replace('/', '%2F')}/merge_requests/{mr_iid}", token)
+    head_sha = mr_data.get("sha")
+    cache_service.set(
+        "gitlab:mr_head",
+        {"sha": head_sha, "fetched_at": time.time()},
+        ttl=settings.PR_HEAD_CACHE_TTL,
+        project_id=project_id,
+        mr_iid=mr_iid,
+    )
+    return head_sha
+
+
+def fetch_mr_file_index(token: str, project_id: str, mr_iid: int) -> Dict[str, Dict[str, Any]]:
+    """Changed files of an MR keyed by path; entries only change when the MR head does"""
+    head_sha = fetch_mr_head_sha(token, project_id, mr_iid)
+    cached = cache_service.get("gitlab:mr_file_index", project_id=project_id, mr_iid=mr_iid, head_sha=head_sha)
+    if cached is not None:
         return cached
 
-    security_logger.info(f"[CACHE MISS] Fetching diff for {file_path} in MR !{mr_iid} from GitLab project {project_id}")
+    security_logger.info(f"[CACHE MISS] Indexing files of MR !{mr_iid}@{head_sha} from GitLab project {project_id}")
 
     changes_endpoint = f"/projects/{project_id.replace('/', '%2F')}/merge_requests/{mr_iid}/changes"
     changes_data = _make_gitlab_request(changes_endpoint, token)
+    files = [_mr_file_entry(change) for change in changes_data.get("changes", [])]
+    _remember_mr_files(project_id, mr_iid, head_sha, files)
+    return _mr_file_index(files)
 
-    target_file = None
-    for change in changes_data.get("changes", []):
-        if change["new_path"] == file_path or change["old_path"] == file_path:
-            target_file = change
-            break
 
+def fetch_file_diff(token: str, project_id: str, mr_iid: int, file_path: str) -> Dict[str, Any]:
+    target_file = fetch_mr_file_index(token, project_id, mr_iid).get(file_path)
     if not target_file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=f"File '{file_path}' not found in MR !{mr_iid}"
         )
 
-    diff_lines = target_file.get("diff", "").split("\n")
-    additions = sum(1 for line in diff_lines if line.startswith("+") and not line.startswith("+++"))
-    deletions = sum(1 for line in diff_lines if line.startswith("-") and not line.startswith("---"))
+    return {
+        "path": target_file["filename"],
+        "status": target_file["status"],
+        "additions": target_file["additions"],
+        "deletions": target_file["deletions"],
+        "changes": target_file["changes"],
+        "diff": target_file["diff"],
+        "previous_path": target_file["previous_path"],
+    }
 
-    file_diff = {
-        "path": target_file["new_path"],
-        "status": (
-            "renamed"
-            if target_file["renamed_file"]
-            else ("deleted" if target_file["deleted_file"] else ("added" if target_file["new_file"] else "modified"))
-        ),
-        "additions": additions,
-        "deletions": deletions,
-        "changes": additions + deletions,
-        "diff": target_file.get("diff", ""),
-        "previous_path": target_file.get("old_path") if target_file["renamed_file"] else None,
+
+def fetch_repository_tree(token: str, project_id: str, ref: str) -> Dict[str, str]:
+    """Map blob paths in the repository at `ref` to their blob SHAs"""
+    cached = cache_service.get("gitlab:tree", project_id=project_id, ref=ref)
+    if cached:
+        return cached
+
+    security_logger.info(f"[CACHE MISS] Fetching tree of GitLab project {project_id}@{ref}")
+
+    endpoint = f"/projects/{project_id.replace('/', '%2F')}/repository/tree"
+    tree = {
+        entry["path"]: entry["id"]
+        for entry in _iter_gitlab_pages(endpoint, token, {"ref": ref, "recursive": "true"})
+        if entry.get("type") == "blob"
     }
 
-    cache_service.set("gitlab:file_diff", file_diff, ttl=300, project_id=project_id, mr_iid=mr_iid, file_path=file_path)
-    security_logger.info(f"Fetched diff for {file_path} in MR !{mr_iid} from GitLab project {project_id}")
-    return file_diff
+    cache_service.set("gitlab:tree", tree, ttl=600, project_id=project_id, ref=ref)
+    return tree
+
+
+def fetch_blob_content(token: str, project_id: str, sha: str) -> str:
+    """Fetch a blob by SHA and return it decoded as text"""
+    return _fetch_blob_bytes(token, project_id, sha).decode("utf-8", errors="replace")
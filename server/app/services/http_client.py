@@ -0,0 +1,111 @@
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config.settings import settings
+
+GITHUB_API_URL = "https://api.github.com"
+GITLAB_API_URL = "https://gitlab.com/api/v4"
+USER_AGENT = "CodeReview-App"
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _build_session(base_url: str) -> requests.Session:
+    """Keep-alive session with a bounded connection pool for one API host"""
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        # Block instead of opening extra throwaway connections once the per-host cap is reached
+        pool_block=True,
+        # Only connection setup is retried; a request that reached the server is never replayed
+        max_retries=Retry(total=settings.HTTP_CONNECT_RETRIES, connect=settings.HTTP_CONNECT_RETRIES, read=0, status=0),
+    )
+    session.mount(base_url, adapter)
+    return session
+
+
+def get_session(base_url: str) -> requests.Session:
+    session = _sessions.get(base_url)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(base_url)
+            if session is None:
+                session = _sessions[base_url] = _build_session(base_url)
+    return session
+
+
+def github_session() -> requests.Session:
+    return get_session(GITHUB_API_URL)
+
+
+def gitlab_session() -> requests.Session:
+    return get_session(GITLAB_API_URL)
+
+
+def request_timeout() -> tuple:
+    """(connect, read) timeout used for every platform API call"""
+    return (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+
+def token_fingerprint(token: str) -> str:
+    """Stable, non-reversible identifier for a token, safe to use in cache keys"""
+    return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def conditional_headers(stored: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since for a response previously stored with cache_service.set_validated"""
+    headers = {}
+    if stored:
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last_modified"):
+            headers["If-Modified-Since"] = stored["last_modified"]
+    return headers
+
+
+def get_async_client(base_url: str) -> httpx.AsyncClient:
+    """Shared async client for one API host; created lazily on the app's event loop"""
+    client = _async_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = _async_clients[base_url] = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_POOL_MAXSIZE, max_keepalive_connections=settings.HTTP_POOL_MAXSIZE
+            ),
+            timeout=httpx.Timeout(settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            transport=httpx.AsyncHTTPTransport(retries=settings.HTTP_CONNECT_RETRIES),
+        )
+    return client
+
+
+def github_async_client() -> httpx.AsyncClient:
+    return get_async_client(GITHUB_API_URL)
+
+
+def gitlab_async_client() -> httpx.AsyncClient:
+    return get_async_client(GITLAB_API_URL)
+
+
+async def close_async_clients() -> None:
+    for client in list(_async_clients.values()):
+        await client.aclose()
+    _async_clients.clear()
+
+
+def close_sessions() -> None:
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,102 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import requests
+from groq import Groq, RateLimitError
+
+from app.config.settings import settings
+
+
+class LLMProviderError(Exception):
+    pass
+
+
+class LLMRateLimitError(LLMProviderError):
+    pass
+
+
+class LLMProvider(ABC):
+    """Chat-completions backend used by MultiKeyGroqService, one instance per API key.
+
+    `complete` returns a dict with `content`, `finish_reason`, `prompt_tokens`,
+    `completion_tokens` and `total_tokens`, and raises LLMRateLimitError on 429s.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def complete(self, messages: List[Dict], model: str, max_tokens: int, temperature: float, timeout: int) -> Dict:
+        pass
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        self.client = Groq(api_key=api_key, base_url=base_url) if base_url else Groq(api_key=api_key)
+
+    def complete(self, messages: List[Dict], model: str, max_tokens: int, temperature: float, timeout: int) -> Dict:
+        try:
+            response = self.client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, timeout=timeout
+            )
+        except RateLimitError as e:
+            raise LLMRateLimitError(str(e)) from e
+
+        choice = response.choices[0]
+        return {
+            "content": choice.message.content,
+            "finish_reason": choice.finish_reason,
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "total_tokens": response.usage.total_tokens,
+        }
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Plain HTTP client for any OpenAI-style `/chat/completions` endpoint (e.g. tools/fake_llm_server.py)"""
+
+    name = "openai_compatible"
+
+    def __init__(self, api_key: str, base_url: str):
+        self.api_key = api_key
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.session = requests.Session()
+
+    def complete(self, messages: List[Dict], model: str, max_tokens: int, temperature: float, timeout: int) -> Dict:
+        try:
+            response = self.session.post(
+                self.url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+                timeout=timeout,
+            )
+        except requests.RequestException as e:
+            raise LLMProviderError(f"Connection to {self.url} failed: {e}") from e
+
+        if response.status_code == 429:
+            raise LLMRateLimitError(f"Rate limited (retry after {response.headers.get('Retry-After')}s)")
+        if response.status_code != 200:
+            raise LLMProviderError(f"LLM API error: {response.status_code}")
+
+        data = response.json()
+        choice = data["choices"][0]
+        usage = data.get("usage", {})
+        return {
+            "content": choice["message"]["content"],
+            "finish_reason": choice.get("finish_reason"),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+
+
+def create_provider(api_key: str) -> LLMProvider:
+    provider = settings.LLM_PROVIDER.lower()
+    if provider == "groq":
+        return GroqProvider(api_key, base_url=settings.LLM_BASE_URL or None)
+    if provider == "openai_compatible":
+        if not settings.LLM_BASE_URL:
+            raise ValueError("LLM_BASE_URL is required when LLM_PROVIDER=openai_compatible")
+        return OpenAICompatibleProvider(api_key, base_url=settings.LLM_BASE_URL)
+    raise ValueError(f"Unknown LLM_PROVIDER '{settings.LLM_PROVIDER}'. Use 'groq' or 'openai_compatible'")
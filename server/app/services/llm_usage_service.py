@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.models.llm_usage import LLMUsage
+
+BUCKET_MINUTES = {"minute": 1, "hour": 60, "day": 60 * 24}
+
+GROUP_COLUMNS = {
+    "key": LLMUsage.api_key_index,
+    "model": LLMUsage.model,
+    "project": LLMUsage.project_id,
+    "user": LLMUsage.user_id,
+}
+
+
+def _headroom(used_per_minute: float, limit_per_minute: int) -> Optional[float]:
+    """Fraction of a per-key limit still unused (negative means the limit was exceeded on average)"""
+    if not limit_per_minute:
+        return None
+    return round(1 - used_per_minute / limit_per_minute, 4)
+
+
+def record_call(
+    db: Session,
+    call: Dict,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    review_id: Optional[int] = None,
+) -> None:
+    """Add a ledger row for one LLM call; it is committed together with the caller's next commit"""
+    db.add(
+        LLMUsage(
+            api_key_index=call["api_key_index"],
+            model=call["model"],
+            project_id=project_id,
+            user_id=user_id,
+            review_id=review_id,
+            status=call["status"],
+            error_type=call.get("error_type"),
+            max_tokens=call.get("max_tokens"),
+            prompt_tokens=call.get("prompt_tokens", 0),
+            completion_tokens=call.get("completion_tokens", 0),
+            total_tokens=call.get("total_tokens", 0),
+            latency_ms=call.get("latency_ms"),
+        )
+    )
+
+
+def get_usage_rollup(db: Session, bucket: str = "hour", group_by: str = "key", hours: int = 24) -> Dict:
+    """Throughput, error rate and token burn per time bucket and per key/model/project/user"""
+    group_column = GROUP_COLUMNS[group_by]
+    bucket_start = func.date_trunc(bucket, LLMUsage.created_at).label("bucket_start")
+    since = datetime.utcnow() - timedelta(hours=hours)
+
+    rows = (
+        db.query(
+            bucket_start,
+            group_column.label("group"),
+            func.count(LLMUsage.id).label("calls"),
+            func.sum(case((LLMUsage.status != "success", 1), else_=0)).label("errors"),
+            func.sum(case((LLMUsage.status == "rate_limited", 1), else_=0)).label("rate_limited"),
+            func.coalesce(func.sum(LLMUsage.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(LLMUsage.completion_tokens), 0).label("completion_tokens"),
+            func.coalesce(func.sum(LLMUsage.total_tokens), 0).label("total_tokens"),
+            func.avg(LLMUsage.latency_ms).label("avg_latency_ms"),
+        )
+        .filter(LLMUsage.created_at >= since)
+        .group_by(bucket_start, group_column)
+        .order_by(bucket_start, group_column)
+        .all()
+    )
+
+    minutes = BUCKET_MINUTES[bucket]
+    per_key = group_by == "key"
+    buckets = []
+    for row in rows:
+        tokens_per_minute = row.total_tokens / minutes
+        requests_per_minute = row.calls / minutes
+        buckets.append(
+            {
+                "bucket_start": row.bucket_start,
+                "group": str(row.group) if row.group is not None else None,
+                "calls": row.calls,
+                "errors": row.errors,
+                "rate_limited": row.rate_limited,
+                "error_rate": round(row.errors / row.calls, 4) if row.calls else 0.0,
+                "prompt_tokens": row.prompt_tokens,
+                "completion_tokens": row.completion_tokens,
+                "total_tokens": row.total_tokens,
+                "avg_latency_ms": round(float(row.avg_latency_ms), 1) if row.avg_latency_ms is not None else None,
+                "requests_per_minute": round(requests_per_minute, 2),
+                "tokens_per_minute": round(tokens_per_minute, 1),
+                "requests_headroom": _headroom(requests_per_minute, settings.GROQ_KEY_RPM_LIMIT) if per_key else None,
+                "tokens_headroom": _headroom(tokens_per_minute, settings.GROQ_KEY_TPM_LIMIT) if per_key else None,
+            }
+        )
+
+    return {
+        "bucket": bucket,
+        "group_by": group_by,
+        "hours": hours,
+        "limits": {
+            "requests_per_minute_per_key": settings.GROQ_KEY_RPM_LIMIT or None,
+            "tokens_per_minute_per_key": settings.GROQ_KEY_TPM_LIMIT or None,
+        },
+        "buckets": buckets,
+    }
@@ -0,0 +1,124 @@
+import asyncio
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from requests.utils import parse_header_links
+
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+
+# (items, pagination headers) for one page
+Page = Tuple[List[Any], Dict[str, str]]
+# pagination headers -> (next page, last page)
+PageInfo = Callable[[Dict[str, str]], Tuple[Optional[int], Optional[int]]]
+
+PAGINATION_HEADERS = ("Link", "X-Next-Page", "X-Total-Pages", "X-Total")
+
+
+def pagination_headers(headers) -> Dict[str, str]:
+    return {name: headers[name] for name in PAGINATION_HEADERS if headers.get(name)}
+
+
+def _page_param(url: Optional[str]) -> Optional[int]:
+    if not url:
+        return None
+    page = parse_qs(urlparse(url).query).get("page")
+    return int(page[0]) if page else None
+
+
+def link_page_info(meta: Dict[str, str]) -> Tuple[Optional[int], Optional[int]]:
+    """GitHub: next/last page numbers from the Link header"""
+    links = {link.get("rel"): link.get("url") for link in parse_header_links(meta.get("Link", ""))}
+    return _page_param(links.get("next")), _page_param(links.get("last"))
+
+
+def gitlab_page_info(meta: Dict[str, str]) -> Tuple[Optional[int], Optional[int]]:
+    """GitLab: X-Next-Page / X-Total-Pages (the latter is omitted for very large collections)"""
+    next_page = meta.get("X-Next-Page")
+    total_pages = meta.get("X-Total-Pages")
+    return (int(next_page) if next_page else None), (int(total_pages) if total_pages else None)
+
+
+def _remaining_pages(last_page: int, label: str) -> range:
+    if last_page > settings.PAGINATION_MAX_PAGES:
+        security_logger.warning(
+            f"{label}: {last_page} pages available, stopping at PAGINATION_MAX_PAGES={settings.PAGINATION_MAX_PAGES}"
+        )
+    return range(2, min(last_page, settings.PAGINATION_MAX_PAGES) + 1)
+
+
+def iter_pages(fetch_page: Callable[[int], Page], page_info: PageInfo, label: str) -> Iterator[Any]:
+    """Yield every item of a paginated collection, in order.
+
+    Once the first page reveals the last page number, the rest are fetched concurrently, at most
+    PAGINATION_CONCURRENCY pages ahead of the consumer, so stopping early saves the pages not yet requested;
+    otherwise next pages are followed one at a time.
+    """
+    items, meta = fetch_page(1)
+    yield from items
+
+    next_page, last_page = page_info(meta)
+    if last_page:
+        pages = iter(_remaining_pages(last_page, label))
+        # Worker threads do not inherit context vars (e.g. the rate-limit priority), so carry them over
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=settings.PAGINATION_CONCURRENCY) as pool:
+
+            def submit(page: int):
+                return pool.submit(context.copy().run, fetch_page, page)
+
+            window = deque(submit(page) for page in islice(pages, settings.PAGINATION_CONCURRENCY))
+            try:
+                while window:
+                    page_items, _ = window.popleft().result()
+                    window.extend(submit(page) for page in islice(pages, 1))
+                    yield from page_items
+            finally:
+                for future in window:
+                    future.cancel()
+        return
+
+    while next_page and next_page <= settings.PAGINATION_MAX_PAGES:
+        items, meta = fetch_page(next_page)
+        yield from items
+        next_page, _ = page_info(meta)
+
+
+async def iter_pages_async(
+    fetch_page: Callable[[int], Awaitable[Page]], page_info: PageInfo, label: str
+) -> AsyncIterator[Any]:
+    """Async counterpart of iter_pages"""
+    items, meta = await fetch_page(1)
+    for item in items:
+        yield item
+
+    next_page, last_page = page_info(meta)
+    if last_page:
+        pages = iter(_remaining_pages(last_page, label))
+        window = deque(
+            asyncio.ensure_future(fetch_page(page)) for page in islice(pages, settings.PAGINATION_CONCURRENCY)
+        )
+        try:
+            while window:
+                page_items, _ = await window.popleft()
+                window.extend(asyncio.ensure_future(fetch_page(page)) for page in islice(pages, 1))
+                for item in page_items:
+                    yield item
+        finally:
+            for task in window:
+                task.cancel()
+        return
+
+    while next_page and next_page <= settings.PAGINATION_MAX_PAGES:
+        items, meta = await fetch_page(next_page)
+        for item in items:
+            yield item
+        next_page, _ = page_info(meta)
+
+
+async def collect(items: AsyncIterator[Any]) -> List[Any]:
+    return [item async for item in items]
@@ -5,7 +5,7 @@ from app.core.logging_config import security_logger
 from app.models.pr_comment import PRComment
 from app.models.project import PlatformType
 from app.models.project_member import ProjectMemberRole
-from app.services import github_service, gitlab_service, project_service, team_service
+from app.services import github_app_service, github_service, gitlab_service, project_service, team_service
 
 
 async def create_pr_comment(db: Session, project_id: int, pr_number: int, user_id: int, comment_text: str) -> PRComment:
@@ -17,7 +17,7 @@ async def create_pr_comment(db: Session, project_id: int, pr_number: int, user_i
 
     if project.platform == PlatformType.GITHUB:
         result = github_service.create_pr_comment(
-            token=project.github_token,
+            token=github_app_service.project_token(project),
             owner=project.github_repo_owner,
             repo=project.github_repo_name,
             pr_number=pr_number,
@@ -153,7 +153,7 @@ async def update_pr_comment(db: Session, comment_id: int, user_id: int, new_comm
         if is_inline_comment:
             # Use PR review comment endpoint for inline comments
             github_service.update_pr_review_comment(
-                token=project.github_token,
+                token=github_app_service.project_token(project),
                 owner=project.github_repo_owner,
                 repo=project.github_repo_name,
                 comment_id=comment.github_comment_id,
@@ -162,7 +162,7 @@ async def update_pr_comment(db: Session, comment_id: int, user_id: int, new_comm
         else:
             # Use issue comment endpoint for general comments
             github_service.update_pr_comment(
-                token=project.github_token,
+                token=github_app_service.project_token(project),
                 owner=project.github_repo_owner,
                 repo=project.github_repo_name,
                 comment_id=comment.github_comment_id,
@@ -204,7 +204,7 @@ async def delete_pr_comment(db: Session, comment_id: int, user_id: int) -> None:
         if is_inline_comment:
             # Use PR review comment endpoint for inline comments
             github_service.delete_pr_review_comment(
-                token=project.github_token,
+                token=github_app_service.project_token(project),
                 owner=project.github_repo_owner,
                 repo=project.github_repo_name,
                 comment_id=comment.github_comment_id,
@@ -212,7 +212,7 @@ async def delete_pr_comment(db: Session, comment_id: int, user_id: int) -> None:
         else:
             # Use issue comment endpoint for general comments
             github_service.delete_pr_comment(
-                token=project.github_token,
+                token=github_app_service.project_token(project),
                 owner=project.github_repo_owner,
                 repo=project.github_repo_name,
                 comment_id=comment.github_comment_id,
@@ -249,7 +249,7 @@ async def create_inline_pr_comment(
     if project.platform == PlatformType.GITHUB:
         try:
             result = github_service.create_inline_pr_comment(
-                token=project.github_token,
+                token=github_app_service.project_token(project),
                 owner=project.github_repo_owner,
                 repo=project.github_repo_name,
                 pr_number=pr_number,
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.models.project import PlatformType, Project
+from app.services import github_app_service, github_service, gitlab_service, rate_limit_governor
+from app.services.cache_service import cache_service
+
+_pool = ThreadPoolExecutor(max_workers=settings.PR_PREFETCH_WORKERS, thread_name_prefix="pr-prefetch")
+
+# PR details already queued in this worker, keyed by (platform, repository, number)
+_queued = set()
+_queued_lock = threading.Lock()
+
+
+def _details_key(project: Project, number: int) -> Tuple[str, Dict[str, Any]]:
+    if project.platform == PlatformType.GITHUB:
+        return "github:pr_details", {
+            "owner": project.github_repo_owner,
+            "repo": project.github_repo_name,
+            "pr_number": number,
+        }
+    return "gitlab:mr_details", {"project_id": project.gitlab_project_id, "mr_iid": number}
+
+
+def _is_current(prefix: str, fields: Dict[str, Any], updated_at: str) -> bool:
+    """Cached details match the list's updated_at; a stale-but-unchanged entry is made fresh again"""
+    cached = cache_service.peek(prefix, **fields)
+    if not cached or cached.get("updated_at") != updated_at:
+        return False
+    if cache_service.get(prefix, **fields) is None:
+        # Same updated_at as the list just fetched, so the details have not changed since they were cached
+        cache_service.set(prefix, cached, ttl=180, stale_ttl=settings.CACHE_STALE_TTL, **fields)
+    return True
+
+
+def _fetch_details(project: Project, number: int) -> Callable[[], Any]:
+    if project.platform == PlatformType.GITHUB:
+        return partial(
+            github_service.fetch_pull_request_details,
+            token=github_app_service.project_token(project),
+            owner=project.github_repo_owner,
+            repo=project.github_repo_name,
+            pr_number=number,
+        )
+    return partial(
+        gitlab_service.fetch_merge_request_details,
+        token=project.gitlab_token,
+        project_id=project.gitlab_project_id,
+        mr_iid=number,
+    )
+
+
+def _prefetch(queue_key: tuple, prefix: str, fields: Dict[str, Any], fetch: Callable[[], Any]):
+    try:
+        # Outdated details must not satisfy the fetch's own cache check, but stay served until it succeeds
+        with rate_limit_governor.background():
+            fetch(force=True)
+    except rate_limit_governor.RateLimitBudgetExhausted as e:
+        security_logger.info(f"PR prefetch skipped for {prefix} {fields}: {e}")
+    except Exception as e:
+        security_logger.warning(f"PR prefetch failed for {prefix} {fields}: {e}")
+    finally:
+        with _queued_lock:
+            _queued.discard(queue_key)
+
+
+def queue_prefetch(project: Project, pull_requests: List[Dict[str, Any]]) -> int:
+    """Warm the details cache for the first PR_PREFETCH_COUNT PRs of a list page that was just served.
+
+    Fetches run at background API priority; PRs whose cached details carry the same updated_at are skipped.
+    Returns the number of fetches queued.
+    """
+    if settings.PR_PREFETCH_COUNT <= 0:
+        return 0
+
+    queued = 0
+    for pr in pull_requests[: settings.PR_PREFETCH_COUNT]:
+        prefix, fields = _details_key(project, pr["number"])
+        if _is_current(prefix, fields, pr.get("updated_at")):
+            continue
+
+        queue_key = (prefix, *sorted(fields.items()))
+        with _queued_lock:
+            if queue_key in _queued:
+                continue
+            _queued.add(queue_key)
+        # Token and repository are bound now; the request's session is closed by the time the fetch runs
+        _pool.submit(_prefetch, queue_key, prefix, fields, _fetch_details(project, pr["number"]))
+        queued += 1
+
+    if queued:
+        security_logger.info(f"Queued details prefetch for {queued} PR(s) in project {project.id}")
+    return queued
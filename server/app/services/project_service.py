@@ -1,44 +1,129 @@
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.config.settings import settings
 from app.core.logging_config import security_logger
 from app.models.project import PlatformType, Project
 from app.models.project_member import ProjectMember, ProjectMemberRole
-from app.schemas.project import ProjectCreateGitHub, ProjectCreateGitLab
-from app.services import github_service, gitlab_service, team_service
+from app.schemas.project import ProjectBulkCreate, ProjectCreateGitHub, ProjectCreateGitLab
+from app.services import github_app_service, github_service, gitlab_service, team_service
 from app.services.cache_service import cache_service
+from app.services.http_client import (
+    GITHUB_API_URL,
+    GITLAB_API_URL,
+    github_session,
+    gitlab_session,
+    request_timeout,
+    token_fingerprint,
+)
 from app.services.redis_cache import redis_cache
 
+BULK_STATUSES = ("created", "skipped", "failed")
 
-def verify_github_token(token: str, owner: str, repo: str) -> bool:
+_verify_pool = ThreadPoolExecutor(max_workers=settings.TOKEN_VERIFY_CONCURRENCY, thread_name_prefix="token-verify")
+
+
+def _check_access(session: requests.Session, url: str, headers: Dict[str, str], label: str) -> Optional[bool]:
+    """True / False when the platform answered for the token, None on errors that say nothing about it"""
     try:
-        headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json"}
-        response = requests.get(f"https://api.github.com/repos/{owner}/{repo}", headers=headers, timeout=5)
-        return response.status_code == 200
-    except Exception as e:
-        security_logger.error(f"GitHub token verification failed for {owner}/{repo}: {e}")
+        response = session.get(url, headers=headers, timeout=request_timeout())
+    except requests.RequestException as e:
+        security_logger.error(f"Token verification failed for {label}: {e}")
+        return None
+    if response.status_code == 429 or response.status_code >= 500:
+        security_logger.warning(f"Token verification for {label} got {response.status_code}")
+        return None
+    return response.status_code == 200
+
+
+def _cached_check(prefix: str, check: Callable[[], Optional[bool]], **fields) -> bool:
+    cached = cache_service.get(prefix, **fields)
+    if cached is not None:
+        return cached
+    result = check()
+    if result is None:
+        # Outages and rate limiting are not cached, so the next attempt asks again
         return False
+    ttl = settings.TOKEN_VERIFY_TTL if result else settings.TOKEN_VERIFY_NEGATIVE_TTL
+    cache_service.set(prefix, result, ttl=ttl, **fields)
+    return result
+
+
+def verify_github_token(token: str, owner: str, repo: str) -> bool:
+    headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github.v3+json"}
+    return _cached_check(
+        "token_verify:github",
+        partial(_check_access, github_session(), f"{GITHUB_API_URL}/repos/{owner}/{repo}", headers, f"{owner}/{repo}"),
+        token=token_fingerprint(token or ""),
+        owner=owner,
+        repo=repo,
+    )
 
 
 def verify_gitlab_token(token: str, project_id: int) -> bool:
-    try:
-        headers = {
-            "Authorization": f"Bearer {token}",
-        }
-        response = requests.get(f"https://gitlab.com/api/v4/projects/{project_id}", headers=headers, timeout=5)
-        return response.status_code == 200
-    except Exception as e:
-        security_logger.error(f"GitLab token verification failed for project {project_id}: {e}")
-        return False
+    headers = {"Authorization": f"Bearer {token}"}
+    return _cached_check(
+        "token_verify:gitlab",
+        partial(
+            _check_access,
+            gitlab_session(),
+            f"{GITLAB_API_URL}/projects/{str(project_id).replace('/', '%2F')}",
+            headers,
+            f"project {project_id}",
+        ),
+        token=token_fingerprint(token or ""),
+        gitlab_project_id=project_id,
+    )
+
+
+def _verify_many(verify: Callable[..., bool], targets: List[tuple]) -> List[bool]:
+    # Each distinct target is checked once, concurrently; results come back in the order of targets
+    unique = list(dict.fromkeys(targets))
+    results = dict(zip(unique, _verify_pool.map(lambda target: verify(*target), unique)))
+    return [results[target] for target in targets]
+
+
+def verify_github_tokens(token: str, repositories: List[Tuple[str, str]]) -> List[bool]:
+    """verify_github_token for many (owner, repo) pairs at once"""
+    return _verify_many(partial(verify_github_token, token), repositories)
+
+
+def verify_gitlab_tokens(token: str, project_ids: List[int]) -> List[bool]:
+    """verify_gitlab_token for many project ids at once"""
+    return _verify_many(partial(verify_gitlab_token, token), [(project_id,) for project_id in project_ids])
+
+
+def _verify_updated_credentials(db: Session, project: Project, project_data: dict, user_id: int):
+    """A changed token or installation must have access to the project's repository before it is stored"""
+    if project.platform == PlatformType.GITHUB:
+        installation_id = project_data.get("github_installation_id")
+        token = project_data.get("github_token")
+        if installation_id and installation_id != project.github_installation_id:
+            github_app_service.require_installation_access(db, user_id, installation_id)
+            token = github_app_service.installation_token(installation_id)
+        elif not token or token == project.github_token:
+            return
+        if not verify_github_token(token, project.github_repo_owner, project.github_repo_name):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid GitHub token")
+        return
+
+    token = project_data.get("gitlab_token")
+    if token and token != project.gitlab_token and not verify_gitlab_token(token, project.gitlab_project_id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid GitLab token")
 
 
 def create_github_project(db: Session, project_data: ProjectCreateGitHub, user_id: int) -> Project:
-    if not verify_github_token(
-        project_data.github_token, project_data.github_repo_owner, project_data.github_repo_name
-    ):
+    if project_data.github_installation_id:
+        github_app_service.require_installation_access(db, user_id, project_data.github_installation_id)
+        token = github_app_service.installation_token(project_data.github_installation_id)
+    else:
+        token = project_data.github_token
+    if not verify_github_token(token, project_data.github_repo_owner, project_data.github_repo_name):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid GitHub token")
 
     project = Project(
@@ -49,6 +134,7 @@ def create_github_project(db: Session, project_data: ProjectCreateGitHub, user_i
         github_token=project_data.github_token,
         github_repo_owner=project_data.github_repo_owner,
         github_repo_name=project_data.github_repo_name,
+        github_installation_id=project_data.github_installation_id,
         user_id=user_id,
         is_active=True,
     )
@@ -104,6 +190,143 @@ def create_gitlab_project(db: Session, project_data: ProjectCreateGitLab, user_i
     return project
 
 
+def _bulk_result(repository: str, result: str, project_id: Optional[int] = None, error: Optional[str] = None):
+    return {"repository": repository, "status": result, "project_id": project_id, "error": error}
+
+
+def _github_bulk_candidates(data: ProjectBulkCreate, token: str) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[dict]]:
+    """(repository label, Project fields) of every repository to import, and the ones the token cannot access"""
+    if data.organization:
+        repositories = github_service.fetch_organization_repositories(token, data.organization)
+        return [
+            (
+                f"{repo['owner']}/{repo['name']}",
+                {
+                    "name": repo["name"],
+                    "description": repo["description"],
+                    "repository_url": repo["html_url"],
+                    "github_repo_owner": repo["owner"],
+                    "github_repo_name": repo["name"],
+                },
+            )
+            for repo in repositories
+            if data.include_archived or not repo["archived"]
+        ], []
+
+    repositories = [tuple(entry.split("/", 1)) for entry in data.repositories]
+    candidates, failures = [], []
+    for (owner, repo), has_access in zip(repositories, verify_github_tokens(token, repositories)):
+        if not has_access:
+            failures.append(_bulk_result(f"{owner}/{repo}", "failed", error="Repository not found or not accessible"))
+            continue
+        fields = {
+            "name": repo,
+            "repository_url": f"https://github.com/{owner}/{repo}",
+            "github_repo_owner": owner,
+            "github_repo_name": repo,
+        }
+        candidates.append((f"{owner}/{repo}", fields))
+    return candidates, failures
+
+
+def _gitlab_bulk_candidates(data: ProjectBulkCreate) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[dict]]:
+    if data.organization:
+        projects = gitlab_service.fetch_group_projects(data.gitlab_token, data.organization)
+        return [
+            (
+                project["path_with_namespace"],
+                {
+                    "name": project["name"],
+                    "description": project["description"],
+                    "repository_url": project["web_url"],
+                    "gitlab_project_id": str(project["id"]),
+                },
+            )
+            for project in projects
+            if data.include_archived or not project["archived"]
+        ], []
+
+    candidates, failures = [], []
+    for path, has_access in zip(data.repositories, verify_gitlab_tokens(data.gitlab_token, data.repositories)):
+        if not has_access:
+            failures.append(_bulk_result(path, "failed", error="Project not found or not accessible"))
+            continue
+        fields = {
+            "name": path.rsplit("/", 1)[-1],
+            "repository_url": f"https://gitlab.com/{path}",
+            # Registered by path, which the API and webhooks accept like the numeric id
+            "gitlab_project_id": path,
+        }
+        candidates.append((path, fields))
+    return candidates, failures
+
+
+def bulk_create_projects(db: Session, data: ProjectBulkCreate, user_id: int) -> Dict[str, Any]:
+    """Import many repositories (or a whole GitHub organization / GitLab group) as projects owned by the user.
+
+    Listed repositories are verified concurrently; all projects and their owner memberships are inserted in one
+    transaction. Repositories the user already imported are skipped.
+    """
+    if data.platform == PlatformType.GITHUB:
+        if data.github_installation_id:
+            github_app_service.require_installation_access(db, user_id, data.github_installation_id)
+            token = github_app_service.installation_token(data.github_installation_id)
+        else:
+            token = data.github_token
+        candidates, results = _github_bulk_candidates(data, token)
+        credentials = {"github_token": data.github_token, "github_installation_id": data.github_installation_id}
+    else:
+        candidates, results = _gitlab_bulk_candidates(data)
+        credentials = {"gitlab_token": data.gitlab_token}
+
+    # Explicit lists are capped by the schema; an organization's size is only known once it is listed
+    if len(candidates) > settings.BULK_IMPORT_MAX_PROJECTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_IMPORT_MAX_PROJECTS} repositories can be imported at once",
+        )
+
+    existing = {
+        url.rstrip("/").lower()
+        for (url,) in db.query(Project.repository_url).filter(
+            Project.user_id == user_id, Project.platform == data.platform
+        )
+    }
+
+    projects = []
+    for repository, fields in candidates:
+        url = fields["repository_url"].rstrip("/").lower()
+        if url in existing:
+            results.append(_bulk_result(repository, "skipped", error="Already imported"))
+            continue
+        existing.add(url)
+        fields["name"] = fields["name"][:100]
+        projects.append(
+            (repository, Project(**fields, **credentials, platform=data.platform, user_id=user_id, is_active=True))
+        )
+
+    if projects:
+        db.add_all([project for _, project in projects])
+        # Assigns the project ids the owner memberships need, still inside the same transaction
+        db.flush()
+        db.add_all(
+            [
+                ProjectMember(project_id=project.id, user_id=user_id, role=ProjectMemberRole.OWNER)
+                for _, project in projects
+            ]
+        )
+        db.commit()
+        redis_cache.clear_pattern(f"user_projects:{user_id}:*")
+
+    results.extend(_bulk_result(repository, "created", project_id=project.id) for repository, project in projects)
+    counts = {outcome: sum(1 for result in results if result["status"] == outcome) for outcome in BULK_STATUSES}
+    security_logger.info(
+        f"Bulk import for user ID {user_id}: {counts['created']} created, {counts['skipped']} skipped, "
+        f"{counts['failed']} failed"
+    )
+    return {**counts, "results": results}
+
+
 def get_user_projects(
     db: Session,
     user_id: int,
@@ -150,67 +373,6 @@ def get_user_projects(
     return result
 
 
-def get_project_stats(project: Project) -> dict:
-
-    stats = {
-        "branches_count": 0,
-        "open_prs_count": 0,
-        "closed_prs_count": 0,
-        "total_prs_count": 0,
-        "last_activity": project.updated_at,
-    }
-
-    try:
-        if project.platform == PlatformType.GITHUB:
-            branches = github_service.fetch_branches(
-                token=project.github_token, owner=project.github_repo_owner, repo=project.github_repo_name
-            )
-            stats["branches_count"] = len(branches)
-
-            open_prs = github_service.fetch_pull_requests(
-                token=project.github_token,
-                owner=project.github_repo_owner,
-                repo=project.github_repo_name,
-                state="open",
-                page=1,
-                per_page=100,
-            )
-            stats["open_prs_count"] = len(open_prs["pull_requests"])
-
-            closed_prs = github_service.fetch_pull_requests(
-                token=project.github_token,
-                owner=project.github_repo_owner,
-                repo=project.github_repo_name,
-                state="closed",
-                page=1,
-                per_page=100,
-            )
-            stats["closed_prs_count"] = len(closed_prs["pull_requests"])
-
-            stats["total_prs_count"] = stats["open_prs_count"] + stats["closed_prs_count"]
-
-        elif project.platform == PlatformType.GITLAB:
-            branches = gitlab_service.fetch_branches(token=project.gitlab_token, project_id=project.gitlab_project_id)
-            stats["branches_count"] = len(branches)
-
-            open_mrs = gitlab_service.fetch_merge_requests(
-                token=project.gitlab_token, project_id=project.gitlab_project_id, state="opened", page=1, per_page=100
-            )
-            stats["open_prs_count"] = len(open_mrs["merge_requests"])
-
-            closed_mrs = gitlab_service.fetch_merge_requests(
-                token=project.gitlab_token, project_id=project.gitlab_project_id, state="closed", page=1, per_page=100
-            )
-            stats["closed_prs_count"] = len(closed_mrs["merge_requests"])
-
-            stats["total_prs_count"] = stats["open_prs_count"] + stats["closed_prs_count"]
-
-    except Exception as e:
-        security_logger.error(f"Failed to fetch stats for project {project.id}: {str(e)}")
-
-    return stats
-
-
 def get_project_by_id(db: Session, project_id: int, user_id: Optional[int] = None) -> Optional[Project]:
     query = db.query(Project).filter(Project.id == project_id)
 
@@ -239,6 +401,8 @@ def update_project(db: Session, project_id: int, project_data: dict, user_id: in
     if not project:
         return None
 
+    _verify_updated_credentials(db, project, project_data, user_id)
+
     for key, value in project_data.items():
         if value is not None and hasattr(project, key):
             setattr(project, key, value)
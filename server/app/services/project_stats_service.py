@@ -0,0 +1,218 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal, upsert
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.models.project import PlatformType, Project
+from app.models.project_member import ProjectMember
+from app.models.project_statistics import ProjectStatistics
+from app.services import github_app_service, github_service, gitlab_service, rate_limit_governor
+from app.services.http_client import token_fingerprint
+
+# Projects with a refresh already queued in this worker
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+TIMED_OUT = "Timed out"
+
+COUNT_COLUMNS = ["branches_count", "open_prs_count", "closed_prs_count"]
+
+
+def compute_counts(project: Project) -> Dict[str, int]:
+    """Branch / PR totals from the platforms' count-only endpoints"""
+    if project.platform == PlatformType.GITHUB:
+        return github_service.fetch_repository_counts(
+            token=github_app_service.project_token(project),
+            owner=project.github_repo_owner,
+            repo=project.github_repo_name,
+        )
+    return gitlab_service.fetch_project_counts(token=project.gitlab_token, project_id=project.gitlab_project_id)
+
+
+def _save(
+    db: Session, project_id: int, counts: Optional[Dict[str, int]] = None, error: Optional[str] = None
+) -> ProjectStatistics:
+    """Store fresh counts, or record the error and keep the previous counts"""
+    row = {
+        "project_id": project_id,
+        "branches_count": 0,
+        "open_prs_count": 0,
+        "closed_prs_count": 0,
+        "last_error": error[:500] if error else None,
+        # Failures also wait a full PROJECT_STATS_TTL, so a broken token is not retried on every view
+        "refreshed_at": datetime.now(timezone.utc),
+    }
+    update_columns = ["last_error", "refreshed_at"]
+    if counts is not None:
+        row.update({column: counts[column] for column in COUNT_COLUMNS})
+        update_columns += COUNT_COLUMNS
+
+    # Two first views of a project may both get here; an upsert lets the later one win instead of failing
+    upsert(db, ProjectStatistics, [row], ["project_id"], update_columns)
+    db.commit()
+    return db.query(ProjectStatistics).filter(ProjectStatistics.project_id == project_id).populate_existing().one()
+
+
+def refresh_project_stats(db: Session, project: Project) -> ProjectStatistics:
+    """Recompute and store a project's counters; on failure the previous counts are kept"""
+    try:
+        return _save(db, project.id, counts=compute_counts(project))
+    except Exception as e:
+        security_logger.error(f"Failed to fetch stats for project {project.id}: {str(e)}")
+        return _save(db, project.id, error=str(e))
+
+
+def refresh_in_background(project_id: int):
+    db = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project:
+            with rate_limit_governor.background():
+                refresh_project_stats(db, project)
+    except Exception as e:
+        security_logger.error(f"Background stats refresh failed for project {project_id}: {str(e)}")
+    finally:
+        db.close()
+        with _refreshing_lock:
+            _refreshing.discard(project_id)
+
+
+def _schedule_refresh(background_tasks: BackgroundTasks, project_id: int):
+    with _refreshing_lock:
+        if project_id in _refreshing:
+            return
+        _refreshing.add(project_id)
+    background_tasks.add_task(refresh_in_background, project_id)
+
+
+def _is_stale(row: ProjectStatistics) -> bool:
+    refreshed_at = row.refreshed_at
+    if refreshed_at.tzinfo is None:
+        refreshed_at = refreshed_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - refreshed_at > timedelta(seconds=settings.PROJECT_STATS_TTL)
+
+
+def get_project_stats(db: Session, project: Project, background_tasks: Optional[BackgroundTasks] = None) -> dict:
+    """Stored counters for a project; stale rows are served as-is and refreshed after the response.
+
+    Only a project without any row yet is computed inline.
+    """
+    row = db.query(ProjectStatistics).filter(ProjectStatistics.project_id == project.id).first()
+    if row is None:
+        row = refresh_project_stats(db, project)
+    elif background_tasks is not None and _is_stale(row):
+        _schedule_refresh(background_tasks, project.id)
+
+    return _stats_dict(row, project)
+
+
+def _stats_dict(row: ProjectStatistics, project: Project) -> dict:
+    return {
+        "branches_count": row.branches_count,
+        "open_prs_count": row.open_prs_count,
+        "closed_prs_count": row.closed_prs_count,
+        "total_prs_count": row.open_prs_count + row.closed_prs_count,
+        "last_activity": project.updated_at,
+    }
+
+
+def _token_key(project: Project) -> Tuple[str, str]:
+    if project.platform == PlatformType.GITHUB and project.github_installation_id:
+        # Installation tokens rotate, but the installation's rate limit is shared by all of them
+        return "github-app", str(project.github_installation_id)
+    token = project.github_token if project.platform == PlatformType.GITHUB else project.gitlab_token
+    return project.platform.value, token_fingerprint(token or "")
+
+
+def _compute_concurrently(projects: List[Project]) -> Tuple[Dict[int, Dict[str, int]], Dict[int, str]]:
+    """Counts for many projects at once: at most STATS_BATCH_PER_TOKEN_CONCURRENCY in flight per token,
+    STATS_BATCH_TIMEOUT seconds overall. Returns (counts, errors) keyed by project id."""
+    counts, errors = {}, {}
+    if not projects:
+        return counts, errors
+
+    semaphores = {
+        key: threading.Semaphore(settings.STATS_BATCH_PER_TOKEN_CONCURRENCY)
+        for key in {_token_key(project) for project in projects}
+    }
+    timed_out = threading.Event()
+
+    def compute(project: Project) -> Dict[str, int]:
+        with semaphores[_token_key(project)]:
+            # Projects still waiting for their token's turn when the batch times out spend no API budget
+            if timed_out.is_set():
+                raise TimeoutError(TIMED_OUT)
+            return compute_counts(project)
+
+    # Threads beyond what the token semaphores let through would only sit waiting
+    workers = min(
+        len(projects), len(semaphores) * settings.STATS_BATCH_PER_TOKEN_CONCURRENCY, settings.STATS_BATCH_MAX_WORKERS
+    )
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="project-stats")
+    futures = {pool.submit(compute, project): project.id for project in projects}
+    done, pending = wait(futures, timeout=settings.STATS_BATCH_TIMEOUT)
+    timed_out.set()
+    # Don't wait for calls already in flight; they finish on their own and their results are dropped
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    for future in pending:
+        errors[futures[future]] = TIMED_OUT
+    for future in done:
+        try:
+            counts[futures[future]] = future.result()
+        except Exception as e:
+            errors[futures[future]] = str(e) or type(e).__name__
+    return counts, errors
+
+
+def get_stats_for_user(
+    db: Session, user_id: int, background_tasks: BackgroundTasks, refresh: bool = False
+) -> List[dict]:
+    """Stats for every project the user belongs to; one project's failure never fails the batch"""
+    member_ids = [row[0] for row in db.query(ProjectMember.project_id).filter(ProjectMember.user_id == user_id)]
+    projects = db.query(Project).filter(Project.id.in_(member_ids)).order_by(Project.updated_at.desc()).all()
+    rows = {
+        row.project_id: row
+        for row in db.query(ProjectStatistics).filter(ProjectStatistics.project_id.in_(member_ids)).all()
+    }
+
+    to_compute = [project for project in projects if refresh or project.id not in rows]
+    for project in projects:
+        if project.id in rows and not refresh and _is_stale(rows[project.id]):
+            _schedule_refresh(background_tasks, project.id)
+
+    counts, errors = _compute_concurrently(to_compute)
+
+    results = []
+    for project in projects:
+        error = errors.get(project.id)
+        if project.id in counts:
+            rows[project.id] = _save(db, project.id, counts=counts[project.id])
+        elif error and error != TIMED_OUT:
+            security_logger.error(f"Failed to fetch stats for project {project.id}: {error}")
+            rows[project.id] = _save(db, project.id, error=error)
+
+        row = rows.get(project.id)
+        results.append(
+            {
+                "project_id": project.id,
+                "name": project.name,
+                "stats": _stats_dict(row, project) if row else None,
+                "error": error,
+            }
+        )
+    return results
+
+
+def mark_stale(db: Session, project_id: int):
+    """Make the next read refresh the counters (e.g. after a PR was opened or closed)"""
+    db.query(ProjectStatistics).filter(ProjectStatistics.project_id == project_id).update(
+        {ProjectStatistics.refreshed_at: datetime(1970, 1, 1, tzinfo=timezone.utc)}, synchronize_session=False
+    )
+    db.commit()
@@ -0,0 +1,256 @@
+import base64
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import BackgroundTasks, HTTPException, status
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal, upsert
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.models.project import PlatformType, Project
+from app.models.pull_request import PullRequestRecord, PullRequestSyncState
+from app.services import github_app_service, github_service, gitlab_service, rate_limit_governor
+
+# Projects with a sync already queued in this worker
+_syncing = set()
+_syncing_lock = threading.Lock()
+
+# Pages a list view syncs before answering; the rest of the walk runs after the response
+INLINE_SYNC_PAGES = 1
+
+SORT_COLUMNS = {"updated": PullRequestRecord.updated_at, "created": PullRequestRecord.created_at}
+UPSERT_BATCH_SIZE = 100
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _fetch_updated(
+    project: Project, since: Optional[datetime], resume: Optional[str], max_pages: Optional[int]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    if project.platform == PlatformType.GITHUB:
+        return github_service.fetch_pull_requests_updated_since(
+            token=github_app_service.project_token(project),
+            owner=project.github_repo_owner,
+            repo=project.github_repo_name,
+            since=since,
+            resume=resume,
+            max_pages=max_pages,
+        )
+    return gitlab_service.fetch_merge_requests_updated_since(
+        token=project.gitlab_token,
+        project_id=project.gitlab_project_id,
+        since=since,
+        resume=resume,
+        max_pages=max_pages,
+    )
+
+
+def _row(project_id: int, summary: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "project_id": project_id,
+        "number": summary["number"],
+        "title": summary["title"],
+        "state": summary["state"],
+        "author": summary["author"],
+        "source_branch": summary["source_branch"],
+        "target_branch": summary["target_branch"],
+        "created_at": _parse_timestamp(summary["created_at"]),
+        "updated_at": _parse_timestamp(summary["updated_at"]),
+        "summary": summary,
+    }
+
+
+def _upsert(db: Session, project_id: int, summaries: List[Dict[str, Any]]):
+    # A PR seen twice in one walk must appear once per statement for ON CONFLICT
+    rows = list({summary["number"]: _row(project_id, summary) for summary in summaries}.values())
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        upsert(db, PullRequestRecord, rows[start : start + UPSERT_BATCH_SIZE], ["project_id", "number"])
+
+
+class PullRequestSyncFailed(Exception):
+    """The sync a list view needed before answering failed; the caller can list from the platform API instead"""
+
+
+def _get_state(db: Session, project_id: int) -> Optional[PullRequestSyncState]:
+    return db.query(PullRequestSyncState).filter(PullRequestSyncState.project_id == project_id).first()
+
+
+def _walk_position(state: Optional[PullRequestSyncState]) -> Tuple[Optional[datetime], Optional[str], Optional[str]]:
+    """(since, resume token, newest updated_at seen) of the walk this sync runs.
+
+    An unfinished walk is continued first; otherwise a new one covers everything updated after the watermark.
+    """
+    if state is not None and state.backfill:
+        since = state.backfill.get("since")
+        return (_parse_timestamp(since) if since else None), state.backfill["resume"], state.backfill.get("top")
+    if state is not None and state.watermark:
+        return _as_utc(state.watermark), None, None
+    return None, None, None
+
+
+def sync_pull_requests(db: Session, project: Project, max_pages: Optional[int] = None) -> int:
+    """Fetch the PRs updated since the last complete walk and upsert them; returns how many were fetched.
+
+    The first sync of a project walks its whole PR history. Each sync covers up to `max_pages` (default
+    PULL_REQUEST_SYNC_MAX_PAGES) pages; a longer walk is continued by the following syncs, and the watermark
+    only moves once it is complete.
+    """
+    started_at = datetime.now(timezone.utc)
+    state = _get_state(db, project.id)
+    since, resume, top = _walk_position(state)
+
+    try:
+        # PRs updated in the same second as the watermark are fetched again, so none is missed
+        summaries, next_resume = _fetch_updated(project, since, resume, max_pages)
+    except Exception as e:
+        db.rollback()
+        security_logger.error(f"PR sync failed for project {project.id}: {str(e)}")
+        # A failed resync waits a full PULL_REQUEST_SYNC_INTERVAL; a failed first sync is retried on the next view
+        if state is not None:
+            db.query(PullRequestSyncState).filter(PullRequestSyncState.project_id == project.id).update(
+                {PullRequestSyncState.synced_at: started_at, PullRequestSyncState.last_error: str(e)[:500]},
+                synchronize_session=False,
+            )
+            db.commit()
+        raise
+
+    _upsert(db, project.id, summaries)
+
+    # Everything updated after the newest PR of the walk's first page is left to the next walk
+    if top is None and summaries:
+        top = max((summary["updated_at"] for summary in summaries), key=_parse_timestamp)
+    sync_state = {"project_id": project.id, "synced_at": started_at, "last_error": None}
+    if next_resume:
+        sync_state["backfill"] = {"since": since.isoformat() if since else None, "resume": next_resume, "top": top}
+        sync_state["watermark"] = state.watermark if state is not None else None
+    else:
+        sync_state["backfill"] = None
+        sync_state["watermark"] = _parse_timestamp(top) if top else since
+    upsert(db, PullRequestSyncState, [sync_state], ["project_id"])
+    db.commit()
+
+    if next_resume:
+        security_logger.info(f"Synced {len(summaries)} PR(s) for project {project.id}; walk continues at {next_resume}")
+    else:
+        security_logger.info(f"Synced {len(summaries)} PR(s) for project {project.id}")
+    return len(summaries)
+
+
+def sync_in_background(project_id: int):
+    db = SessionLocal()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project:
+            with rate_limit_governor.background():
+                sync_pull_requests(db, project)
+    except Exception as e:
+        security_logger.error(f"Background PR sync failed for project {project_id}: {str(e)}")
+    finally:
+        db.close()
+        with _syncing_lock:
+            _syncing.discard(project_id)
+
+
+def _schedule_sync(background_tasks: BackgroundTasks, project_id: int):
+    with _syncing_lock:
+        if project_id in _syncing:
+            return
+        _syncing.add(project_id)
+    background_tasks.add_task(sync_in_background, project_id)
+
+
+def _is_stale(state: PullRequestSyncState) -> bool:
+    return datetime.now(timezone.utc) - _as_utc(state.synced_at) > timedelta(
+        seconds=settings.PULL_REQUEST_SYNC_INTERVAL
+    )
+
+
+def mark_stale(db: Session, project_id: int):
+    """Make the next list view sync (called when a webhook reports a PR change)"""
+    db.query(PullRequestSyncState).filter(PullRequestSyncState.project_id == project_id).update(
+        {PullRequestSyncState.synced_at: datetime(1970, 1, 1, tzinfo=timezone.utc)}, synchronize_session=False
+    )
+    db.commit()
+
+
+def encode_cursor(record: PullRequestRecord, sort: str) -> str:
+    value = getattr(record, f"{sort}_at")
+    payload = json.dumps([_as_utc(value).isoformat(), record.number])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        value, number = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(value), int(number)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def list_pull_requests(
+    db: Session,
+    project: Project,
+    background_tasks: BackgroundTasks,
+    states: Optional[List[str]] = None,
+    author: Optional[str] = None,
+    branch: Optional[str] = None,
+    search: Optional[str] = None,
+    sort: str = "updated",
+    cursor: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20,
+    refresh: bool = False,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of the project's PRs from the local table, newest first, and the cursor of the next page.
+
+    Only a project that was never synced (or `refresh`) syncs before answering, and only its first
+    INLINE_SYNC_PAGES pages; the rest of that walk, a sync older than PULL_REQUEST_SYNC_INTERVAL, or any other
+    unfinished walk runs after the response. Raises PullRequestSyncFailed when the inline sync fails.
+    """
+    sync_state = _get_state(db, project.id)
+    if sync_state is None or refresh:
+        try:
+            sync_pull_requests(db, project, max_pages=INLINE_SYNC_PAGES)
+        except Exception as e:
+            raise PullRequestSyncFailed(str(e)) from e
+        sync_state = _get_state(db, project.id)
+    elif _is_stale(sync_state):
+        _schedule_sync(background_tasks, project.id)
+    if sync_state.backfill:
+        _schedule_sync(background_tasks, project.id)
+
+    sort_column = SORT_COLUMNS[sort]
+    query = db.query(PullRequestRecord).filter(PullRequestRecord.project_id == project.id)
+    if states:
+        query = query.filter(PullRequestRecord.state.in_(states))
+    if author:
+        query = query.filter(PullRequestRecord.author == author)
+    if branch:
+        query = query.filter(or_(PullRequestRecord.source_branch == branch, PullRequestRecord.target_branch == branch))
+    if search:
+        # Matches the GIN index on to_tsvector('simple', title)
+        query = query.filter(
+            func.to_tsvector("simple", PullRequestRecord.title).op("@@")(func.plainto_tsquery("simple", search))
+        )
+
+    if cursor:
+        # Keyset pagination: the row-value comparison walks the (project_id, sort_at, number) index
+        value, number = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, PullRequestRecord.number) < tuple_(value, number))
+    elif page > 1:
+        query = query.offset((page - 1) * per_page)
+
+    # One extra row tells whether there is a next page
+    records = query.order_by(sort_column.desc(), PullRequestRecord.number.desc()).limit(per_page + 1).all()
+    next_cursor = encode_cursor(records[per_page - 1], sort) if len(records) > per_page else None
+    return [record.summary for record in records[:per_page]], next_cursor
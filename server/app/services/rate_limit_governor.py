@@ -0,0 +1,183 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Mapping, Optional
+
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.services.http_client import token_fingerprint
+from app.services.redis_cache import redis_cache
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority: ContextVar[str] = ContextVar("platform_request_priority", default=INTERACTIVE)
+
+# Fallback when Redis is unavailable; also saves a round-trip for budgets this worker saw last
+_local_budgets: Dict[str, Dict] = {}
+
+# Error bodies GitHub sends with secondary (abuse/concurrency) limits that carry no Retry-After
+SECONDARY_LIMIT_MARKERS = ("secondary rate limit", "abuse")
+
+RATE_LIMIT_HEADERS = {
+    "github": ("X-RateLimit-Remaining", "X-RateLimit-Limit", "X-RateLimit-Reset"),
+    "gitlab": ("RateLimit-Remaining", "RateLimit-Limit", "RateLimit-Reset"),
+}
+
+
+class RateLimitBudgetExhausted(Exception):
+    """Raised to background work when the token's budget is down to the interactive reserve"""
+
+    def __init__(self, platform: str, reset_at: float):
+        self.platform = platform
+        self.reset_at = reset_at
+        super().__init__(f"{platform} API budget reserved for interactive requests until {int(reset_at)}")
+
+
+@contextmanager
+def background():
+    """Mark platform API calls made inside this block (and tasks spawned from it) as deferrable"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def _budget_key(platform: str, resource: str, token: str) -> str:
+    return f"ratelimit:{platform}:{resource}:{token_fingerprint(token)}"
+
+
+def _blocked_key(platform: str, token: str) -> str:
+    return f"ratelimit:{platform}:blocked:{token_fingerprint(token)}"
+
+
+def _record_block(platform: str, token: str, retry_after: Optional[str]) -> None:
+    """Secondary rate limits only say how long to back off; they apply to the token across resources"""
+    wait = int(retry_after) if retry_after and retry_after.isdigit() else settings.RATE_LIMIT_SECONDARY_BACKOFF
+    blocked_until = max(time.time() + wait, _blocked_until(platform, token))
+    key = _blocked_key(platform, token)
+    _local_budgets[key] = {"blocked_until": blocked_until}
+    redis_cache.set(key, _local_budgets[key], ttl=wait + 5)
+    security_logger.warning(f"Rate-limit governor: {platform} secondary rate limit, backing off for {wait}s")
+
+
+def _blocked_until(platform: str, token: str) -> float:
+    key = _blocked_key(platform, token)
+    block = redis_cache.get(key) or _local_budgets.get(key)
+    if not block or block["blocked_until"] <= time.time():
+        _local_budgets.pop(key, None)
+        return 0.0
+    return block["blocked_until"]
+
+
+def _is_secondary_limit(headers: Mapping[str, str], remaining: Optional[str], body: Optional[str]) -> bool:
+    """A 403/429 is only a secondary limit when it says so; plain permission errors must not block the token"""
+    if remaining == "0":
+        return False
+    if headers.get("Retry-After"):
+        return True
+    text = (body or "").lower()
+    return any(marker in text for marker in SECONDARY_LIMIT_MARKERS)
+
+
+def record(
+    platform: str,
+    token: str,
+    headers: Mapping[str, str],
+    resource: str = "core",
+    status_code: Optional[int] = None,
+    body: Optional[str] = None,
+) -> None:
+    """Store the budget a response reported, shared across workers until the window resets.
+
+    `body` is only needed for 403/429 responses, to tell a secondary limit from a permission error.
+    """
+    remaining_header, limit_header, reset_header = RATE_LIMIT_HEADERS[platform]
+    remaining = headers.get(remaining_header)
+    reset = headers.get(reset_header)
+    if status_code in (403, 429) and _is_secondary_limit(headers, remaining, body):
+        _record_block(platform, token, headers.get("Retry-After"))
+    if remaining is None or reset is None:
+        return
+
+    budget = {
+        "remaining": int(remaining),
+        "limit": int(headers.get(limit_header) or 0),
+        "reset": float(reset),
+    }
+    key = _budget_key(platform, resource, token)
+    _local_budgets[key] = budget
+    redis_cache.set(key, budget, ttl=max(int(budget["reset"] - time.time()) + 5, 5))
+
+
+def _load(platform: str, resource: str, token: str) -> Optional[Dict]:
+    key = _budget_key(platform, resource, token)
+    budget = redis_cache.get(key) or _local_budgets.get(key)
+    if budget and budget["reset"] <= time.time():
+        _local_budgets.pop(key, None)
+        return None
+    return budget
+
+
+def _background_delay(platform: str, budget: Optional[Dict]) -> float:
+    """Seconds a background call should wait; raises once only the interactive reserve is left"""
+    if not budget or not budget["limit"]:
+        return 0.0
+
+    reserve = budget["limit"] * settings.RATE_LIMIT_RESERVE_FRACTION
+    spendable = budget["remaining"] - reserve
+    if spendable <= 0:
+        raise RateLimitBudgetExhausted(platform, budget["reset"])
+
+    if budget["remaining"] > budget["limit"] * settings.RATE_LIMIT_SLOWDOWN_FRACTION:
+        return 0.0
+
+    # Below the slowdown mark, spread what is left above the reserve evenly over the rest of the window
+    delay = max(budget["reset"] - time.time(), 0) / spendable
+    if delay > settings.RATE_LIMIT_MAX_BACKGROUND_WAIT:
+        raise RateLimitBudgetExhausted(platform, budget["reset"])
+    return delay
+
+
+def _delay(platform: str, token: str, resource: str) -> float:
+    """A secondary-limit back-off takes precedence over the primary budget"""
+    blocked_until = _blocked_until(platform, token)
+    if blocked_until:
+        wait = blocked_until - time.time()
+        if wait > settings.RATE_LIMIT_MAX_BACKGROUND_WAIT:
+            raise RateLimitBudgetExhausted(platform, blocked_until)
+        return wait
+    return _background_delay(platform, _load(platform, resource, token))
+
+
+def ensure_budget(platform: str, token: str, resource: str = "core") -> None:
+    """Raise RateLimitBudgetExhausted now if background work on this token would be refused, without waiting.
+
+    Lets a job check its budget before it commits to side effects it could not finish.
+    """
+    _delay(platform, token, resource)
+
+
+def acquire(platform: str, token: str, resource: str = "core") -> None:
+    """Pace background calls before they are sent; interactive calls are never delayed"""
+    if _priority.get() != BACKGROUND:
+        return
+    delay = _delay(platform, token, resource)
+    if delay:
+        security_logger.info(f"Rate-limit governor: delaying background {platform} call by {delay:.2f}s")
+        time.sleep(delay)
+
+
+async def acquire_async(platform: str, token: str, resource: str = "core") -> None:
+    if _priority.get() != BACKGROUND:
+        return
+    delay = _delay(platform, token, resource)
+    if delay:
+        security_logger.info(f"Rate-limit governor: delaying background {platform} call by {delay:.2f}s")
+        await asyncio.sleep(delay)
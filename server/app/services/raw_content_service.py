@@ -0,0 +1,127 @@
+import mimetypes
+import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.config.settings import settings
+from app.models.project import PlatformType, Project
+from app.services import github_app_service, github_service, gitlab_service
+from app.services.blob_cache import blob_cache
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) for a single-range `Range` header; None serves the whole file"""
+    if not range_header:
+        return None
+    match = _RANGE_PATTERN.fullmatch(range_header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        # Multi-range and other units are not supported; the whole file is a valid answer
+        return None
+
+    if not match.group(1):
+        # Suffix range: the last N bytes
+        start, end = max(size - int(match.group(2)), 0), size - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _slice_chunks(chunks: Iterable[bytes], start: int, end: int) -> Iterator[bytes]:
+    """Bytes start..end of a full-body stream (for upstreams that ignore Range)"""
+    offset = 0
+    for chunk in chunks:
+        chunk_end = offset + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(start - offset, 0) : end + 1 - offset]
+        offset = chunk_end
+        if offset > end:
+            return
+
+
+def _relay(response, chunks: Iterable[bytes], sha: str, cache: bool) -> Iterator[bytes]:
+    """Pass chunks through, keeping a copy for the blob cache when the body is small enough"""
+    parts = [] if cache else None
+    try:
+        for chunk in chunks:
+            if parts is not None:
+                parts.append(chunk)
+            yield chunk
+        if parts is not None:
+            blob_cache.put(sha, b"".join(parts))
+    finally:
+        response.close()
+
+
+def _resolve(project: Project, path: str, branch: str) -> Dict:
+    if project.platform == PlatformType.GITHUB:
+        return github_service.resolve_file(
+            github_app_service.project_token(project), project.github_repo_owner, project.github_repo_name, path, branch
+        )
+    return gitlab_service.resolve_file(project.gitlab_token, project.gitlab_project_id, path, branch)
+
+
+def _open_upstream(project: Project, sha: str, byte_range: Optional[str]):
+    if project.platform == PlatformType.GITHUB:
+        return github_service.open_blob_stream(
+            github_app_service.project_token(project),
+            project.github_repo_owner,
+            project.github_repo_name,
+            sha,
+            byte_range,
+        )
+    return gitlab_service.open_blob_stream(project.gitlab_token, project.gitlab_project_id, sha, byte_range)
+
+
+def open_raw_file(
+    project: Project, path: str, branch: str, range_header: Optional[str] = None, if_none_match: Optional[str] = None
+) -> Tuple[int, Dict[str, str], Iterable[bytes]]:
+    """(status code, headers, body chunks) for the decoded bytes of a file, honouring a single byte range.
+
+    Served from the blob cache when possible, otherwise streamed from the platform's raw blob endpoint
+    (which, unlike the JSON contents API, has no 1 MB limit).
+    """
+    file_info = _resolve(project, path, branch)
+    sha, size = file_info["sha"], file_info["size"]
+
+    headers = {
+        "ETag": f'"{sha}"',
+        "Accept-Ranges": "bytes",
+        "Content-Type": mimetypes.guess_type(file_info["name"])[0] or "application/octet-stream",
+        "Content-Disposition": f"inline; filename=\"{file_info['name']}\"",
+    }
+    # Blob SHAs are content hashes, so the client's copy is current whenever the ETag matches
+    if if_none_match and f'"{sha}"' in if_none_match:
+        return status.HTTP_304_NOT_MODIFIED, headers, []
+
+    byte_range = parse_range(range_header, size)
+    start, end = byte_range or (0, size - 1)
+    status_code = status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    cached = blob_cache.get(sha)
+    if cached is not None:
+        body = cached[start : end + 1] if byte_range else cached
+        return status_code, headers, (body[i : i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+
+    response = _open_upstream(project, sha, f"bytes={start}-{end}" if byte_range else None)
+    chunks = response.iter_content(CHUNK_SIZE)
+    if byte_range and response.status_code != status.HTTP_206_PARTIAL_CONTENT:
+        chunks = _slice_chunks(chunks, start, end)
+
+    cache = not byte_range and size <= settings.RAW_STREAM_CACHE_MAX_BYTES
+    return status_code, headers, _relay(response, chunks, sha, cache)
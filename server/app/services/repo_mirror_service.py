@@ -0,0 +1,331 @@
+import base64
+import fcntl
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.models.project import PlatformType, Project
+from app.services import github_app_service
+
+
+class MirrorError(Exception):
+    pass
+
+
+_clone_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="repo-mirror-clone")
+
+# Projects with a clone already queued in this worker
+_cloning = set()
+_cloning_lock = threading.Lock()
+
+
+def _is_github(project: Project) -> bool:
+    return project.platform == PlatformType.GITHUB
+
+
+def mirror_path(project: Project) -> str:
+    return os.path.join(settings.REPO_MIRROR_DIR, f"{project.id}.git")
+
+
+def _clone_url(project: Project) -> str:
+    if _is_github(project):
+        return f"https://github.com/{project.github_repo_owner}/{project.github_repo_name}.git"
+    url = project.repository_url.rstrip("/")
+    return url if url.endswith(".git") else f"{url}.git"
+
+
+def _git_env(project: Project) -> Dict[str, str]:
+    """Pass the token as an HTTP header through env config, so it never lands in argv or the mirror's config"""
+    if _is_github(project):
+        credentials = f"x-access-token:{github_app_service.project_token(project)}"
+    else:
+        credentials = f"oauth2:{project.gitlab_token}"
+    header = "Authorization: Basic " + base64.b64encode(credentials.encode()).decode()
+    return {
+        **os.environ,
+        "GIT_TERMINAL_PROMPT": "0",
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": header,
+    }
+
+
+def _git(project: Project, *args: str, env: Optional[Dict[str, str]] = None) -> str:
+    result = subprocess.run(
+        ["git", *args],
+        cwd=mirror_path(project) if os.path.isdir(mirror_path(project)) else None,
+        env=env,
+        capture_output=True,
+        timeout=settings.REPO_MIRROR_GIT_TIMEOUT,
+    )
+    if result.returncode != 0:
+        raise MirrorError(result.stderr.decode(errors="replace").strip()[:500])
+    return result.stdout.decode(errors="replace")
+
+
+@contextmanager
+def _mirror_lock(path: str):
+    """Exclusive lock on the mirror, shared by every worker process on this host"""
+    os.makedirs(settings.REPO_MIRROR_DIR, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _last_fetch(project: Project) -> float:
+    try:
+        return os.path.getmtime(os.path.join(mirror_path(project), "FETCH_HEAD"))
+    except OSError:
+        return 0.0
+
+
+def mark_stale(project: Project) -> None:
+    """Force the next read to fetch first (called when a webhook reports new commits)"""
+    fetch_head = os.path.join(mirror_path(project), "FETCH_HEAD")
+    if os.path.exists(fetch_head):
+        os.utime(fetch_head, (0, 0))
+
+
+def _clone(project_id: int, path: str, url: str, env: Dict[str, str]) -> None:
+    """Clone into a temporary directory and rename it into place, so a mirror directory is always complete"""
+    tmp_path = f"{path}.tmp"
+    try:
+        with _mirror_lock(path):
+            if os.path.isdir(path):
+                return
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            security_logger.info(f"Cloning mirror of project {project_id} into {path}")
+            # --mirror also brings refs/pull/* (GitHub) and refs/merge-requests/* (GitLab)
+            result = subprocess.run(
+                ["git", "clone", "--mirror", "--quiet", url, tmp_path],
+                env=env,
+                capture_output=True,
+                timeout=settings.REPO_MIRROR_GIT_TIMEOUT,
+            )
+            if result.returncode != 0:
+                raise MirrorError(result.stderr.decode(errors="replace").strip()[:500])
+            # Clone does not write FETCH_HEAD, whose mtime records the last sync
+            open(os.path.join(tmp_path, "FETCH_HEAD"), "a").close()
+            os.replace(tmp_path, path)
+    except (MirrorError, OSError, subprocess.TimeoutExpired) as e:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        security_logger.warning(f"Mirror clone failed for project {project_id}: {e}")
+    finally:
+        with _cloning_lock:
+            _cloning.discard(project_id)
+
+
+def _schedule_clone(project: Project) -> None:
+    with _cloning_lock:
+        if project.id in _cloning:
+            return
+        _cloning.add(project.id)
+    # Everything the clone needs is read now; the request's session may be gone by the time it runs
+    _clone_pool.submit(_clone, project.id, mirror_path(project), _clone_url(project), _git_env(project))
+
+
+def _sync(project: Project, force: bool = False) -> None:
+    if not force and time.time() - _last_fetch(project) < settings.REPO_MIRROR_FETCH_INTERVAL:
+        return
+    with _mirror_lock(mirror_path(project)):
+        # Another worker may have fetched while this one waited for the lock
+        if force or time.time() - _last_fetch(project) >= settings.REPO_MIRROR_FETCH_INTERVAL:
+            _git(project, "fetch", "--quiet", "--prune", "origin", env=_git_env(project))
+
+
+def ensure_mirror(project: Project, force: bool = False) -> bool:
+    """Fetch the project's mirror if it is due; False means callers should use the API instead.
+
+    A project without a mirror yet gets one cloned in the background, and is served from the API meanwhile.
+    """
+    if not settings.REPO_MIRROR_ENABLED:
+        return False
+    if not os.path.isdir(mirror_path(project)):
+        _schedule_clone(project)
+        return False
+    try:
+        _sync(project, force=force)
+        return True
+    except (MirrorError, OSError, subprocess.TimeoutExpired) as e:
+        security_logger.warning(f"Repository mirror unavailable for project {project.id}: {e}")
+        return False
+
+
+def _resolve(project: Project, rev: str) -> Optional[str]:
+    if rev.startswith("-"):
+        return None
+    try:
+        return _git(project, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}").strip() or None
+    except MirrorError:
+        return None
+
+
+def _resolve_fetching(project: Project, rev: str) -> Optional[str]:
+    """Resolve a revision, fetching once if the mirror does not have it yet"""
+    sha = _resolve(project, rev)
+    if sha is None and ensure_mirror(project, force=True):
+        sha = _resolve(project, rev)
+    return sha
+
+
+def _pr_ref(project: Project, pr_number: int, kind: str) -> str:
+    if _is_github(project):
+        return f"refs/pull/{pr_number}/{kind}"
+    return f"refs/merge-requests/{pr_number}/{kind}"
+
+
+def _parse_diff(project: Project, diff_text: str) -> List[Dict[str, Any]]:
+    """Split `git diff` output into per-file entries shaped like the platform's own file listing"""
+    files = []
+    for chunk in f"\n{diff_text}".split("\ndiff --git ")[1:]:
+        if not chunk.strip():
+            continue
+        lines = chunk.split("\n")
+        old_path = new_path = None
+        status = "modified"
+        hunk_start = len(lines)
+        for index, line in enumerate(lines):
+            if line.startswith("@@"):
+                hunk_start = index
+                break
+            if line.startswith("new file mode"):
+                status = "added"
+            elif line.startswith("deleted file mode"):
+                status = "deleted"
+            elif line.startswith("rename from "):
+                status, old_path = "renamed", line[len("rename from ") :]
+            elif line.startswith("rename to "):
+                new_path = line[len("rename to ") :]
+            elif line.startswith("--- a/"):
+                old_path = old_path or line[len("--- a/") :]
+            elif line.startswith("+++ b/"):
+                new_path = line[len("+++ b/") :]
+
+        new_path = new_path or old_path
+        if new_path is None:
+            # Binary or mode-only change without ---/+++ headers: the chunk starts with "a/path b/path"
+            new_path = lines[0].split(" b/", 1)[-1]
+
+        patch_lines = lines[hunk_start:]
+        additions = sum(1 for line in patch_lines if line.startswith("+"))
+        deletions = sum(1 for line in patch_lines if line.startswith("-"))
+        patch = "\n".join(patch_lines).rstrip("\n")
+        previous = old_path if status == "renamed" else None
+
+        entry = {
+            "filename": new_path,
+            "status": status,
+            "additions": additions,
+            "deletions": deletions,
+            "changes": additions + deletions,
+        }
+        if _is_github(project):
+            entry.update({"patch": patch, "previous_filename": previous, "sha": None})
+        else:
+            entry.update({"diff": patch, "previous_path": previous})
+        files.append(entry)
+    return files
+
+
+def _diff_files(project: Project, base: str, head: str, paths: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    # Three-dot diff against the merge base, which is what both platforms show for a PR/MR
+    args = ["diff", "--no-color", "--no-ext-diff", "-M", f"{base}...{head}"]
+    if paths:
+        args += ["--", *paths]
+    return _parse_diff(project, _git(project, *args))
+
+
+def _changed_paths(project: Project, base: str, head: str, file_path: str) -> Optional[List[str]]:
+    """The paths of file_path's change in the PR (old and new name for a rename), from the name-only listing"""
+    listing = _git(project, "diff", "--no-color", "--name-status", "-M", "-z", f"{base}...{head}")
+    fields = listing.split("\0")
+    index = 0
+    while index < len(fields) and fields[index]:
+        status = fields[index]
+        count = 2 if status[0] in "RC" else 1
+        paths = fields[index + 1 : index + 1 + count]
+        if file_path in paths:
+            return paths
+        index += 1 + count
+    return None
+
+
+def fetch_pr_files(project: Project, pr_number: int, target_branch: str, head_sha: str) -> Optional[List[Dict]]:
+    """All changed files of a PR with untruncated patches, or None if the mirror cannot answer"""
+    if not ensure_mirror(project):
+        return None
+    try:
+        head = _resolve_fetching(project, head_sha)
+        base = _resolve(project, f"refs/heads/{target_branch}")
+        if not head or not base:
+            return None
+        return _diff_files(project, base, head)
+    except (MirrorError, subprocess.TimeoutExpired) as e:
+        security_logger.warning(f"Mirror diff failed for PR #{pr_number} in project {project.id}: {e}")
+        return None
+
+
+def fetch_file_diff(project: Project, pr_number: int, file_path: str) -> Optional[Dict[str, Any]]:
+    """One file's diff in a PR, using the PR's head and merge refs (None falls back to the API)"""
+    if not ensure_mirror(project):
+        return None
+    try:
+        head = _resolve(project, _pr_ref(project, pr_number, "head"))
+        # The platform's test-merge commit has the target branch as its first parent
+        base = _resolve(project, f"{_pr_ref(project, pr_number, 'merge')}^1")
+        if not head or not base:
+            return None
+        paths = _changed_paths(project, base, head, file_path)
+        if not paths:
+            return None
+        # Only this file's patch is generated; the rename's old path keeps -M able to pair the two
+        for file in _diff_files(project, base, head, paths):
+            if file_path in (file["filename"], file.get("previous_filename"), file.get("previous_path")):
+                file = {**file, "path": file.pop("filename")}
+                file.pop("sha", None)
+                return file
+        return None
+    except (MirrorError, subprocess.TimeoutExpired) as e:
+        security_logger.warning(f"Mirror file diff failed for PR #{pr_number} in project {project.id}: {e}")
+        return None
+
+
+def fetch_file_content(project: Project, file_path: str, ref: str) -> Optional[Dict[str, Any]]:
+    """File contents at any branch, tag or commit, shaped like the platform contents API"""
+    if not ensure_mirror(project) or ref.startswith("-"):
+        return None
+    try:
+        if not _resolve(project, ref):
+            return None
+        blob_sha = _git(project, "rev-parse", "--verify", "--quiet", f"{ref}:{file_path}").strip()
+        if not blob_sha:
+            return None
+        content = subprocess.run(
+            ["git", "cat-file", "blob", blob_sha],
+            cwd=mirror_path(project),
+            capture_output=True,
+            check=True,
+            timeout=settings.REPO_MIRROR_GIT_TIMEOUT,
+        ).stdout
+    except (MirrorError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return None
+
+    return {
+        "path": file_path,
+        "name": os.path.basename(file_path),
+        "size": len(content),
+        "sha": blob_sha,
+        "encoding": "base64",
+        "content": base64.b64encode(content).decode(),
+        "branch": ref,
+    }
@@ -0,0 +1,242 @@
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.logging_config import security_logger
+from app.models.ai_review import AIReview, ReviewIssue, ReviewStatus
+from app.models.project import PlatformType, Project
+from app.models.project_member import ProjectMemberRole
+from app.services import github_app_service, github_service, gitlab_service, repo_mirror_service, team_service
+from app.services.redis_cache import redis_cache
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+def commentable_lines(patch: str) -> Dict[int, Tuple[int, Optional[int]]]:
+    """New-side line number -> (hunk index, old-side line for unchanged context lines) for every added or
+    context line of a unified diff.
+
+    Inline comments can only be placed on these lines; a range must stay within one hunk.
+    """
+    lines, hunk, old_line, new_line = {}, -1, 0, 0
+    for line in (patch or "").split("\n"):
+        match = _HUNK_HEADER.match(line)
+        if match:
+            hunk += 1
+            old_line, new_line = int(match.group(1)), int(match.group(2))
+        elif hunk < 0 or line.startswith("\\"):
+            continue
+        elif line.startswith("-"):
+            old_line += 1
+        elif line.startswith("+"):
+            lines[new_line] = (hunk, None)
+            new_line += 1
+        else:
+            lines[new_line] = (hunk, old_line)
+            old_line += 1
+            new_line += 1
+    return lines
+
+
+def _issue_body(issue: ReviewIssue) -> str:
+    body = f"**{issue.severity.value.upper()}** · {issue.category} — {issue.title}\n\n{issue.description}"
+    if issue.suggestion:
+        body += f"\n\n**Suggestion:** {issue.suggestion}"
+    return body
+
+
+def _review_body(review: AIReview, unplaced: List[ReviewIssue], outdated: bool = False) -> str:
+    body = f"## AI Code Review — {review.overall_rating or 'Review'}\n\n{review.summary or ''}".rstrip()
+    if outdated:
+        body += (
+            f"\n\n_Reviewed at commit {review.head_sha[:7]}; the PR has changed since, so line references may be off._"
+        )
+    if unplaced:
+        body += "\n\n### Other findings\n"
+        for issue in unplaced:
+            location = f"{issue.file_path}:{issue.line_number}" if issue.line_number else issue.file_path
+            body += f"\n- **{issue.severity.value.upper()}** `{location}` — {issue.title}: {issue.description}"
+    return body
+
+
+def _pr_details(project: Project, pr_number: int) -> Dict[str, Any]:
+    if project.platform == PlatformType.GITHUB:
+        return github_service.fetch_pull_request_details(
+            token=github_app_service.project_token(project),
+            owner=project.github_repo_owner,
+            repo=project.github_repo_name,
+            pr_number=pr_number,
+        )
+    return gitlab_service.fetch_merge_request_details(
+        token=project.gitlab_token, project_id=project.gitlab_project_id, mr_iid=pr_number
+    )
+
+
+def map_issues(
+    issues: List[ReviewIssue], files: List[Dict[str, Any]]
+) -> Tuple[List[Tuple[ReviewIssue, Dict[str, Any], int, Optional[int], Optional[int]]], List[ReviewIssue]]:
+    """Split issues into (issue, file, line, start_line, old_line) placements on the current diff and the rest.
+
+    old_line is set when the (first) line is unchanged context, which GitLab positions need.
+    """
+    files_by_path = {}
+    for file in files:
+        files_by_path[file["filename"]] = file
+        previous = file.get("previous_filename") or file.get("previous_path")
+        if previous:
+            files_by_path.setdefault(previous, file)
+
+    placed, unplaced = [], []
+    diff_lines = {}
+    for issue in issues:
+        file = files_by_path.get(issue.file_path)
+        if file is None or not issue.line_number:
+            unplaced.append(issue)
+            continue
+
+        if file["filename"] not in diff_lines:
+            diff_lines[file["filename"]] = commentable_lines(file.get("patch") or file.get("diff"))
+        lines = diff_lines[file["filename"]]
+        if issue.line_number not in lines:
+            unplaced.append(issue)
+            continue
+        old_line = lines[issue.line_number][1]
+
+        # A multi-line issue becomes a range comment ending at line_end when both ends are in the same hunk
+        if (
+            issue.line_end
+            and issue.line_end > issue.line_number
+            and lines.get(issue.line_end, (None,))[0] == lines[issue.line_number][0]
+        ):
+            placed.append((issue, file, issue.line_end, issue.line_number, old_line))
+        else:
+            placed.append((issue, file, issue.line_number, None, old_line))
+    return placed, unplaced
+
+
+def _publish_github(project: Project, review: AIReview, pr_details: Dict[str, Any], placed, body: str) -> Optional[str]:
+    comments = []
+    for issue, file, line, start_line, _ in placed:
+        comment = {"path": file["filename"], "line": line, "side": "RIGHT", "body": _issue_body(issue)}
+        if start_line:
+            comment.update({"start_line": start_line, "start_side": "RIGHT"})
+        comments.append(comment)
+
+    result = github_service.create_pr_review(
+        token=github_app_service.project_token(project),
+        owner=project.github_repo_owner,
+        repo=project.github_repo_name,
+        pr_number=review.pr_number,
+        commit_id=pr_details["head_sha"],
+        body=body,
+        comments=comments,
+    )
+    return result["html_url"]
+
+
+def _publish_gitlab(project: Project, review: AIReview, pr_details: Dict[str, Any], placed, body: str) -> Optional[str]:
+    head_sha = pr_details["head_sha"]
+    diff_refs = pr_details.get("diff_refs") or {"base_sha": head_sha, "start_sha": head_sha, "head_sha": head_sha}
+
+    comments = []
+    for issue, file, line, start_line, old_line in placed:
+        position = {
+            "position_type": "text",
+            "base_sha": diff_refs["base_sha"],
+            "start_sha": diff_refs["start_sha"],
+            "head_sha": diff_refs["head_sha"],
+            "old_path": file.get("previous_path") or file["filename"],
+            "new_path": file["filename"],
+            # Draft notes take a single line; ranges are anchored at their first line
+            "new_line": start_line or line,
+        }
+        if old_line is not None:
+            # Unchanged context lines are addressed by both sides
+            position["old_line"] = old_line
+        comments.append({"body": _issue_body(issue), "position": position})
+
+    gitlab_service.create_mr_review(
+        token=project.gitlab_token,
+        project_id=project.gitlab_project_id,
+        mr_iid=review.pr_number,
+        body=body,
+        comments=comments,
+    )
+    return f"{project.repository_url.rstrip('/')}/-/merge_requests/{review.pr_number}"
+
+
+def publish_review(db: Session, review_id: int, user_id: int) -> Dict[str, Any]:
+    """Post a completed review's issues to its PR/MR as one platform review.
+
+    Issues on lines of the current diff become inline comments; the others are listed in the review body.
+    If the PR has new commits since the review, every issue goes in the body.
+    """
+    review = db.query(AIReview).filter(AIReview.id == review_id).first()
+    if not review:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+
+    team_service.require_permission(db, review.project_id, user_id, ProjectMemberRole.REVIEWER, "publish reviews")
+
+    if review.status != ReviewStatus.COMPLETED:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only completed reviews can be published")
+
+    # Claim the review first, so two concurrent requests cannot both post it
+    claimed = (
+        db.query(AIReview)
+        .filter(AIReview.id == review.id, AIReview.published_at.is_(None))
+        .update({AIReview.published_at: datetime.now(timezone.utc)}, synchronize_session=False)
+    )
+    db.commit()
+    if not claimed:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This review has already been published")
+
+    try:
+        project = review.project
+        pr_details = _pr_details(project, review.pr_number)
+        # Line numbers refer to the reviewed commit; on a newer head they would land on the wrong lines
+        outdated = bool(review.head_sha) and review.head_sha != pr_details["head_sha"]
+        if outdated:
+            placed, unplaced = [], list(review.issues)
+        else:
+            files = pr_details.get("files", [])
+            mirror_files = repo_mirror_service.fetch_pr_files(
+                project, review.pr_number, pr_details["target_branch"], pr_details["head_sha"]
+            )
+            if mirror_files is not None:
+                # Untruncated patches, so issues deep in large files can still be placed inline
+                files = mirror_files
+            placed, unplaced = map_issues(list(review.issues), files)
+        body = _review_body(review, unplaced, outdated)
+
+        if project.platform == PlatformType.GITHUB:
+            url = _publish_github(project, review, pr_details, placed, body)
+        else:
+            url = _publish_gitlab(project, review, pr_details, placed, body)
+    except Exception:
+        db.rollback()
+        db.query(AIReview).filter(AIReview.id == review.id).update(
+            {AIReview.published_at: None}, synchronize_session=False
+        )
+        db.commit()
+        raise
+
+    db.refresh(review)
+    review.published_url = url[:500] if url else None
+    review.published_comments = len(placed)
+    db.commit()
+    redis_cache.delete(f"ai_review:{review.id}")
+
+    security_logger.info(
+        f"Review #{review.id} published to PR #{review.pr_number} in project {project.id} by user ID {user_id}: "
+        f"{len(placed)} inline, {len(unplaced)} in summary"
+    )
+    return {
+        "review_id": review.id,
+        "published_at": review.published_at,
+        "url": review.published_url,
+        "inline_comments": len(placed),
+        "summary_issues": len(unplaced),
+    }
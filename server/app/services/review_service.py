@@ -1,14 +1,28 @@
+import asyncio
+import math
 import time
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Iterable, List, Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.config.settings import settings
 from app.core.logging_config import security_logger
 from app.models.ai_review import AIReview, IssueSeverity, ReviewIssue, ReviewStatus
 from app.models.project_member import ProjectMemberRole
-from app.services import github_service, gitlab_service, project_service, subscription_service, team_service
+from app.services import (
+    github_app_service,
+    github_service,
+    gitlab_service,
+    llm_usage_service,
+    project_service,
+    repo_mirror_service,
+    subscription_service,
+    symbol_index_service,
+    team_service,
+)
 from app.services.ai_service import get_ai_service
 
 
@@ -67,6 +81,8 @@ async def _process_review(db: Session, review: AIReview, project, include_contex
     """Internal function to process review"""
 
     start_time = time.time()
+    timings = {}
+    ai_metrics = {}
 
     try:
         review.status = ReviewStatus.PROCESSING
@@ -74,11 +90,13 @@ async def _process_review(db: Session, review: AIReview, project, include_contex
 
         security_logger.info(f"Processing review #{review.id}")
 
+        phase_start = time.perf_counter()
         if project.platform.value == "GITHUB":
-            if not project.github_token or not project.github_repo_owner or not project.github_repo_name:
+            has_credentials = project.github_token or project.github_installation_id
+            if not has_credentials or not project.github_repo_owner or not project.github_repo_name:
                 raise Exception("GitHub project configuration is incomplete. Please check repository settings.")
-            pr_details = github_service.fetch_pull_request_details(
-                token=project.github_token,
+            pr_details = await github_service.fetch_pull_request_details_async(
+                token=github_app_service.project_token(project),
                 owner=project.github_repo_owner,
                 repo=project.github_repo_name,
                 pr_number=review.pr_number,
@@ -86,18 +104,54 @@ async def _process_review(db: Session, review: AIReview, project, include_contex
         else:
             if not project.gitlab_token or not project.gitlab_project_id:
                 raise Exception("GitLab project configuration is incomplete. Please check repository settings.")
-            pr_details = gitlab_service.fetch_merge_request_details(
+            pr_details = await gitlab_service.fetch_merge_request_details_async(
                 token=project.gitlab_token, project_id=project.gitlab_project_id, mr_iid=review.pr_number
             )
 
+        mirror_files = await asyncio.to_thread(
+            repo_mirror_service.fetch_pr_files,
+            project,
+            review.pr_number,
+            pr_details["target_branch"],
+            pr_details["head_sha"],
+        )
+        if mirror_files is not None:
+            # Full patches from the local clone; the API listing truncates large ones
+            pr_details = {**pr_details, "files": mirror_files}
+
+        review.head_sha = pr_details.get("head_sha")
         pr_diff = _build_diff_from_files(pr_details.get("files", []))
+        timings["fetch_ms"] = _elapsed_ms(phase_start)
 
         if not pr_diff:
             raise Exception("No code changes found in this PR")
 
-        file_contents = None
+        phase_start = time.perf_counter()
+        symbol_context = None
+        if include_context:
+            try:
+                symbol_context = await asyncio.to_thread(symbol_index_service.build_symbol_context, project, pr_details)
+            except Exception as e:
+                # Context is an enhancement; a review without it is still useful
+                security_logger.warning(f"Symbol context unavailable for review #{review.id}: {e}")
+        timings["context_ms"] = _elapsed_ms(phase_start)
+
         ai_service = get_ai_service()
-        ai_result = await ai_service.analyze_code(pr_diff=pr_diff, pr_details=pr_details, file_contents=file_contents)
+        ai_result = await ai_service.analyze_code(
+            pr_diff=pr_diff,
+            pr_details=pr_details,
+            symbol_context=symbol_context,
+            metrics=ai_metrics,
+            usage_recorder=partial(
+                llm_usage_service.record_call,
+                db,
+                project_id=review.project_id,
+                user_id=review.requested_by,
+                review_id=review.id,
+            ),
+        )
+
+        phase_start = time.perf_counter()
 
         review.summary = ai_result.get("summary", "")
         review.overall_rating = ai_result.get("rating", "Needs Work")
@@ -127,6 +181,10 @@ async def _process_review(db: Session, review: AIReview, project, include_contex
                 continue
 
         review.issues_found = len(issues_list)
+        db.flush()
+        timings["db_write_ms"] = _elapsed_ms(phase_start)
+
+        review.timings = _finalize_timings(timings, ai_metrics, start_time)
         db.commit()
 
         security_logger.info(
@@ -139,25 +197,37 @@ async def _process_review(db: Session, review: AIReview, project, include_contex
         security_logger.error(f"Review processing error: {e}")
         review.status = ReviewStatus.FAILED
         review.error_message = str(e)[:1000]
+        review.timings = _finalize_timings(timings, ai_metrics, start_time)
         db.commit()
         raise
 
 
-def _build_diff_from_files(files: list) -> str:
-    """Build unified diff from file changes"""
-    if not files:
-        return ""
+def _elapsed_ms(start: float) -> int:
+    return int((time.perf_counter() - start) * 1000)
+
+
+def _finalize_timings(timings: dict, ai_metrics: dict, start_time: float) -> dict:
+    """Merge review phase timings with the LLM call metrics into the shape stored on AIReview.timings"""
+    return {**timings, **ai_metrics, "total_ms": int((time.time() - start_time) * 1000)}
 
+
+def _build_diff_from_files(files: Iterable[dict]) -> str:
+    """Build unified diff from file changes, stopping once MAX_DIFF_SIZE is reached (the AI never sees more)"""
     diff_parts = []
+    size = 0
     for file_data in files:
         filename = file_data.get("filename", file_data.get("new_path", "unknown"))
-        diff_parts.append(f"\n--- a/{filename}")
-        diff_parts.append(f"+++ b/{filename}")
+        file_parts = [f"\n--- a/{filename}", f"+++ b/{filename}"]
 
         if "patch" in file_data and file_data["patch"]:
-            diff_parts.append(file_data["patch"])
+            file_parts.append(file_data["patch"])
         elif "diff" in file_data and file_data["diff"]:
-            diff_parts.append(file_data["diff"])
+            file_parts.append(file_data["diff"])
+
+        diff_parts.extend(file_parts)
+        size += sum(len(part) + 1 for part in file_parts)
+        if size >= settings.MAX_DIFF_SIZE:
+            break
 
     return "\n".join(diff_parts)
 
@@ -237,3 +307,56 @@ def get_reviews_for_pr(db: Session, project_id: int, pr_number: int, user_id: in
     )
 
     return reviews
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(int(math.ceil(percent / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+# Metrics no longer recorded; older reviews still carry them
+RETIRED_TIMINGS = {"key_wait_ms"}
+
+
+def get_timing_percentiles(db: Session, days: int = 7, limit: int = 5000) -> dict:
+    """Percentiles of every numeric timing/metric recorded on recent reviews"""
+    since = datetime.utcnow() - timedelta(days=days)
+    rows = (
+        db.query(AIReview.timings)
+        .filter(AIReview.created_at >= since, AIReview.timings.isnot(None))
+        .order_by(AIReview.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+    samples: dict = {}
+    flags: dict = {}
+    for (timings,) in rows:
+        for metric, value in (timings or {}).items():
+            if metric in RETIRED_TIMINGS:
+                continue
+            if isinstance(value, bool):
+                flags[metric] = flags.get(metric, 0) + int(value)
+            elif isinstance(value, (int, float)):
+                samples.setdefault(metric, []).append(value)
+
+    metrics = {}
+    for metric, values in samples.items():
+        values.sort()
+        metrics[metric] = {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 2),
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "max": values[-1],
+        }
+
+    return {
+        "days": days,
+        "reviews": len(rows),
+        "metrics": metrics,
+        "flag_counts": flags,
+    }
@@ -76,6 +76,17 @@ def increment_ai_review_count(db: Session, user_id: int):
     security_logger.info(f"User {user_id} AI review count: {usage.ai_reviews_count}")
 
 
+def release_ai_review(db: Session, user_id: int):
+    """Give back a review counted by increment_ai_review_count that never ran"""
+    usage = get_or_create_usage(db, user_id)
+    if usage.ai_reviews_count > 0:
+        usage.ai_reviews_count -= 1
+        usage.updated_at = datetime.utcnow()
+        db.commit()
+
+    security_logger.info(f"User {user_id} AI review count released: {usage.ai_reviews_count}")
+
+
 def get_usage_stats(db: Session, user_id: int) -> Dict:
     """Get current usage stats for user dashboard"""
     user = db.query(User).filter(User.id == user_id).first()
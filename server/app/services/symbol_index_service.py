@@ -0,0 +1,330 @@
+import posixpath
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.services import github_app_service, github_service, gitlab_service
+from app.services.cache_service import cache_service
+
+PYTHON_EXTENSIONS = (".py",)
+BRACE_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".go", ".java", ".kt", ".cs", ".php", ".rs", ".swift")
+INDEXABLE_EXTENSIONS = PYTHON_EXTENSIONS + BRACE_EXTENSIONS
+
+JS_RESOLVE_SUFFIXES = (".ts", ".tsx", ".js", ".jsx", "/index.ts", "/index.tsx", "/index.js")
+
+DEFINITION_PATTERNS = {
+    "python": [
+        re.compile(r"^(?P<indent>\s*)(?:async\s+)?def\s+(?P<name>\w+)"),
+        re.compile(r"^(?P<indent>\s*)class\s+(?P<name>\w+)"),
+        re.compile(r"^(?P<indent>)(?P<name>[A-Z][A-Z0-9_]+)\s*(?::[^=]+)?=\s*"),
+    ],
+    "brace": [
+        re.compile(r"^(?P<indent>\s*)(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*(?P<name>\w+)"),
+        re.compile(r"^(?P<indent>\s*)(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+(?P<name>\w+)"),
+        re.compile(r"^(?P<indent>\s*)(?:export\s+)?(?:interface|type|enum)\s+(?P<name>\w+)"),
+        re.compile(r"^(?P<indent>\s*)(?:export\s+)?(?:const|let|var)\s+(?P<name>\w+)\s*(?::[^=]+)?=\s*(?:async\s*)?\("),
+        re.compile(r"^(?P<indent>\s*)func\s+(?:\([^)]*\)\s*)?(?P<name>\w+)"),
+        re.compile(r"^(?P<indent>\s*)type\s+(?P<name>\w+)\s+(?:struct|interface)"),
+        re.compile(
+            r"^(?P<indent>\s*)(?:public|private|protected|internal)\s+(?:static\s+)?(?:final\s+)?"
+            r"(?:class|interface|enum|record)\s+(?P<name>\w+)"
+        ),
+        re.compile(r"^(?P<indent>\s*)(?:pub\s+)?(?:fn|struct|trait|enum)\s+(?P<name>\w+)"),
+    ],
+}
+
+IMPORT_PATTERNS = {
+    "python": [
+        re.compile(r"^\s*from\s+(?P<module>[\w.]+)\s+import\s+(?P<names>[\w\s,()*]+)"),
+        re.compile(r"^\s*import\s+(?P<module>[\w.]+)"),
+    ],
+    "brace": [
+        re.compile(r"""^\s*import\s+(?:[\w*{}\s,]+\s+from\s+)?["'](?P<module>[^"']+)["']"""),
+        re.compile(r"""require\(\s*["'](?P<module>[^"']+)["']\s*\)"""),
+    ],
+}
+
+IGNORED_IDENTIFIERS = set(
+    "and as assert async await break case catch class const continue def default del elif else except export "
+    "extends false False finally for from func function if import in is lambda let new None nil not null or "
+    "pass private protected public raise return self static super switch this throw true True try type typeof "
+    "undefined var void while with yield".split()
+)
+
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+HUNK_HEADER_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(?P<start>\d+)(?:,(?P<count>\d+))? @@")
+
+
+def _language_for(path: str) -> Optional[str]:
+    if path.endswith(PYTHON_EXTENSIONS):
+        return "python"
+    if path.endswith(BRACE_EXTENSIONS):
+        return "brace"
+    return None
+
+
+def _python_block_end(lines: List[str], start: int, indent: str) -> int:
+    end = start
+    for idx in range(start + 1, len(lines)):
+        line = lines[idx]
+        if not line.strip():
+            continue
+        if len(line) - len(line.lstrip()) <= len(indent) and not line.lstrip().startswith((")", "]", "}")):
+            break
+        end = idx
+    return end
+
+
+def _brace_block_end(lines: List[str], start: int) -> int:
+    depth = 0
+    opened = False
+    for idx in range(start, len(lines)):
+        depth += lines[idx].count("{") - lines[idx].count("}")
+        if "{" in lines[idx]:
+            opened = True
+        if opened and depth <= 0:
+            return idx
+        if not opened and idx > start and lines[idx].rstrip().endswith(";"):
+            return idx
+    return start
+
+
+def extract_symbols(path: str, content: str) -> Dict:
+    """Extract top-level and nested definitions plus imports from a source file"""
+    language = _language_for(path)
+    if not language:
+        return {"definitions": [], "imports": []}
+
+    lines = content.splitlines()
+    definitions = []
+    imports = []
+    max_lines = settings.SYMBOL_SNIPPET_MAX_LINES
+
+    open_import: Optional[str] = None
+
+    for idx, line in enumerate(lines):
+        if open_import is not None:
+            # Continuation of a parenthesised `from pkg import (...)`
+            names, closing, _ = line.partition(")")
+            imports.extend(f"{open_import}{name}" for name in re.findall(r"\w+", names))
+            if closing:
+                open_import = None
+            continue
+
+        for pattern in IMPORT_PATTERNS[language]:
+            match = pattern.search(line)
+            if match:
+                module = match.group("module")
+                imports.append(module)
+                # `from pkg import mod` may import sub-modules rather than names
+                if "names" in pattern.groupindex and match.group("names"):
+                    prefix = module if module.endswith(".") else f"{module}."
+                    imports.extend(f"{prefix}{name}" for name in re.findall(r"\w+", match.group("names")))
+                    if "(" in line and ")" not in line:
+                        open_import = prefix
+                break
+
+        for pattern in DEFINITION_PATTERNS[language]:
+            match = pattern.match(line)
+            if not match:
+                continue
+
+            if language == "python":
+                end = _python_block_end(lines, idx, match.group("indent"))
+            else:
+                end = _brace_block_end(lines, idx)
+
+            end = min(end, idx + max_lines - 1)
+            definitions.append(
+                {
+                    "name": match.group("name"),
+                    "line": idx + 1,
+                    "end_line": end + 1,
+                    "snippet": "\n".join(lines[idx : end + 1]),
+                }
+            )
+            break
+
+    return {"definitions": definitions, "imports": imports}
+
+
+def get_file_symbols(path: str, blob_sha: str, fetch_content: Callable[[str], str]) -> Dict:
+    """Symbols for one blob; blobs are immutable so the SHA is a safe cache key"""
+    cached = cache_service.get("symbols:blob", sha=blob_sha)
+    if cached is not None:
+        return cached
+
+    symbols = extract_symbols(path, fetch_content(blob_sha))
+    cache_service.set("symbols:blob", symbols, ttl=3600, sha=blob_sha)
+    return symbols
+
+
+def _python_module_map(tree: Dict[str, str]) -> Dict[str, str]:
+    """Map every dotted suffix of each Python module path to that path (e.g. `services.x`, `app.services.x`),
+    so absolute imports resolve even when the package lives under a sub-directory of the repo"""
+    modules: Dict[str, str] = {}
+    for path in tree:
+        if not path.endswith(".py"):
+            continue
+        parts = path[:-3].split("/")
+        if parts[-1] == "__init__":
+            parts = parts[:-1]
+        for idx in range(len(parts)):
+            modules.setdefault(".".join(parts[idx:]), path)
+    return modules
+
+
+def _resolve_import(module: str, importer: str, tree: Dict[str, str], modules: Dict[str, str]) -> Optional[str]:
+    if module.startswith("."):
+        if importer.endswith(PYTHON_EXTENSIONS):
+            level = len(module) - len(module.lstrip("."))
+            base = posixpath.dirname(importer)
+            for _ in range(level - 1):
+                base = posixpath.dirname(base)
+            rest = module.lstrip(".").replace(".", "/")
+            stem = posixpath.join(base, rest) if rest else base
+            candidates = [f"{stem}.py", f"{stem}/__init__.py"]
+        else:
+            stem = posixpath.normpath(posixpath.join(posixpath.dirname(importer), module))
+            candidates = [stem] + [f"{stem}{suffix}" for suffix in JS_RESOLVE_SUFFIXES]
+    elif importer.endswith(PYTHON_EXTENSIONS):
+        return modules.get(module)
+    else:
+        return None
+
+    for candidate in candidates:
+        if candidate in tree:
+            return candidate
+    return None
+
+
+def _iter_hunks(patch: str) -> Iterable[Tuple[int, int, str]]:
+    """Yield (new_start, new_end, text) for every hunk of a unified diff patch"""
+    start = count = None
+    body: List[str] = []
+    for line in patch.splitlines():
+        header = HUNK_HEADER_RE.match(line)
+        if header:
+            if start is not None:
+                yield start, start + max(count - 1, 0), "\n".join(body)
+            start = int(header.group("start"))
+            count = int(header.group("count") or 1)
+            body = []
+        elif start is not None:
+            body.append(line)
+    if start is not None:
+        yield start, start + max(count - 1, 0), "\n".join(body)
+
+
+def _referenced_identifiers(hunk_text: str) -> Set[str]:
+    identifiers = set()
+    for line in hunk_text.splitlines():
+        # Skip removed lines: only code that exists at head can reference head definitions
+        if line.startswith("-"):
+            continue
+        identifiers.update(IDENTIFIER_RE.findall(line[1:] if line[:1] in "+ " else line))
+    return {name for name in identifiers if len(name) > 2 and name not in IGNORED_IDENTIFIERS}
+
+
+def select_definitions(
+    index: Dict[str, Dict], changed_files: List[Dict], max_symbols: int, max_chars: int
+) -> List[Dict]:
+    """Pick definitions referenced by changed hunks, most referenced first, within a character budget"""
+    by_name: Dict[str, List[Tuple[str, Dict]]] = {}
+    for path, symbols in index.items():
+        for definition in symbols["definitions"]:
+            by_name.setdefault(definition["name"], []).append((path, definition))
+
+    hits: Dict[Tuple[str, int], Dict] = {}
+    for file_data in changed_files:
+        filename = file_data.get("filename", file_data.get("new_path", "unknown"))
+        patch = file_data.get("patch") or file_data.get("diff") or ""
+        for hunk_start, hunk_end, hunk_text in _iter_hunks(patch):
+            for name in _referenced_identifiers(hunk_text):
+                for path, definition in by_name.get(name, []):
+                    # The hunk already shows this definition, no need to repeat it
+                    if path == filename and definition["line"] <= hunk_end and definition["end_line"] >= hunk_start:
+                        continue
+                    key = (path, definition["line"])
+                    entry = hits.setdefault(key, {"path": path, **definition, "references": 0})
+                    entry["references"] += 1
+
+    ranked = sorted(hits.values(), key=lambda d: (-d["references"], len(d["snippet"])))
+
+    selected = []
+    used_chars = 0
+    for definition in ranked:
+        snippet = definition["snippet"][: settings.MAX_FILE_CONTENT_SIZE]
+        if used_chars + len(snippet) > max_chars:
+            continue
+        selected.append({**definition, "snippet": snippet})
+        used_chars += len(snippet)
+        if len(selected) >= max_symbols:
+            break
+
+    return selected
+
+
+def build_symbol_context(project, pr_details: Dict) -> List[Dict]:
+    """Index the changed files (and the local modules they import) at the PR head, then select the
+    definitions the changed hunks actually reference"""
+    head_sha = pr_details.get("head_sha")
+    files = pr_details.get("files", [])
+    if not head_sha or not files:
+        return []
+
+    if project.platform.value == "GITHUB":
+        tree = github_service.fetch_repository_tree(
+            token=github_app_service.project_token(project),
+            owner=project.github_repo_owner,
+            repo=project.github_repo_name,
+            ref=head_sha,
+        )
+
+        def fetch_blob(sha: str) -> str:
+            return github_service.fetch_blob_content(
+                token=github_app_service.project_token(project),
+                owner=project.github_repo_owner,
+                repo=project.github_repo_name,
+                sha=sha,
+            )
+
+    else:
+        tree = gitlab_service.fetch_repository_tree(
+            token=project.gitlab_token, project_id=project.gitlab_project_id, ref=head_sha
+        )
+
+        def fetch_blob(sha: str) -> str:
+            return gitlab_service.fetch_blob_content(
+                token=project.gitlab_token, project_id=project.gitlab_project_id, sha=sha
+            )
+
+    modules = _python_module_map(tree)
+    pending = [
+        f.get("filename", f.get("new_path"))
+        for f in files
+        if f.get("status") != "deleted" and _language_for(f.get("filename", f.get("new_path", "")) or "")
+    ]
+    index: Dict[str, Dict] = {}
+
+    while pending and len(index) < settings.MAX_INDEXED_FILES:
+        path = pending.pop(0)
+        if path in index or path not in tree:
+            continue
+
+        symbols = get_file_symbols(path, tree[path], fetch_blob)
+        index[path] = symbols
+
+        for module in symbols["imports"]:
+            resolved = _resolve_import(module, path, tree, modules)
+            if resolved and resolved not in index:
+                pending.append(resolved)
+
+    selected = select_definitions(
+        index, files, max_symbols=settings.MAX_CONTEXT_SYMBOLS, max_chars=settings.MAX_SYMBOL_CONTEXT_SIZE
+    )
+    security_logger.info(
+        f"Symbol index: {len(index)} files indexed at {head_sha[:7]}, {len(selected)} definitions selected"
+    )
+    return selected
@@ -0,0 +1,270 @@
+import hashlib
+import hmac
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.core.logging_config import security_logger
+from app.models.ai_review import AIReview, ReviewStatus
+from app.models.project import PlatformType, Project
+from app.services import (
+    github_app_service,
+    project_stats_service,
+    pull_request_sync_service,
+    rate_limit_governor,
+    repo_mirror_service,
+    review_service,
+    subscription_service,
+)
+from app.services.cache_service import cache_service
+
+GITHUB_REVIEW_ACTIONS = {"opened", "reopened", "synchronize"}
+GITLAB_REVIEW_ACTIONS = {"open", "reopen", "update"}
+# Actions that change the open/closed PR counts
+GITHUB_COUNT_ACTIONS = {"opened", "closed", "reopened"}
+GITLAB_COUNT_ACTIONS = {"open", "close", "reopen", "merge"}
+ZERO_SHA = "0" * 40
+
+
+def verify_github_signature(secret: str, payload: bytes, signature: Optional[str]) -> bool:
+    """Check X-Hub-Signature-256 (HMAC-SHA256 of the raw body)"""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={expected}", signature)
+
+
+def verify_gitlab_token(secret: str, token: Optional[str]) -> bool:
+    """GitLab sends the configured secret verbatim in X-Gitlab-Token"""
+    return bool(token) and hmac.compare_digest(secret, token)
+
+
+def _branch_from_ref(ref: Optional[str]) -> Optional[str]:
+    if ref and ref.startswith("refs/heads/"):
+        return ref[len("refs/heads/") :]
+    return None
+
+
+def _github_projects(db: Session, payload: Dict[str, Any]) -> List[Project]:
+    repository = payload.get("repository") or {}
+    owner = (repository.get("owner") or {}).get("login")
+    name = repository.get("name")
+    if not owner or not name:
+        return []
+    return (
+        db.query(Project)
+        .filter(
+            Project.platform == PlatformType.GITHUB,
+            Project.is_active == True,  # noqa: E712
+            func.lower(Project.github_repo_owner) == owner.lower(),
+            func.lower(Project.github_repo_name) == name.lower(),
+        )
+        .all()
+    )
+
+
+def _gitlab_projects(db: Session, payload: Dict[str, Any]) -> List[Project]:
+    gitlab_project = payload.get("project") or {}
+    # Projects may be registered by numeric id or by path
+    identifiers = [
+        str(value) for value in (gitlab_project.get("id"), gitlab_project.get("path_with_namespace")) if value
+    ]
+    if not identifiers:
+        return []
+    return (
+        db.query(Project)
+        .filter(
+            Project.platform == PlatformType.GITLAB,
+            Project.is_active == True,  # noqa: E712
+            Project.gitlab_project_id.in_(identifiers),
+        )
+        .all()
+    )
+
+
+def _invalidate_github_pr(owner: str, repo: str, pr_number: int):
+    cache_service.invalidate_matching("github:prs", owner=owner, repo=repo)
+    cache_service.invalidate_matching("github:pr_cursor", owner=owner, repo=repo)
+    cache_service.invalidate_matching("github:pr_details", owner=owner, repo=repo, pr_number=pr_number)
+    cache_service.invalidate_matching("github:pr_head", owner=owner, repo=repo, pr_number=pr_number)
+
+
+def _invalidate_gitlab_mr(project_id: str, mr_iid: int):
+    cache_service.invalidate_matching("gitlab:mrs", project_id=project_id)
+    cache_service.invalidate_matching("gitlab:mr_details", project_id=project_id, mr_iid=mr_iid)
+    cache_service.invalidate_matching("gitlab:mr_head", project_id=project_id, mr_iid=mr_iid)
+
+
+def handle_github_event(db: Session, event: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Invalidate the cache entries a GitHub event makes stale; returns the review jobs to queue"""
+    projects = _github_projects(db, payload)
+    reviews = []
+
+    for project in projects:
+        owner, repo = project.github_repo_owner, project.github_repo_name
+
+        if event in ("push", "pull_request"):
+            repo_mirror_service.mark_stale(project)
+
+        if event == "push":
+            branch = _branch_from_ref(payload.get("ref"))
+            cache_service.invalidate_matching("github:branches", owner=owner, repo=repo)
+            if payload.get("created") or payload.get("deleted"):
+                project_stats_service.mark_stale(db, project.id)
+            if branch:
+                cache_service.invalidate_matching("github:tree", owner=owner, repo=repo, ref=branch)
+                cache_service.invalidate_matching("github:file_content", owner=owner, repo=repo, branch=branch)
+
+        elif event == "pull_request":
+            pr_number = payload["pull_request"]["number"]
+            _invalidate_github_pr(owner, repo, pr_number)
+            pull_request_sync_service.mark_stale(db, project.id)
+            if payload.get("action") in GITHUB_REVIEW_ACTIONS:
+                head_sha = (payload["pull_request"].get("head") or {}).get("sha")
+                reviews.append((project.id, pr_number, project.user_id, head_sha))
+            if payload.get("action") in GITHUB_COUNT_ACTIONS:
+                project_stats_service.mark_stale(db, project.id)
+
+        elif event in ("pull_request_review", "pull_request_review_comment"):
+            _invalidate_github_pr(owner, repo, payload["pull_request"]["number"])
+            pull_request_sync_service.mark_stale(db, project.id)
+
+        elif event == "issue_comment" and (payload.get("issue") or {}).get("pull_request"):
+            _invalidate_github_pr(owner, repo, payload["issue"]["number"])
+            pull_request_sync_service.mark_stale(db, project.id)
+
+    security_logger.info(f"GitHub webhook '{event}' processed for {len(projects)} project(s)")
+    return {"event": event, "projects": len(projects), "reviews": reviews}
+
+
+def handle_gitlab_event(db: Session, event: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Invalidate the cache entries a GitLab event makes stale; returns the review jobs to queue"""
+    projects = _gitlab_projects(db, payload)
+    reviews = []
+    kind = payload.get("object_kind") or event
+    attributes = payload.get("object_attributes") or {}
+
+    for project in projects:
+        project_id = project.gitlab_project_id
+
+        if kind in ("push", "merge_request"):
+            repo_mirror_service.mark_stale(project)
+
+        if kind == "push":
+            branch = _branch_from_ref(payload.get("ref"))
+            cache_service.invalidate_matching("gitlab:branches", project_id=project_id)
+            if ZERO_SHA in (payload.get("before"), payload.get("after")):
+                project_stats_service.mark_stale(db, project.id)
+            if branch:
+                cache_service.invalidate_matching("gitlab:tree", project_id=project_id, ref=branch)
+                cache_service.invalidate_matching("gitlab:file_content", project_id=project_id, branch=branch)
+
+        elif kind == "merge_request":
+            mr_iid = attributes["iid"]
+            _invalidate_gitlab_mr(project_id, mr_iid)
+            pull_request_sync_service.mark_stale(db, project.id)
+            action = attributes.get("action")
+            # "update" also fires for title/label edits; only a new head commit (oldrev) warrants a review
+            if action in GITLAB_REVIEW_ACTIONS and (action != "update" or attributes.get("oldrev")):
+                head_sha = (attributes.get("last_commit") or {}).get("id")
+                reviews.append((project.id, mr_iid, project.user_id, head_sha))
+            if action in GITLAB_COUNT_ACTIONS:
+                project_stats_service.mark_stale(db, project.id)
+
+        elif kind == "note" and payload.get("merge_request"):
+            _invalidate_gitlab_mr(project_id, payload["merge_request"]["iid"])
+            pull_request_sync_service.mark_stale(db, project.id)
+
+    security_logger.info(f"GitLab webhook '{kind}' processed for {len(projects)} project(s)")
+    return {"event": kind, "projects": len(projects), "reviews": reviews}
+
+
+def _ensure_review_budget(db: Session, project_id: int):
+    """Refuse an auto-review up front when the project's token has no background budget left"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if project is None:
+        return
+    if project.platform == PlatformType.GITHUB:
+        rate_limit_governor.ensure_budget("github", github_app_service.project_token(project))
+    else:
+        rate_limit_governor.ensure_budget("gitlab", project.gitlab_token)
+
+
+def _discard_deferred_review(db: Session, project_id: int, pr_number: int, user_id: int):
+    """Drop the review a budget-exhausted run left FAILED and refund it, so a later event reviews the PR"""
+    db.rollback()
+    deleted = (
+        db.query(AIReview)
+        .filter(
+            AIReview.project_id == project_id,
+            AIReview.pr_number == pr_number,
+            AIReview.requested_by == user_id,
+            AIReview.status == ReviewStatus.FAILED,
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    if deleted:
+        subscription_service.release_ai_review(db, user_id)
+
+
+def _replace_outdated_review(db: Session, project_id: int, pr_number: int, user_id: int, head_sha: Optional[str]):
+    """Delete the owner's finished review of an older head so the new head can be reviewed"""
+    if not head_sha:
+        return
+    existing = (
+        db.query(AIReview)
+        .filter(AIReview.project_id == project_id, AIReview.pr_number == pr_number, AIReview.requested_by == user_id)
+        .first()
+    )
+    # A review of this head, or one still running, is left alone (create_and_process_review answers 409)
+    if existing is None or existing.head_sha == head_sha:
+        return
+    if existing.status not in (ReviewStatus.COMPLETED, ReviewStatus.FAILED):
+        return
+    review_id = existing.id
+    db.delete(existing)
+    db.commit()
+    security_logger.info(
+        f"Replacing review #{review_id} of PR #{pr_number} in project {project_id}: head moved to {head_sha[:7]}"
+    )
+
+
+async def run_auto_review(project_id: int, pr_number: int, user_id: int, head_sha: Optional[str] = None):
+    """Background task: review a PR on behalf of the project owner, at background API priority.
+
+    Each new head replaces the owner's review of the previous one. A review deferred for API budget leaves no
+    review behind and costs no quota, so the next PR event retries it.
+    """
+    db = SessionLocal()
+    started = False
+    try:
+        with rate_limit_governor.background():
+            _ensure_review_budget(db, project_id)
+            _replace_outdated_review(db, project_id, pr_number, user_id, head_sha)
+            started = True
+            review = await review_service.create_and_process_review(db, project_id, pr_number, user_id)
+        security_logger.info(f"Auto-review #{review.id} completed for PR #{pr_number} in project {project_id}")
+    except HTTPException as e:
+        # 409 (this head already reviewed or a review still running), 402 (quota) and permission errors are expected outcomes here
+        security_logger.info(f"Auto-review skipped for PR #{pr_number} in project {project_id}: {e.detail}")
+    except rate_limit_governor.RateLimitBudgetExhausted as e:
+        if started:
+            _discard_deferred_review(db, project_id, pr_number, user_id)
+        security_logger.warning(f"Auto-review deferred for PR #{pr_number} in project {project_id}: {e}")
+    except Exception as e:
+        security_logger.error(f"Auto-review failed for PR #{pr_number} in project {project_id}: {e}")
+    finally:
+        db.close()
+
+
+def queue_reviews(background_tasks, reviews: List[tuple]) -> int:
+    if not settings.WEBHOOK_AUTO_REVIEW:
+        return 0
+    for project_id, pr_number, user_id, head_sha in reviews:
+        background_tasks.add_task(run_auto_review, project_id, pr_number, user_id, head_sha)
+    return len(reviews)
@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+# Settings are read at import time; give the required ones harmless values before anything imports app.
+# The app's own engine is never connected to; tests get the in-memory `db` fixture.
+for _name, _value in {
+    "DATABASE_URL": "sqlite:///" + os.path.join(tempfile.gettempdir(), "code-review-tests.db"),
+    "DATABASE_HOST": "localhost",
+    "DATABASE_PORT": "5432",
+    "DATABASE_USER": "test",
+    "DATABASE_PASSWORD": "test",
+    "DATABASE_NAME": "test",
+    "SECRET_KEY": "test-secret",
+    "SMTP_HOST": "localhost",
+    "SMTP_PORT": "25",
+    "SMTP_USER": "test",
+    "SMTP_PASSWORD": "test",
+    "SMTP_FROM_EMAIL": "test@example.com",
+    "SMTP_FROM_NAME": "Test",
+    "ENVIRONMENT": "production",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import json  # noqa: E402
+from typing import Any, Dict, Optional  # noqa: E402
+
+import pytest  # noqa: E402
+import requests  # noqa: E402
+from sqlalchemy import BigInteger, create_engine  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlalchemy.schema import CreateTable  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.config.database import Base  # noqa: E402
+from app.models.project import PlatformType, Project  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import rate_limit_governor  # noqa: E402
+from app.services.blob_cache import blob_cache  # noqa: E402
+from app.services.cache_service import cache_service  # noqa: E402
+
+# pull_requests has PostgreSQL-only indexes; the `db` fixture creates it without indexes
+SQLITE_TABLES = [table for name, table in Base.metadata.tables.items() if name != "pull_requests"]
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_big_integer(type_, compiler, **kw):
+    # SQLite only auto-increments INTEGER primary keys (e.g. llm_usage.id)
+    return "INTEGER"
+
+
+def fake_response(
+    status_code: int = 200,
+    body: Any = None,
+    content: Optional[bytes] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """A requests.Response as the pooled sessions would return it"""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content if content is not None else json.dumps(body).encode()
+    response.headers.update(headers or {})
+    response.url = "https://api.test/"
+    return response
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=SQLITE_TABLES)
+    with engine.begin() as connection:
+        connection.execute(CreateTable(Base.metadata.tables["pull_requests"]))
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="owner@example.com", username="owner", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def project(db, user):
+    """A GitHub project owned by `user` (membership rows are up to the test)"""
+    project = Project(
+        name="repo",
+        platform=PlatformType.GITHUB,
+        repository_url="https://github.com/o/repo",
+        github_token="t",
+        github_repo_owner="o",
+        github_repo_name="repo",
+        user_id=user.id,
+    )
+    db.add(project)
+    db.commit()
+    return project
+
+
+@pytest.fixture(autouse=True)
+def clean_caches(tmp_path, monkeypatch):
+    """Every test starts with empty in-process caches and a private blob directory"""
+    cache_service.cache.clear()
+    cache_service.validators.clear()
+    blob_cache.memory.clear()
+    monkeypatch.setattr(blob_cache, "directory", str(tmp_path / "blobs"))
+    rate_limit_governor._local_budgets.clear()
+    yield
+    cache_service.cache.clear()
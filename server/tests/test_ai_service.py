@@ -0,0 +1,60 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from app.config.settings import settings
+from app.services import ai_service
+from app.services.llm_providers import LLMProvider
+
+DIFF = "\n--- a/a.py\n+++ b/a.py\n@@ -1 +1 @@\n+a = 1\n--- a/b.py\n+++ b/b.py\n@@ -1 +1 @@\n+b = 1"
+
+
+class ScriptedProvider(LLMProvider):
+    """Answers with the queued responses in order and keeps every prompt it was sent"""
+
+    name = "scripted"
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        self.calls.append({"prompt": messages[-1]["content"], "max_tokens": max_tokens})
+        content, finish_reason = self.responses.pop(0)
+        return {
+            "content": content,
+            "finish_reason": finish_reason,
+            "prompt_tokens": 10,
+            "completion_tokens": 5,
+            "total_tokens": 15,
+        }
+
+
+def _service(provider):
+    with patch.object(ai_service, "create_provider", return_value=provider):
+        return ai_service.MultiKeyGroqService(api_keys=["key"])
+
+
+def test_output_budget_grows_with_the_diff():
+    service = _service(ScriptedProvider([]))
+    small = service._estimate_output_budget(DIFF)
+    large = service._estimate_output_budget(DIFF * 40)
+
+    assert settings.AI_MIN_TOKENS <= small < large <= settings.AI_MAX_TOKENS
+
+
+def test_truncated_answer_is_continued_for_the_remaining_files():
+    issue_a = {"file": "a.py", "line": 1, "severity": "low", "title": "a"}
+    issue_b = {"file": "b.py", "line": 1, "severity": "high", "title": "b"}
+    # Cut off after the first issue of b.py, so b.py is reviewed again and its partial issues dropped
+    truncated = '{"summary": "ok", "rating": "Needs Work", "issues": [' + json.dumps(issue_a) + ", "
+    truncated += json.dumps({**issue_b, "title": "partial"}) + ', {"file": "b.py", "li'
+    complete = json.dumps({"summary": "rest", "rating": "Major Issues", "issues": [issue_b]})
+    provider = ScriptedProvider([(truncated, "length"), (complete, "stop")])
+
+    result = asyncio.run(_service(provider).analyze_code(DIFF, {"title": "t", "description": ""}))
+
+    assert [issue["title"] for issue in result["issues"]] == ["a", "b"]
+    assert result["rating"] == "Major Issues"
+    assert result["tokens_used"] == 30
+    assert "b.py" in provider.calls[1]["prompt"] and "--- a/a.py" not in provider.calls[1]["prompt"]
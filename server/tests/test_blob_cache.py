@@ -0,0 +1,47 @@
+import os
+import time
+
+from app.services import blob_cache as blob_cache_module
+from app.services.blob_cache import BlobCache
+
+
+def _sha(index):
+    return f"{index:040x}"
+
+
+def test_disk_cache_sweeps_least_recently_used_blobs(tmp_path, monkeypatch):
+    sweeps = []
+
+    def run_inline(target, **kwargs):
+        class Inline:
+            def start(self):
+                sweeps.append(1)
+                target()
+
+        return Inline()
+
+    monkeypatch.setattr(blob_cache_module.threading, "Thread", run_inline)
+    cache = BlobCache(memory_bytes=0, directory=str(tmp_path), disk_bytes=1000)
+
+    for index in range(10):
+        cache.put(_sha(index), b"x" * 100)
+        # mtimes record recency; make each write distinctly newer than the last
+        os.utime(cache._path(_sha(index)), (time.time() - 100 + index, time.time() - 100 + index))
+    # Reading blob 0 makes it the most recently used one
+    assert cache.get(_sha(0)) == b"x" * 100
+
+    cache.put(_sha(10), b"x" * 100)
+
+    assert sweeps
+    on_disk = {sha for sha in map(_sha, range(11)) if os.path.exists(cache._path(sha))}
+    assert sum(os.path.getsize(cache._path(sha)) for sha in on_disk) <= 900
+    assert _sha(0) in on_disk and _sha(10) in on_disk
+    assert _sha(1) not in on_disk
+
+
+def test_unbounded_disk_cache_never_sweeps(tmp_path):
+    cache = BlobCache(memory_bytes=0, directory=str(tmp_path), disk_bytes=0)
+    for index in range(5):
+        cache.put(_sha(index), b"x" * 100)
+
+    assert all(os.path.exists(cache._path(_sha(index))) for index in range(5))
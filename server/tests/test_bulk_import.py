@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.config.settings import settings
+from app.models.project import Project
+from app.models.project_member import ProjectMember
+from app.schemas.project import ProjectBulkCreate
+from app.services import github_app_service, github_service, project_service
+
+
+def test_listed_repositories_are_created_in_one_batch(db, user):
+    data = ProjectBulkCreate(platform="GITHUB", github_token="t", repositories=["o/a", "o/missing", "o/b"])
+    with (
+        patch.object(project_service, "verify_github_tokens", return_value=[True, False, True]),
+        patch.object(project_service.redis_cache, "clear_pattern") as clear,
+    ):
+        result = project_service.bulk_create_projects(db, data, user.id)
+
+    assert (result["created"], result["skipped"], result["failed"]) == (2, 0, 1)
+    assert db.query(Project).count() == 2
+    assert db.query(ProjectMember).count() == 2
+    clear.assert_called_once_with(f"user_projects:{user.id}:*")
+
+
+def test_reimport_skips_existing_repositories(db, user):
+    data = ProjectBulkCreate(platform="GITHUB", github_token="t", repositories=["o/a"])
+    with patch.object(project_service, "verify_github_tokens", return_value=[True]):
+        project_service.bulk_create_projects(db, data, user.id)
+        result = project_service.bulk_create_projects(db, data, user.id)
+
+    assert (result["created"], result["skipped"]) == (0, 1)
+
+
+def test_oversized_list_is_rejected_before_any_verification(monkeypatch):
+    too_many = [f"o/repo-{i}" for i in range(settings.BULK_IMPORT_MAX_PROJECTS + 1)]
+    with patch.object(project_service, "verify_github_tokens") as verify:
+        with pytest.raises(ValidationError):
+            ProjectBulkCreate(platform="GITHUB", github_token="t", repositories=too_many)
+    verify.assert_not_called()
+
+
+def test_unlinked_installation_cannot_import_an_organization(db, user):
+    data = ProjectBulkCreate(platform="GITHUB", github_installation_id=999, organization="victim-org")
+    with (
+        patch.object(github_app_service, "_mint") as mint,
+        patch.object(github_service, "fetch_organization_repositories") as listing,
+    ):
+        with pytest.raises(HTTPException) as error:
+            project_service.bulk_create_projects(db, data, user.id)
+
+    assert error.value.status_code == 403
+    mint.assert_not_called()
+    listing.assert_not_called()
@@ -0,0 +1,42 @@
+import threading
+import time
+
+from app.services.cache_service import cache_service
+
+
+def _wait_for_refresh():
+    deadline = time.time() + 5
+    while cache_service._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    assert not cache_service._refreshing
+
+
+def _stale_read(fetch):
+    cache_service.set("github:prs", ["old"], ttl=0, stale_ttl=600, owner="o", repo="repo", page=1)
+    return cache_service.get_or_fetch("github:prs", fetch, ttl=120, stale_ttl=600, owner="o", repo="repo", page=1)
+
+
+def test_stale_read_refreshes_in_background():
+    assert _stale_read(lambda: ["new"]) == ["old"]
+    _wait_for_refresh()
+
+    assert cache_service.get("github:prs", owner="o", repo="repo", page=1) == ["new"]
+
+
+def test_refresh_started_before_an_invalidation_is_discarded():
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        return ["before push"]
+
+    assert _stale_read(fetch) == ["old"]
+    assert started.wait(5)
+    # A push webhook lands while the refresh is still waiting on the API
+    cache_service.invalidate_matching("github:prs", broadcast=False, owner="o", repo="repo")
+    release.set()
+    _wait_for_refresh()
+
+    assert cache_service.peek("github:prs", owner="o", repo="repo", page=1) is None
+    assert not cache_service._generations
@@ -0,0 +1,67 @@
+import threading
+from unittest.mock import patch
+
+from app.services import github_service, gitlab_service
+from app.services.cache_service import cache_service
+from app.services.http_client import github_session, gitlab_session
+from tests.conftest import fake_response
+
+
+def test_github_revalidates_with_etag_and_reuses_body_on_304():
+    responses = [
+        fake_response(body=[{"name": "main"}], headers={"ETag": '"v1"', "Link": '<https://x?page=2>; rel="next"'}),
+        fake_response(status_code=304, content=b""),
+    ]
+    with patch.object(github_session(), "request", side_effect=responses) as request:
+        first = github_service._make_github_page("/repos/o/repo/branches", "t", {"page": 1})
+        second = github_service._make_github_page("/repos/o/repo/branches", "t", {"page": 1})
+
+    assert "If-None-Match" not in request.call_args_list[0].kwargs["headers"]
+    assert request.call_args_list[1].kwargs["headers"]["If-None-Match"] == '"v1"'
+    # The stored body and its pagination headers stand in for the empty 304
+    assert second == first == ([{"name": "main"}], {"Link": '<https://x?page=2>; rel="next"'})
+
+
+def test_validators_are_kept_per_token():
+    with patch.object(
+        github_session(), "request", return_value=fake_response(body={"id": 1}, headers={"ETag": '"v1"'})
+    ) as request:
+        github_service._make_github_request("/repos/o/repo", "token-a")
+        github_service._make_github_request("/repos/o/repo", "token-b")
+
+    assert "If-None-Match" not in request.call_args_list[1].kwargs["headers"]
+
+
+def test_gitlab_revalidates_with_last_modified():
+    responses = [
+        fake_response(body={"id": 42}, headers={"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        fake_response(status_code=304, content=b""),
+    ]
+    with patch.object(gitlab_session(), "request", side_effect=responses) as request:
+        gitlab_service._make_gitlab_request("/projects/42", "t")
+        body = gitlab_service._make_gitlab_request("/projects/42", "t")
+
+    assert request.call_args_list[1].kwargs["headers"]["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert body == {"id": 42}
+
+
+def test_validator_store_is_guarded_by_the_cache_lock():
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with cache_service._lock:
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(5)
+    writer = threading.Thread(target=cache_service.set_validated, args=("p", {"ETag": '"v1"'}, {}), kwargs={"a": 1})
+    writer.start()
+    writer.join(0.1)
+    # The LRU reorders on every access, so writers wait for whoever holds the lock
+    assert writer.is_alive()
+    release.set()
+    writer.join(5)
+    holder.join(5)
+    assert cache_service.get_validated("p", a=1)["etag"] == '"v1"'
@@ -0,0 +1,83 @@
+import base64
+from unittest.mock import patch
+
+from app.services import github_service, gitlab_service
+from app.services.blob_cache import blob_cache
+from app.services.http_client import github_session, gitlab_session
+from tests.conftest import fake_response
+
+SHA = "a" * 40
+
+
+def test_github_reads_uncached_file_through_blob_api():
+    def request(method, url, **kwargs):
+        if url.endswith("/git/trees/main"):
+            return fake_response(body={"tree": [{"path": "src/app.py", "type": "blob", "sha": SHA, "size": 5}]})
+        assert url.endswith(f"/git/blobs/{SHA}")
+        return fake_response(content=b"hello")
+
+    with patch.object(github_session(), "request", side_effect=request) as upstream:
+        result = github_service.fetch_file_content("token", "owner", "repo", "src/app.py", "main")
+
+    assert base64.b64decode(result["content"]) == b"hello"
+    assert result["sha"] == SHA
+    assert result["size"] == 5
+    assert upstream.call_count == 2
+    assert blob_cache.get(SHA) == b"hello"
+
+
+def test_github_resolves_further_files_from_the_cached_tree():
+    other = "b" * 40
+    tree = [
+        {"path": "src/app.py", "type": "blob", "sha": SHA, "size": 5},
+        {"path": "lib/util.py", "type": "blob", "sha": other, "size": 3},
+    ]
+
+    with patch.object(github_session(), "request", return_value=fake_response(body={"tree": tree})) as upstream:
+        github_service.resolve_file("token", "owner", "repo", "src/app.py", "main")
+        info = github_service.resolve_file("token", "owner", "repo", "lib/util.py", "main")
+
+    # No directory listing per file: the one tree fetch covers the whole branch
+    assert upstream.call_count == 1
+    assert (info["sha"], info["size"]) == (other, 3)
+
+
+def test_github_falls_back_to_listing_for_paths_missing_from_a_truncated_tree():
+    def request(method, url, **kwargs):
+        if url.endswith("/git/trees/main"):
+            return fake_response(body={"tree": [], "truncated": True})
+        assert url.endswith("/contents/src")
+        return fake_response(body=[{"path": "src/app.py", "name": "app.py", "size": 5, "sha": SHA, "type": "file"}])
+
+    with patch.object(github_session(), "request", side_effect=request):
+        info = github_service.resolve_file("token", "owner", "repo", "src/app.py", "main")
+
+    assert info["sha"] == SHA
+
+
+def test_gitlab_reads_uncached_file_through_blob_api():
+    def request(method, url, **kwargs):
+        if method == "HEAD":
+            return fake_response(content=b"", headers={"X-Gitlab-Blob-Id": SHA, "X-Gitlab-Size": "5"})
+        assert url.endswith(f"/repository/blobs/{SHA}/raw")
+        return fake_response(content=b"hello")
+
+    with patch.object(gitlab_session(), "request", side_effect=request) as upstream:
+        result = gitlab_service.fetch_file_content("token", "group/project", "src/app.py", "main")
+
+    assert base64.b64decode(result["content"]) == b"hello"
+    assert upstream.call_count == 2
+
+
+def test_cached_blob_is_served_without_a_blob_request():
+    blob_cache.put(SHA, b"cached")
+
+    def request(method, url, **kwargs):
+        assert method == "HEAD"
+        return fake_response(content=b"", headers={"X-Gitlab-Blob-Id": SHA})
+
+    with patch.object(gitlab_session(), "request", side_effect=request) as upstream:
+        result = gitlab_service.fetch_file_content("token", "42", "README.md")
+
+    assert base64.b64decode(result["content"]) == b"cached"
+    assert upstream.call_count == 1
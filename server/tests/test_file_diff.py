@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import github_service
+from app.services.http_client import github_session
+from tests.conftest import fake_response
+
+FILES = [
+    {"filename": f"src/f{index}.py", "status": "modified", "additions": 1, "deletions": 0, "changes": 1, "patch": "+x"}
+    for index in range(3)
+]
+
+
+def _upstream(head_sha):
+    def request(method, url, **kwargs):
+        if url.endswith("/pulls/7"):
+            return fake_response(body={"head": {"sha": head_sha}})
+        assert url.endswith("/pulls/7/files")
+        return fake_response(body=FILES)
+
+    return request
+
+
+def test_file_diffs_are_served_from_the_index():
+    with patch.object(github_session(), "request", side_effect=_upstream("a" * 40)) as upstream:
+        diffs = [github_service.fetch_file_diff("t", "o", "repo", 7, f"src/f{index}.py") for index in range(3)]
+
+    # One head lookup and one file listing, however many files are opened
+    assert upstream.call_count == 2
+    assert [diff["path"] for diff in diffs] == ["src/f0.py", "src/f1.py", "src/f2.py"]
+    with pytest.raises(HTTPException) as missing:
+        github_service.fetch_file_diff("t", "o", "repo", 7, "src/other.py")
+    assert missing.value.status_code == 404
+
+
+def test_new_head_rebuilds_the_index(monkeypatch):
+    with patch.object(github_session(), "request", side_effect=_upstream("a" * 40)):
+        github_service.fetch_file_diff("t", "o", "repo", 7, "src/f0.py")
+
+    # The cached head has expired and the PR got a new commit
+    monkeypatch.setattr(github_service.settings, "PR_HEAD_CACHE_TTL", 0)
+    with patch.object(github_session(), "request", side_effect=_upstream("b" * 40)) as upstream:
+        github_service.fetch_file_diff("t", "o", "repo", 7, "src/f0.py")
+
+    assert [call.args[1].rsplit("/", 1)[-1] for call in upstream.call_args_list] == ["7", "files"]
@@ -0,0 +1,109 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.models.github_installation import GitHubInstallation
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.project import ProjectCreateGitHub
+from app.services import github_app_service, project_service
+from app.services.http_client import get_session, github_session
+from tests.conftest import fake_response
+
+
+@pytest.fixture(autouse=True)
+def app_settings(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_APP_ID", "77")
+    monkeypatch.setattr(settings, "GITHUB_APP_CLIENT_ID", "client")
+    monkeypatch.setattr(settings, "GITHUB_APP_CLIENT_SECRET", "secret")
+    github_app_service._tokens.clear()
+
+
+def _project_data(installation_id):
+    return ProjectCreateGitHub(
+        name="victim",
+        repository_url="https://github.com/victim/private",
+        github_repo_owner="victim",
+        github_repo_name="private",
+        github_installation_id=installation_id,
+    )
+
+
+def test_unlinked_installation_is_rejected_before_minting(db, user):
+    with patch.object(github_app_service, "_mint") as mint:
+        with pytest.raises(HTTPException) as error:
+            project_service.create_github_project(db, _project_data(999), user.id)
+
+    assert error.value.status_code == 403
+    mint.assert_not_called()
+    assert db.query(Project).count() == 0
+
+
+def test_installation_of_another_user_is_rejected(db, user):
+    other = User(email="other@example.com", username="other", hashed_password="x")
+    db.add(other)
+    db.commit()
+    db.add(GitHubInstallation(installation_id=999, user_id=other.id))
+    db.commit()
+
+    with pytest.raises(HTTPException) as error:
+        github_app_service.require_installation_access(db, user.id, 999)
+    assert error.value.status_code == 403
+
+
+def test_link_installations_keeps_only_this_apps_installations(db, user):
+    oauth = fake_response(body={"access_token": "user-token"})
+    installations = fake_response(
+        body={
+            "installations": [
+                {"id": 5, "app_id": 77, "account": {"login": "my-org"}},
+                {"id": 6, "app_id": 12, "account": {"login": "someone-elses-app"}},
+            ]
+        }
+    )
+    with (
+        patch.object(get_session("https://github.com"), "post", return_value=oauth),
+        patch.object(github_session(), "get", return_value=installations) as listing,
+    ):
+        linked = github_app_service.link_installations(db, user.id, "code")
+
+    assert [(row.installation_id, row.account_login) for row in linked] == [(5, "my-org")]
+    assert listing.call_args.kwargs["headers"]["Authorization"] == "Bearer user-token"
+    github_app_service.require_installation_access(db, user.id, 5)
+
+
+def test_linked_installation_creates_project(db, user):
+    db.add(GitHubInstallation(installation_id=5, user_id=user.id))
+    db.commit()
+
+    with (
+        patch.object(github_app_service, "_mint", return_value=("inst-token", time.time() + 3600)),
+        patch.object(project_service, "verify_github_token", return_value=True) as verify,
+    ):
+        project = project_service.create_github_project(db, _project_data(5), user.id)
+
+    assert project.github_installation_id == 5
+    assert verify.call_args.args[0] == "inst-token"
+
+
+def test_installation_token_is_minted_once_for_concurrent_callers():
+    calls = []
+
+    def mint(installation_id):
+        calls.append(installation_id)
+        time.sleep(0.05)
+        return "inst-token", time.time() + 3600
+
+    with patch.object(github_app_service, "_mint", side_effect=mint):
+        threads = [threading.Thread(target=github_app_service.installation_token, args=(5,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert github_app_service.installation_token(5) == "inst-token"
+
+    assert calls == [5]
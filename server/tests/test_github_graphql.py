@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from app.services import github_service
+from app.services.http_client import github_session
+from tests.conftest import fake_response
+
+GRAPHQL_PR = {
+    "number": 5,
+    "title": "Add feature",
+    "state": "MERGED",
+    "author": None,
+    "headRefName": "feature",
+    "baseRefName": "main",
+    "createdAt": "2024-01-01T00:00:00Z",
+    "updatedAt": "2024-01-02T00:00:00Z",
+    "comments": {"totalCount": 2},
+    "commits": {"totalCount": 3},
+    "changedFiles": 4,
+    "additions": 10,
+    "deletions": 1,
+    "isDraft": False,
+    "reviewDecision": "APPROVED",
+    "labels": {"nodes": [{"name": "bug"}]},
+}
+REST_PR = {
+    "number": 5,
+    "title": "Add feature",
+    "state": "open",
+    "user": {"login": "dev", "avatar_url": None},
+    "head": {"ref": "feature"},
+    "base": {"ref": "main"},
+    "created_at": "2024-01-01T00:00:00Z",
+    "updated_at": "2024-01-02T00:00:00Z",
+}
+
+
+def _connection(nodes, end_cursor="c1", has_next=True):
+    return {
+        "data": {
+            "repository": {
+                "pullRequests": {"nodes": nodes, "pageInfo": {"endCursor": end_cursor, "hasNextPage": has_next}}
+            }
+        }
+    }
+
+
+def test_pr_list_comes_from_one_graphql_query():
+    with patch.object(
+        github_session(), "request", return_value=fake_response(body=_connection([GRAPHQL_PR]))
+    ) as request:
+        result = github_service.fetch_pull_requests("t", "o", "repo", state="closed")
+
+    assert request.call_count == 1
+    assert request.call_args.args[0] == "POST"
+    assert request.call_args.kwargs["json"]["variables"]["states"] == ["CLOSED", "MERGED"]
+    pr = result["pull_requests"][0]
+    assert (pr["state"], pr["author"], pr["commits_count"], pr["review_decision"], pr["labels"]) == (
+        "closed",
+        "ghost",
+        3,
+        "APPROVED",
+        ["bug"],
+    )
+
+
+def test_later_page_starts_from_the_remembered_cursor():
+    with patch.object(github_session(), "request", return_value=fake_response(body=_connection([GRAPHQL_PR]))):
+        github_service.fetch_pull_requests("t", "o", "repo", page=1, per_page=1)
+    with patch.object(
+        github_session(), "request", return_value=fake_response(body=_connection([GRAPHQL_PR], "c2"))
+    ) as request:
+        github_service.fetch_pull_requests("t", "o", "repo", page=2, per_page=1)
+
+    assert request.call_count == 1
+    assert request.call_args.kwargs["json"]["variables"]["after"] == "c1"
+
+
+def test_graphql_errors_fall_back_to_rest():
+    def request(method, url, **kwargs):
+        if url.endswith("/graphql"):
+            return fake_response(body={"errors": [{"message": "Resource not accessible by integration"}]})
+        return fake_response(body=[REST_PR])
+
+    with patch.object(github_session(), "request", side_effect=request) as upstream:
+        result = github_service.fetch_pull_requests("t", "o", "repo")
+
+    assert upstream.call_count == 2
+    assert result["pull_requests"][0]["author"] == "dev"
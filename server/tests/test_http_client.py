@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from app.config.settings import settings
+from app.services import github_service
+from app.services.http_client import GITHUB_API_URL, USER_AGENT, github_session, gitlab_session, request_timeout
+from tests.conftest import fake_response
+
+
+def test_one_pooled_session_per_host():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        sessions = set(map(id, pool.map(lambda _: github_session(), range(32))))
+
+    assert sessions == {id(github_session())}
+    assert github_session() is not gitlab_session()
+
+    adapter = github_session().get_adapter(f"{GITHUB_API_URL}/repos")
+    assert adapter._pool_maxsize == settings.HTTP_POOL_MAXSIZE
+    assert adapter._pool_block is True
+    # Connection setup is retried, but a request that reached the server is never replayed
+    assert adapter.max_retries.read == 0 and adapter.max_retries.status == 0
+    assert github_session().headers["User-Agent"] == USER_AGENT
+
+
+def test_github_calls_go_through_the_shared_session():
+    with patch.object(github_session(), "request", return_value=fake_response(body={"login": "dev"})) as request:
+        github_service._make_github_request("/user", "t")
+
+    assert request.call_args.kwargs["timeout"] == request_timeout()
+    assert request.call_args.kwargs["headers"]["Authorization"] == "token t"
@@ -0,0 +1,66 @@
+import re
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.services import ai_service
+from app.services.llm_providers import LLMProvider
+from tools import fake_llm_server
+
+
+class EchoProvider(LLMProvider):
+    name = "echo"
+
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        return {"content": messages[-1]["content"], "finish_reason": "stop", "total_tokens": 1}
+
+
+def test_provider_must_implement_complete():
+    class Incomplete(LLMProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        LLMProvider()
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert EchoProvider().complete([{"content": "hi"}], "m", 1, 0, 1)["content"] == "hi"
+
+
+def test_concurrent_reviews_get_distinct_keys():
+    with patch.object(ai_service, "create_provider", side_effect=lambda key: EchoProvider()):
+        service = ai_service.MultiKeyGroqService(api_keys=[f"key{index}" for index in range(8)])
+
+    barrier = threading.Barrier(8)
+    picked = []
+
+    def pick():
+        barrier.wait()
+        picked.append(service._get_next_client()[1])
+
+    threads = [threading.Thread(target=pick) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every key is handed out once before any is reused
+    assert sorted(picked) == list(range(8))
+
+
+def test_fake_server_uses_the_prompt_categories():
+    prompt = ai_service.MultiKeyGroqService._get_system_prompt(None)
+    allowed = re.search(r"`category`: Must be one of: (.+?)\n- `title`", prompt, re.DOTALL).group(1)
+
+    assert set(fake_llm_server.CATEGORIES) == set(re.findall(r'"(\w+)"', allowed))
+
+
+def test_fake_server_counts_concurrent_requests():
+    llm = fake_llm_server.FakeLLM(fake_llm_server.parse_args(["--seed", "1"]))
+    threads = [threading.Thread(target=lambda: [llm.count("requests") for _ in range(1000)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert llm.snapshot() == {"requests": 8000}
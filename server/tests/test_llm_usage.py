@@ -0,0 +1,32 @@
+from unittest.mock import patch
+
+from app.models.llm_usage import LLMUsage
+from app.services import ai_service, llm_usage_service
+from app.services.llm_providers import LLMRateLimitError
+from tests.test_ai_service import ScriptedProvider
+from tests.test_review_service import ANSWER, run_review
+
+
+class RateLimitedProvider(ScriptedProvider):
+    def complete(self, messages, model, max_tokens, temperature, timeout):
+        raise LLMRateLimitError("429")
+
+
+def test_every_call_attempt_is_recorded(db, project, user):
+    providers = iter([RateLimitedProvider([]), ScriptedProvider([(ANSWER, "stop")])])
+    with patch.object(ai_service, "create_provider", side_effect=lambda key: next(providers)):
+        service = ai_service.MultiKeyGroqService(api_keys=["key1", "key2"])
+
+    review = run_review(db, project, user, service)
+
+    rows = db.query(LLMUsage).order_by(LLMUsage.id).all()
+    assert [(row.api_key_index, row.status) for row in rows] == [(1, "rate_limited"), (2, "success")]
+    assert rows[0].error_type == "LLMRateLimitError"
+    assert all(row.review_id == review.id and row.project_id == project.id for row in rows)
+    assert rows[1].total_tokens == 15
+
+
+def test_headroom_against_per_key_limits():
+    assert llm_usage_service._headroom(30, 60) == 0.5
+    assert llm_usage_service._headroom(90, 60) == -0.5
+    assert llm_usage_service._headroom(30, 0) is None
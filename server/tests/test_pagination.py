@@ -0,0 +1,46 @@
+import time
+
+from app.config.settings import settings
+from app.services import review_service
+from app.services.pagination import iter_pages
+
+
+def test_stopping_early_skips_pages_beyond_the_window(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_CONCURRENCY", 2)
+    fetched = []
+
+    def fetch_page(page):
+        fetched.append(page)
+        return [page], {"X-Total-Pages": "10"}
+
+    pages = iter_pages(fetch_page, lambda meta: (None, int(meta["X-Total-Pages"])), "test")
+    for item in pages:
+        if item == 2:
+            # A slow consumer must not let the workers run ahead through every page
+            time.sleep(0.2)
+            break
+    pages.close()
+
+    assert sorted(fetched) == [1, 2, 3, 4]
+
+
+def test_iter_pages_keeps_order():
+    def fetch_page(page):
+        return [page * 10, page * 10 + 1], {"X-Total-Pages": "6"}
+
+    items = list(iter_pages(fetch_page, lambda meta: (None, int(meta["X-Total-Pages"])), "test"))
+
+    assert items == [value for page in range(1, 7) for value in (page * 10, page * 10 + 1)]
+
+
+def test_diff_size_counts_each_file_once(monkeypatch):
+    files = [
+        {"filename": "a.py", "patch": "x" * 100},
+        {"filename": "image.png"},
+        {"filename": "c.py", "patch": "@@ c"},
+    ]
+    first_two = review_service._build_diff_from_files(files[:2])
+    monkeypatch.setattr(settings, "MAX_DIFF_SIZE", len(first_two) + 50)
+
+    # A patchless file must not count the previous file's patch again and cut the diff short
+    assert "+++ b/c.py" in review_service._build_diff_from_files(files)
@@ -0,0 +1,64 @@
+import asyncio
+import os
+from unittest.mock import patch
+
+import httpx
+
+from app.services import github_service
+from app.services.http_client import GITHUB_API_URL
+
+PR = {
+    "number": 3,
+    "title": "Add feature",
+    "body": None,
+    "state": "open",
+    "user": {"login": "dev", "avatar_url": "https://avatars/dev"},
+    "head": {"ref": "feature", "sha": "c" * 40},
+    "base": {"ref": "main"},
+    "created_at": "2024-01-01T00:00:00Z",
+    "updated_at": "2024-01-02T00:00:00Z",
+}
+COMMIT = {"sha": "c" * 40, "commit": {"message": "change", "author": {"name": "dev", "date": "2024-01-02T00:00:00Z"}}}
+FILE = {"filename": "a.py", "status": "modified", "additions": 1, "deletions": 0, "changes": 1, "patch": "@@ +a"}
+
+
+def test_pr_details_requests_are_in_flight_together():
+    in_flight, peak = 0, 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        if request.url.path.endswith("/commits"):
+            return httpx.Response(200, json=[COMMIT])
+        if request.url.path.endswith("/files"):
+            return httpx.Response(200, json=[FILE])
+        return httpx.Response(200, json=PR)
+
+    async def fetch():
+        async with httpx.AsyncClient(base_url=GITHUB_API_URL, transport=httpx.MockTransport(handler)) as client:
+            with patch.object(github_service, "github_async_client", return_value=client):
+                return await github_service.fetch_pull_request_details_async("t", "o", "repo", 3)
+
+    details = asyncio.run(fetch())
+
+    assert peak == 3
+    assert details["head_sha"] == "c" * 40
+    assert [file["filename"] for file in details["files"]] == ["a.py"]
+    assert details["stats"]["total_commits"] == 1
+    # Same cache entry as the sync variant, so the next read needs no request
+    assert github_service.fetch_pull_request_details("t", "o", "repo", 3) == details
+
+
+def test_requirements_pin_each_package_once():
+    names = []
+    with open(os.path.join(os.path.dirname(__file__), "..", "requirements.txt")) as requirements:
+        for line in requirements:
+            line = line.split("#")[0].strip()
+            if line and not line.startswith("-"):
+                names.append(line.split("==")[0].split("[")[0].lower())
+
+    assert len(names) == len(set(names))
+    assert "httpx" in names
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+
+from app.config.settings import settings
+from app.services import github_service, pr_prefetch_service
+from app.services.cache_service import cache_service
+from app.services.http_client import github_session
+from tests.conftest import fake_response
+
+FIELDS = {"owner": "o", "repo": "repo", "pr_number": 1}
+
+
+def _prefetch(project):
+    prefix, fields = pr_prefetch_service._details_key(project, 1)
+    queue_key = (prefix, *sorted(fields.items()))
+    pr_prefetch_service._prefetch(queue_key, prefix, fields, pr_prefetch_service._fetch_details(project, 1))
+
+
+def test_failed_prefetch_keeps_the_cached_details(project):
+    outdated = {"number": 1, "updated_at": "2024-01-01T00:00:00Z"}
+    cache_service.set("github:pr_details", outdated, ttl=180, stale_ttl=settings.CACHE_STALE_TTL, **FIELDS)
+
+    with patch.object(github_session(), "request", return_value=fake_response(status_code=502, body={})) as upstream:
+        _prefetch(project)
+
+    assert upstream.called
+    assert cache_service.peek("github:pr_details", **FIELDS) == outdated
+
+
+def test_prefetch_overwrites_fresh_outdated_details(project):
+    outdated = {"number": 1, "updated_at": "2024-01-01T00:00:00Z"}
+    cache_service.set("github:pr_details", outdated, ttl=180, stale_ttl=settings.CACHE_STALE_TTL, **FIELDS)
+    current = {"number": 1, "updated_at": "2024-02-01T00:00:00Z", "head_sha": "b" * 40, "files": []}
+
+    with (
+        patch.object(github_service, "_build_pr_details", return_value=current),
+        patch.object(github_session(), "request", return_value=fake_response(body=[])),
+    ):
+        _prefetch(project)
+
+    assert cache_service.get("github:pr_details", **FIELDS) == current
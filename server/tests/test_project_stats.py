@@ -0,0 +1,111 @@
+import inspect
+import threading
+import time
+from unittest.mock import patch
+
+from fastapi import BackgroundTasks
+
+from app.config.settings import settings
+from app.controllers import project_controller
+from app.models.project import PlatformType, Project
+from app.models.project_member import ProjectMember, ProjectMemberRole
+from app.models.project_statistics import ProjectStatistics
+from app.services import project_stats_service
+
+COUNTS = {"branches_count": 2, "open_prs_count": 1, "closed_prs_count": 3}
+
+
+def _projects(db, user, count):
+    projects = []
+    for index in range(count):
+        project = Project(
+            name=f"repo{index}",
+            platform=PlatformType.GITHUB,
+            repository_url=f"https://github.com/o/repo{index}",
+            github_token="shared",
+            github_repo_owner="o",
+            github_repo_name=f"repo{index}",
+            user_id=user.id,
+        )
+        db.add(project)
+        db.flush()
+        db.add(ProjectMember(project_id=project.id, user_id=user.id, role=ProjectMemberRole.OWNER))
+        projects.append(project)
+    db.commit()
+    return projects
+
+
+def test_stats_endpoint_does_not_run_on_the_event_loop():
+    # Sync endpoints run in FastAPI's threadpool, so their DB queries and commits never block the loop
+    assert not inspect.iscoroutinefunction(project_controller.get_projects_stats)
+
+
+def test_batch_timeout_stops_queued_projects(db, user, monkeypatch):
+    monkeypatch.setattr(settings, "STATS_BATCH_PER_TOKEN_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "STATS_BATCH_TIMEOUT", 0.1)
+    _projects(db, user, 3)
+    calls, release = [], threading.Event()
+
+    def compute_counts(project):
+        calls.append(project.id)
+        release.wait(5)
+        return COUNTS
+
+    with patch.object(project_stats_service, "compute_counts", side_effect=compute_counts):
+        results = project_stats_service.get_stats_for_user(db, user.id, BackgroundTasks())
+        release.set()
+        time.sleep(0.2)
+
+    assert [result["error"] for result in results] == [project_stats_service.TIMED_OUT] * 3
+    # Only the call already in flight when the batch timed out went to the API
+    assert len(calls) == 1
+
+
+def test_batch_stores_computed_counts(db, user):
+    _projects(db, user, 2)
+
+    with patch.object(project_stats_service, "compute_counts", return_value=COUNTS):
+        results = project_stats_service.get_stats_for_user(db, user.id, BackgroundTasks())
+
+    assert [result["stats"]["total_prs_count"] for result in results] == [4, 4]
+    assert all(result["error"] is None for result in results)
+
+
+def test_batch_threads_are_capped_by_token_concurrency(db, user):
+    _projects(db, user, 20)
+    threads = set()
+
+    def compute_counts(project):
+        threads.add(threading.current_thread().name)
+        return COUNTS
+
+    with patch.object(project_stats_service, "compute_counts", side_effect=compute_counts):
+        results = project_stats_service.get_stats_for_user(db, user.id, BackgroundTasks())
+
+    assert len(results) == 20
+    # One shared token lets at most STATS_BATCH_PER_TOKEN_CONCURRENCY calls through, so no more threads are started
+    assert len(threads) <= settings.STATS_BATCH_PER_TOKEN_CONCURRENCY
+
+
+def test_first_view_upserts_over_a_concurrent_insert(db, project):
+    def compute_counts(project):
+        # Another request's first view of the project stores its row while this one is computing
+        db.add(ProjectStatistics(project_id=project.id, branches_count=9, open_prs_count=9, closed_prs_count=9))
+        db.commit()
+        return COUNTS
+
+    with patch.object(project_stats_service, "compute_counts", side_effect=compute_counts):
+        stats = project_stats_service.refresh_project_stats(db, project)
+
+    assert (stats.branches_count, stats.open_prs_count, stats.closed_prs_count) == (2, 1, 3)
+    assert db.query(ProjectStatistics).count() == 1
+
+
+def test_failed_refresh_keeps_previous_counts(db, project):
+    with patch.object(project_stats_service, "compute_counts", return_value=COUNTS):
+        project_stats_service.refresh_project_stats(db, project)
+    with patch.object(project_stats_service, "compute_counts", side_effect=RuntimeError("bad token")):
+        stats = project_stats_service.refresh_project_stats(db, project)
+
+    assert stats.branches_count == 2
+    assert stats.last_error == "bad token"
@@ -0,0 +1,168 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from fastapi import BackgroundTasks
+
+from app.config.settings import settings
+from app.controllers import repository_controller
+from app.models.pull_request import PullRequestRecord, PullRequestSyncState
+from app.services import github_service, gitlab_service, pr_prefetch_service, pull_request_sync_service
+
+
+def _summary(number, updated_at, title="PR"):
+    return {
+        "number": number,
+        "title": f"{title} {number}",
+        "state": "open",
+        "author": "alice",
+        "source_branch": f"feature-{number}",
+        "target_branch": "main",
+        "created_at": "2026-01-01T00:00:00Z",
+        "updated_at": updated_at,
+    }
+
+
+def test_capped_walk_is_continued_before_the_watermark_moves(db, project):
+    calls = []
+    responses = [
+        ([_summary(3, "2026-03-03T00:00:00Z"), _summary(2, "2026-03-02T00:00:00Z")], "rest:2"),
+        ([_summary(1, "2026-03-01T00:00:00Z")], None),
+        ([_summary(4, "2026-03-04T00:00:00Z")], None),
+    ]
+
+    def fetch(project, since, resume, max_pages):
+        calls.append((since, resume))
+        return responses[len(calls) - 1]
+
+    with patch.object(pull_request_sync_service, "_fetch_updated", side_effect=fetch):
+        pull_request_sync_service.sync_pull_requests(db, project)
+        state = db.query(PullRequestSyncState).one()
+        assert state.watermark is None and state.backfill["resume"] == "rest:2"
+
+        pull_request_sync_service.sync_pull_requests(db, project)
+        pull_request_sync_service.sync_pull_requests(db, project)
+
+    assert calls[0] == (None, None)
+    # The backfill continues the first walk instead of starting from the newest stored PR
+    assert calls[1] == (None, "rest:2")
+    assert calls[2] == (datetime(2026, 3, 3, tzinfo=timezone.utc), None)
+    assert sorted(number for (number,) in db.query(PullRequestRecord.number)) == [1, 2, 3, 4]
+
+
+def test_first_view_syncs_one_page_and_leaves_the_rest_to_the_background(db, project):
+    calls = []
+
+    def fetch(project, since, resume, max_pages):
+        calls.append(max_pages)
+        return [_summary(2, "2026-03-02T00:00:00Z")], "graphql:c1"
+
+    background_tasks = BackgroundTasks()
+    with patch.object(pull_request_sync_service, "_fetch_updated", side_effect=fetch):
+        pull_requests, _ = pull_request_sync_service.list_pull_requests(db, project, background_tasks)
+
+    assert calls == [pull_request_sync_service.INLINE_SYNC_PAGES]
+    assert [pr["number"] for pr in pull_requests] == [2]
+    assert db.query(PullRequestSyncState).one().backfill["resume"] == "graphql:c1"
+    assert [task.func for task in background_tasks.tasks] == [pull_request_sync_service.sync_in_background]
+    pull_request_sync_service._syncing.clear()
+
+
+def test_failed_first_sync_lists_from_the_api(db, project, user):
+    listed = {"pull_requests": [_summary(5, "2026-03-05T00:00:00Z")]}
+    with (
+        patch.object(repository_controller, "_get_project_with_permission", return_value=project),
+        patch.object(pull_request_sync_service, "_fetch_updated", side_effect=RuntimeError("GraphQL down")),
+        patch.object(github_service, "fetch_pull_requests", return_value=listed) as fetch_pull_requests,
+        patch.object(pr_prefetch_service, "queue_prefetch"),
+    ):
+        response = repository_controller.get_pull_requests(
+            project.id,
+            BackgroundTasks(),
+            state="open",
+            page=1,
+            per_page=20,
+            refresh=False,
+            author=None,
+            branch=None,
+            search=None,
+            sort="updated",
+            cursor=None,
+            current_user=user,
+            db=db,
+        )
+
+    fetch_pull_requests.assert_called_once()
+    assert [pr.number for pr in response.pull_requests] == [5]
+
+
+def test_existing_rows_are_upserted(db, project):
+    db.add(
+        PullRequestRecord(
+            project_id=project.id,
+            number=7,
+            title="old",
+            state="open",
+            author="bob",
+            source_branch="x",
+            target_branch="main",
+            created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            summary={},
+        )
+    )
+    db.commit()
+
+    pages = ([_summary(7, "2026-02-01T00:00:00Z", title="new"), _summary(7, "2026-02-01T00:00:00Z")], None)
+    with patch.object(pull_request_sync_service, "_fetch_updated", return_value=pages):
+        pull_request_sync_service.sync_pull_requests(db, project)
+
+    record = db.query(PullRequestRecord).one()
+    assert record.author == "alice" and record.number == 7
+
+
+def test_github_rest_walk_stops_at_page_cap(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_GRAPHQL_ENABLED", False)
+    monkeypatch.setattr(settings, "PULL_REQUEST_SYNC_MAX_PAGES", 2)
+    page_size = github_service.MAX_PER_PAGE
+
+    def page(endpoint, token, params):
+        number = params["page"]
+        pr = {
+            "number": number,
+            "title": "t",
+            "state": "open",
+            "user": {"login": "a", "avatar_url": None},
+            "head": {"ref": "f"},
+            "base": {"ref": "main"},
+            "created_at": "2026-01-01T00:00:00Z",
+            "updated_at": "2026-01-01T00:00:00Z",
+        }
+        link = f'<https://api.github.com/x?page={number + 1}>; rel="next"'
+        return [pr] * page_size, {"Link": link}
+
+    with patch.object(github_service, "_make_github_page", side_effect=page) as pages:
+        summaries, resume = github_service.fetch_pull_requests_updated_since("t", "o", "r")
+        assert (len(summaries), resume) == (2 * page_size, "rest:3")
+        _, resume = github_service.fetch_pull_requests_updated_since("t", "o", "r", resume=resume)
+
+    assert [call.args[2]["page"] for call in pages.call_args_list] == [1, 2, 3, 4]
+    assert resume == "rest:5"
+
+
+def test_gitlab_walk_stops_at_page_cap(monkeypatch):
+    monkeypatch.setattr(settings, "PULL_REQUEST_SYNC_MAX_PAGES", 3)
+    with (
+        patch.object(gitlab_service, "_make_gitlab_page", side_effect=lambda e, t, p: ([], {"X-Next-Page": "9"})),
+        patch.object(gitlab_service, "gitlab_page_info", side_effect=lambda meta: (None, None)),
+    ):
+        assert gitlab_service.fetch_merge_requests_updated_since("t", "1") == ([], None)
+
+    calls = []
+
+    def page(endpoint, token, params):
+        calls.append(params["page"])
+        return [], {"X-Next-Page": str(params["page"] + 1)}
+
+    with patch.object(gitlab_service, "_make_gitlab_page", side_effect=page):
+        assert gitlab_service.fetch_merge_requests_updated_since("t", "1", resume="4") == ([], "7")
+    assert calls == [4, 5, 6]
@@ -0,0 +1,62 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.services import rate_limit_governor
+from app.services.rate_limit_governor import RateLimitBudgetExhausted
+
+
+def _headers(remaining, **extra):
+    return {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        **extra,
+    }
+
+
+def test_secondary_limit_blocks_background_calls():
+    rate_limit_governor.record("github", "t", _headers(4000, **{"Retry-After": "120"}), status_code=403)
+
+    # Plenty of primary budget is left, but the secondary back-off still applies
+    with rate_limit_governor.background(), pytest.raises(RateLimitBudgetExhausted) as exhausted:
+        rate_limit_governor.acquire("github", "t")
+    assert exhausted.value.reset_at >= time.time() + 100
+    # Interactive calls are never held back
+    rate_limit_governor.acquire("github", "t")
+
+
+def test_short_secondary_backoff_is_waited_out():
+    rate_limit_governor.record("gitlab", "t", {"Retry-After": "5"}, status_code=429)
+
+    with rate_limit_governor.background(), patch.object(rate_limit_governor.time, "sleep") as sleep:
+        rate_limit_governor.acquire("gitlab", "t", "core")
+
+    assert 4 < sleep.call_args.args[0] <= 5
+
+
+def test_secondary_limit_without_retry_after_uses_default_backoff():
+    body = '{"message": "You have exceeded a secondary rate limit. Please wait a few minutes."}'
+    rate_limit_governor.record("github", "t", _headers(4000), status_code=403, body=body)
+
+    with pytest.raises(RateLimitBudgetExhausted):
+        rate_limit_governor.ensure_budget("github", "t", "search")
+
+
+def test_primary_exhaustion_is_not_a_secondary_block():
+    rate_limit_governor.record("github", "t", _headers(0), status_code=403)
+
+    assert rate_limit_governor._blocked_until("github", "t") == 0.0
+    with pytest.raises(RateLimitBudgetExhausted):
+        rate_limit_governor.ensure_budget("github", "t")
+
+
+def test_permission_denied_403_does_not_block():
+    body = '{"message": "Resource not accessible by integration"}'
+    rate_limit_governor.record("github", "t", _headers(4000), status_code=403, body=body)
+    rate_limit_governor.record("gitlab", "t", {}, status_code=403, body='{"message": "403 Forbidden"}')
+
+    assert rate_limit_governor._blocked_until("github", "t") == 0.0
+    assert rate_limit_governor._blocked_until("gitlab", "t") == 0.0
+    rate_limit_governor.ensure_budget("github", "t")
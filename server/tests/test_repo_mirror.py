@@ -0,0 +1,79 @@
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from app.config.settings import settings
+from app.services import repo_mirror_service
+
+
+def _run(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """A repository with a PR head and test-merge ref, laid out like GitHub's"""
+    path = tmp_path / "upstream"
+    path.mkdir()
+    _run(path, "init", "-q", "-b", "main")
+    _run(path, "config", "user.email", "dev@example.com")
+    _run(path, "config", "user.name", "dev")
+    (path / "a.py").write_text("a = 1\n")
+    (path / "b.py").write_text("b = 1\n")
+    _run(path, "add", ".")
+    _run(path, "commit", "-q", "-m", "base")
+    _run(path, "checkout", "-q", "-b", "feature")
+    (path / "a.py").write_text("a = 2\n")
+    (path / "b.py").write_text("b = 2\n")
+    _run(path, "commit", "-q", "-am", "change")
+    _run(path, "update-ref", "refs/pull/1/head", "feature")
+    _run(path, "checkout", "-q", "main")
+    _run(path, "merge", "-q", "--no-ff", "-m", "merge", "feature")
+    _run(path, "update-ref", "refs/pull/1/merge", "HEAD")
+    _run(path, "reset", "-q", "--hard", "HEAD^1")
+    return path
+
+
+@pytest.fixture
+def mirror_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPO_MIRROR_ENABLED", True)
+    monkeypatch.setattr(settings, "REPO_MIRROR_DIR", str(tmp_path / "mirrors"))
+    return tmp_path / "mirrors"
+
+
+def test_missing_mirror_is_cloned_in_background(project, mirror_dir):
+    with (
+        patch.object(repo_mirror_service, "_git_env", return_value={}),
+        patch.object(repo_mirror_service._clone_pool, "submit") as submit,
+    ):
+        assert repo_mirror_service.fetch_file_diff(project, 1, "a.py") is None
+        assert repo_mirror_service.fetch_file_diff(project, 1, "a.py") is None
+
+    # The request falls back to the API at once and only one clone is queued
+    submit.assert_called_once()
+    assert submit.call_args.args[0] is repo_mirror_service._clone
+    assert not mirror_dir.exists()
+    repo_mirror_service._cloning.clear()
+
+
+def test_file_diff_only_generates_the_requested_file(project, upstream, mirror_dir):
+    repo_mirror_service._cloning.add(project.id)
+    repo_mirror_service._clone(project.id, repo_mirror_service.mirror_path(project), str(upstream), None)
+    assert not repo_mirror_service._cloning
+
+    commands = []
+    original = repo_mirror_service._git
+
+    def git(project, *args, **kwargs):
+        commands.append(args)
+        return original(project, *args, **kwargs)
+
+    with patch.object(repo_mirror_service, "_git", side_effect=git):
+        result = repo_mirror_service.fetch_file_diff(project, 1, "a.py")
+
+    assert result["path"] == "a.py"
+    assert "+a = 2" in result["patch"]
+    patch_command = commands[-1]
+    assert "--name-status" not in patch_command
+    assert patch_command[-2:] == ("--", "a.py")
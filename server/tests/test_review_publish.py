@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.models.ai_review import AIReview, IssueSeverity, ReviewIssue, ReviewStatus
+from app.models.project_member import ProjectMember, ProjectMemberRole
+from app.services import github_service, review_publish_service
+
+REVIEWED = "a" * 40
+PATCH = "@@ -1,2 +1,3 @@\n a = 1\n+b = 2\n c = 3"
+
+
+@pytest.fixture
+def review(db, project, user):
+    db.add(ProjectMember(project_id=project.id, user_id=user.id, role=ProjectMemberRole.OWNER))
+    review = AIReview(
+        project_id=project.id,
+        pr_number=7,
+        status=ReviewStatus.COMPLETED,
+        summary="Looks fine",
+        requested_by=user.id,
+        head_sha=REVIEWED,
+    )
+    review.issues.append(
+        ReviewIssue(
+            file_path="a.py",
+            line_number=2,
+            severity=IssueSeverity.HIGH,
+            category="bug",
+            title="Wrong value",
+            description="b should be 3",
+        )
+    )
+    db.add(review)
+    db.commit()
+    return review
+
+
+def _publish(db, review, user, head_sha):
+    details = {"head_sha": head_sha, "target_branch": "main", "files": [{"filename": "a.py", "patch": PATCH}]}
+    with (
+        patch.object(review_publish_service, "_pr_details", return_value=details),
+        patch.object(
+            github_service, "create_pr_review", return_value={"html_url": "https://github.com/o/repo/pull/7"}
+        ) as create,
+    ):
+        result = review_publish_service.publish_review(db, review.id, user.id)
+    return result, create.call_args.kwargs
+
+
+def test_issues_are_inline_on_the_reviewed_head(db, review, user):
+    result, posted = _publish(db, review, user, REVIEWED)
+
+    assert result["inline_comments"] == 1
+    assert posted["commit_id"] == REVIEWED
+    assert posted["comments"][0]["line"] == 2
+
+
+def test_moved_head_puts_every_issue_in_the_body(db, review, user):
+    result, posted = _publish(db, review, user, "b" * 40)
+
+    assert result["inline_comments"] == 0
+    assert posted["comments"] == []
+    assert "Wrong value" in posted["body"]
+    assert REVIEWED[:7] in posted["body"]
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models.ai_review import AIReview, ReviewStatus
+from app.services import github_service, review_service, symbol_index_service
+from tests.test_ai_service import ScriptedProvider, _service
+
+PR_DETAILS = {
+    "title": "Add feature",
+    "description": "",
+    "head_sha": "c" * 40,
+    "target_branch": "main",
+    "files": [{"filename": "a.py", "status": "modified", "patch": "@@ -1 +1 @@\n+a = 1"}],
+}
+ANSWER = json.dumps(
+    {
+        "summary": "ok",
+        "rating": "Needs Work",
+        "issues": [{"file": "a.py", "line": 1, "severity": "low", "title": "Naming", "description": "a is vague"}],
+    }
+)
+
+
+def run_review(db, project, user, service, include_context=False):
+    review = AIReview(project_id=project.id, pr_number=3, requested_by=user.id, status=ReviewStatus.PENDING)
+    db.add(review)
+    db.commit()
+    with (
+        patch.object(github_service, "fetch_pull_request_details_async", AsyncMock(return_value=PR_DETAILS)),
+        patch.object(review_service, "get_ai_service", return_value=service),
+    ):
+        try:
+            asyncio.run(review_service._process_review(db, review, project, include_context=include_context))
+        except Exception:
+            pass
+    db.refresh(review)
+    return review
+
+
+def test_review_stores_phase_timings(db, project, user):
+    review = run_review(db, project, user, _service(ScriptedProvider([(ANSWER, "stop")])))
+
+    assert review.status == ReviewStatus.COMPLETED
+    assert review.head_sha == "c" * 40
+    for metric in ("fetch_ms", "context_ms", "prompt_build_ms", "llm_ms", "db_write_ms", "total_ms"):
+        assert review.timings[metric] >= 0
+    assert review.timings["llm_calls"] == 1
+    assert review.timings["truncated"] is False
+    # Picking a key never blocks, so there is no key wait to report
+    assert "key_wait_ms" not in review.timings
+
+
+def test_symbol_context_is_built_off_the_event_loop(db, project, user):
+    threads = []
+
+    def build(project, pr_details):
+        threads.append(threading.get_ident())
+        return []
+
+    with patch.object(symbol_index_service, "build_symbol_context", side_effect=build):
+        review = run_review(db, project, user, _service(ScriptedProvider([(ANSWER, "stop")])), include_context=True)
+
+    assert review.status == ReviewStatus.COMPLETED
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_failed_review_keeps_the_timings_gathered_so_far(db, project, user):
+    review = run_review(db, project, user, _service(ScriptedProvider([])))
+
+    assert review.status == ReviewStatus.FAILED
+    assert review.timings["llm_calls"] == 1
+    assert "fetch_ms" in review.timings
+
+
+@pytest.mark.parametrize("count", [1, 10])
+def test_timing_percentiles(db, project, user, count):
+    for index in range(count):
+        db.add(
+            AIReview(
+                project_id=project.id,
+                pr_number=index,
+                requested_by=user.id,
+                status=ReviewStatus.COMPLETED,
+                created_at=datetime.utcnow() - timedelta(hours=1),
+                timings={"llm_ms": (index + 1) * 100, "key_wait_ms": 0, "truncated": index == 0},
+            )
+        )
+    db.commit()
+
+    result = review_service.get_timing_percentiles(db, days=1)
+
+    llm = result["metrics"]["llm_ms"]
+    assert result["reviews"] == count
+    assert (llm["count"], llm["p50"], llm["max"]) == (count, ((count + 1) // 2) * 100, count * 100)
+    assert result["flag_counts"]["truncated"] == 1
+    assert "key_wait_ms" not in result["metrics"]
@@ -0,0 +1,38 @@
+from unittest.mock import patch
+
+from app.services import github_service, symbol_index_service
+
+VIEWS = "from app.helpers import compute_total\n\n\ndef view():\n    return compute_total(1)\n"
+HELPERS = "def compute_total(x):\n    return x * 2\n\n\ndef unused():\n    return None\n"
+BLOBS = {"1" * 40: VIEWS, "2" * 40: HELPERS}
+
+
+def test_extract_symbols_finds_definitions_and_imports():
+    symbols = symbol_index_service.extract_symbols("app/views.py", VIEWS)
+
+    assert [definition["name"] for definition in symbols["definitions"]] == ["view"]
+    assert "app.helpers" in symbols["imports"]
+
+
+def test_context_includes_definitions_the_diff_references(project):
+    tree = {"app/views.py": "1" * 40, "app/helpers.py": "2" * 40}
+    pr_details = {
+        "head_sha": "f" * 40,
+        "files": [
+            {
+                "filename": "app/views.py",
+                "status": "modified",
+                "patch": "@@ -4,2 +4,2 @@\n def view():\n-    return 0\n+    return compute_total(1)",
+            }
+        ],
+    }
+
+    with (
+        patch.object(github_service, "fetch_repository_tree", return_value=tree),
+        patch.object(github_service, "fetch_blob_content", side_effect=lambda sha, **kwargs: BLOBS[sha]),
+    ):
+        context = symbol_index_service.build_symbol_context(project, pr_details)
+
+    # The imported module is indexed too, and only the referenced definition is picked from it
+    assert [(entry["path"], entry["name"]) for entry in context] == [("app/helpers.py", "compute_total")]
+    assert context[0]["snippet"].startswith("def compute_total(x):")
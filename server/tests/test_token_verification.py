@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.project_member import ProjectMember, ProjectMemberRole
+from app.services import project_service
+from app.services.http_client import github_session
+from tests.conftest import fake_response
+
+
+def test_verification_result_is_cached():
+    with patch.object(github_session(), "get", return_value=fake_response(body={})) as get:
+        assert project_service.verify_github_token("t", "o", "repo")
+        assert project_service.verify_github_token("t", "o", "repo")
+    assert get.call_count == 1
+
+    with patch.object(github_session(), "get", return_value=fake_response(status_code=401, body={})) as get:
+        assert not project_service.verify_github_token("other", "o", "repo")
+        assert not project_service.verify_github_token("other", "o", "repo")
+    assert get.call_count == 1
+
+
+def test_outages_are_not_cached():
+    with patch.object(github_session(), "get", return_value=fake_response(status_code=503, body={})) as get:
+        assert not project_service.verify_github_token("t", "o", "repo")
+        assert not project_service.verify_github_token("t", "o", "repo")
+    assert get.call_count == 2
+
+
+def test_update_only_verifies_a_changed_token(db, project, user):
+    db.add(ProjectMember(project_id=project.id, user_id=user.id, role=ProjectMemberRole.OWNER))
+    db.commit()
+
+    with patch.object(github_session(), "get") as get:
+        project_service.update_project(db, project.id, {"name": "renamed", "github_token": "t"}, user.id)
+    assert not get.called
+
+    with patch.object(github_session(), "get", return_value=fake_response(status_code=401, body={})):
+        with pytest.raises(HTTPException) as rejected:
+            project_service.update_project(db, project.id, {"github_token": "bad"}, user.id)
+    assert rejected.value.status_code == 401
+    db.refresh(project)
+    assert (project.name, project.github_token) == ("renamed", "t")
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from app.models.ai_review import AIReview, ReviewStatus
+from app.models.project_member import ProjectMember, ProjectMemberRole
+from app.services import rate_limit_governor, review_service, subscription_service, webhook_service
+
+
+def _exhaust_budget(token):
+    key = rate_limit_governor._budget_key("github", "core", token)
+    rate_limit_governor._local_budgets[key] = {"remaining": 10, "limit": 5000, "reset": time.time() + 600}
+
+
+def test_exhausted_budget_defers_before_a_review_is_created(db, project):
+    _exhaust_budget(project.github_token)
+    with (
+        patch.object(webhook_service, "SessionLocal", return_value=db),
+        patch.object(review_service, "create_and_process_review") as create,
+    ):
+        asyncio.run(webhook_service.run_auto_review(project.id, 12, project.user_id))
+
+    create.assert_not_called()
+    assert db.query(AIReview).count() == 0
+
+
+def test_review_exhausted_midway_is_removed_and_refunded(db, project):
+    project_id, user_id = project.id, project.user_id
+
+    async def create_and_fail(db, project_id, pr_number, user_id):
+        db.add(AIReview(project_id=project_id, pr_number=pr_number, requested_by=user_id, status=ReviewStatus.FAILED))
+        db.commit()
+        subscription_service.increment_ai_review_count(db, user_id)
+        raise rate_limit_governor.RateLimitBudgetExhausted("github", time.time() + 600)
+
+    with (
+        patch.object(webhook_service, "SessionLocal", return_value=db),
+        patch.object(review_service, "create_and_process_review", side_effect=create_and_fail),
+    ):
+        asyncio.run(webhook_service.run_auto_review(project_id, 12, user_id))
+
+    # Nothing blocks the next synchronize event from reviewing the PR, and no quota was spent
+    assert db.query(AIReview).count() == 0
+    assert subscription_service.get_or_create_usage(db, user_id).ai_reviews_count == 0
+
+
+def _synchronize(db, project, head_sha):
+    payload = {
+        "action": "synchronize",
+        "repository": {"owner": {"login": "o"}, "name": "repo"},
+        "pull_request": {"number": 12, "head": {"sha": head_sha}},
+    }
+    return webhook_service.handle_github_event(db, "pull_request", payload)["reviews"]
+
+
+def test_each_new_head_gets_a_fresh_review(db, project, user):
+    db.add(ProjectMember(project_id=project.id, user_id=user.id, role=ProjectMemberRole.OWNER))
+    db.commit()
+    reviewed = []
+
+    async def process(db, review, project, include_context):
+        head_sha = jobs[0][3]
+        reviewed.append(head_sha)
+        review.head_sha = head_sha
+        review.status = ReviewStatus.COMPLETED
+        db.commit()
+
+    with (
+        patch.object(webhook_service, "SessionLocal", return_value=db),
+        patch.object(review_service, "_process_review", side_effect=process),
+    ):
+        for head_sha in ("a" * 40, "b" * 40, "b" * 40):
+            jobs = _synchronize(db, project, head_sha)
+            asyncio.run(webhook_service.run_auto_review(*jobs[0]))
+
+    # The repeated head is not reviewed twice; the new head replaced the old review
+    assert reviewed == ["a" * 40, "b" * 40]
+    assert [review.head_sha for review in db.query(AIReview).all()] == ["b" * 40]
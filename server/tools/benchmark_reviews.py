@@ -0,0 +1,105 @@
+"""Drive the AI review pipeline with synthetic diffs and report throughput, latency and key usage.
+
+Run from the server directory against tools/fake_llm_server.py (or any provider configured in .env):
+
+    LLM_PROVIDER=openai_compatible LLM_BASE_URL=http://127.0.0.1:8090/v1 GROQ_API_KEYS=k1,k2,k3 \\
+        python tools/benchmark_reviews.py --reviews 200 --concurrency 16 --files 12
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.ai_service import get_ai_service  # noqa: E402
+
+
+def synthetic_diff(rng: random.Random, files: int, lines_per_file: int) -> str:
+    parts = []
+    for i in range(files):
+        filename = f"src/module_{i}.py"
+        hunk = [f"@@ -1,{lines_per_file} +1,{lines_per_file} @@"]
+        for n in range(lines_per_file):
+            hunk.append(f"+value_{n} = compute_{rng.randint(0, 999)}(value_{max(n - 1, 0)})")
+        parts.append(f"\n--- a/{filename}\n+++ b/{filename}\n" + "\n".join(hunk))
+    return "\n".join(parts)
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    rank = max(int(math.ceil(percent / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reviews", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--files", type=int, default=8, help="Files per synthetic diff")
+    parser.add_argument("--lines", type=int, default=40, help="Added lines per file")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    diffs = [synthetic_diff(rng, rng.randint(1, args.files), args.lines) for _ in range(args.reviews)]
+    service = get_ai_service()
+
+    calls = []
+    calls_lock = threading.Lock()
+
+    def record(call):
+        with calls_lock:
+            calls.append(call)
+
+    def run_one(diff):
+        metrics = {}
+        start = time.perf_counter()
+        try:
+            asyncio.run(
+                service.analyze_code(
+                    pr_diff=diff,
+                    pr_details={"title": "Benchmark", "description": "", "author": {"login": "bench"}},
+                    metrics=metrics,
+                    usage_recorder=record,
+                )
+            )
+            ok = True
+        except Exception:
+            ok = False
+        return ok, (time.perf_counter() - start) * 1000, metrics
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run_one, diffs))
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(ms for _, ms, _ in results)
+    failed = sum(1 for ok, _, _ in results if not ok)
+    statuses = Counter(call["status"] for call in calls)
+    per_key = Counter(call["api_key_index"] for call in calls)
+
+    print(f"reviews: {len(results)}  failed: {failed}  wall: {wall:.1f}s  throughput: {len(results) / wall:.2f}/s")
+    print(
+        f"review latency ms  p50={percentile(latencies, 50):.0f}  p95={percentile(latencies, 95):.0f}  "
+        f"p99={percentile(latencies, 99):.0f}  max={latencies[-1] if latencies else 0:.0f}"
+    )
+    print(f"llm calls: {len(calls)}  by status: {dict(statuses)}")
+    print(f"calls per key: {dict(sorted(per_key.items()))}")
+    print(
+        f"truncated reviews: {sum(1 for _, _, m in results if m.get('truncated'))}  "
+        f"continuations: {sum(m.get('continuations', 0) for _, _, m in results)}  "
+        f"retries: {sum(m.get('retries', 0) for _, _, m in results)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Local stand-in for the Groq chat-completions API, for load testing the review pipeline.
+
+Point the app at it with:
+
+    LLM_PROVIDER=openai_compatible LLM_BASE_URL=http://127.0.0.1:8090/v1
+    # or keep LLM_PROVIDER=groq and set LLM_BASE_URL=http://127.0.0.1:8090
+
+and run:
+
+    python tools/fake_llm_server.py --latency lognormal --latency-ms 1500 --rate-limit-rpm 30 --seed 7
+
+Responses are review JSON built from the files in the prompt's diff, so the whole parse / salvage /
+continuation path is exercised. Latency, 429s, truncation and malformed output are all configurable and
+reproducible with --seed.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETION_PATHS = ("/v1/chat/completions", "/openai/v1/chat/completions")
+CHARS_PER_TOKEN = 4
+SEVERITIES = ["critical", "high", "medium", "low", "info"]
+# The categories the review prompt (app/services/ai_service.py) allows
+CATEGORIES = ["security", "bug", "performance", "code_quality", "best_practices", "documentation", "testing"]
+
+
+class FakeLLM:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.calls_by_key = defaultdict(deque)
+        self.stats = defaultdict(int)
+
+    def count(self, name: str):
+        # Handler threads update the counters concurrently
+        with self.lock:
+            self.stats[name] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.stats)
+
+    def _random(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def sample_latency(self) -> float:
+        """Seconds to sleep before answering"""
+        mean = self.args.latency_ms / 1000
+        with self.lock:
+            if self.args.latency == "fixed":
+                value = mean
+            elif self.args.latency == "uniform":
+                value = self.rng.uniform(0, 2 * mean)
+            elif self.args.latency == "exponential":
+                value = self.rng.expovariate(1 / mean) if mean else 0
+            else:
+                # Lognormal with the requested mean; sigma controls the tail
+                sigma = self.args.latency_sigma
+                value = self.rng.lognormvariate(math.log(mean) - sigma**2 / 2, sigma) if mean else 0
+        return value
+
+    def rate_limited(self, api_key: str) -> bool:
+        """Per-key sliding one-minute window, plus a random 429 rate on top"""
+        if self.args.rate_limit_rpm:
+            now = time.monotonic()
+            with self.lock:
+                window = self.calls_by_key[api_key]
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= self.args.rate_limit_rpm:
+                    return True
+                window.append(now)
+        return self._random() < self.args.error_429_rate
+
+    def build_review(self, prompt: str) -> str:
+        files = re.findall(r"^--- a/(.+)$", prompt, re.MULTILINE) or ["unknown"]
+        with self.lock:
+            issues = []
+            for filename in files:
+                for _ in range(self.rng.randint(0, self.args.max_issues_per_file)):
+                    issues.append(
+                        {
+                            "file": filename,
+                            "line": self.rng.randint(1, 200),
+                            "severity": self.rng.choice(SEVERITIES),
+                            "category": self.rng.choice(CATEGORIES),
+                            "title": "Synthetic issue",
+                            "description": "Generated by the fake LLM server. " * self.rng.randint(1, 4),
+                            "suggestion": "No action needed; this is load-test output.",
+                        }
+                    )
+            rating = self.rng.choice(["LGTM", "Needs Work", "Major Issues"])
+        return json.dumps(
+            {"summary": f"Fake review of {len(files)} file(s).", "rating": rating, "issues": issues}, indent=2
+        )
+
+    def complete(self, body: dict) -> dict:
+        prompt = "\n".join(message.get("content") or "" for message in body.get("messages", []))
+        max_tokens = int(body.get("max_tokens") or 4000)
+
+        content = self.build_review(prompt)
+        finish_reason = "stop"
+
+        if self._random() < self.args.malformed_rate:
+            content = "Here is my review:\n" + content[: len(content) // 2] + "\n...I hope this helps!"
+            self.count("malformed")
+
+        # Honour max_tokens like the real API, and optionally truncate even when it would fit
+        limit = max_tokens * CHARS_PER_TOKEN
+        if self._random() < self.args.truncate_rate:
+            limit = min(limit, len(content) // 2)
+        if len(content) > limit:
+            content = content[:limit]
+            finish_reason = "length"
+            self.count("truncated")
+
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        completion_tokens = len(content) // CHARS_PER_TOKEN
+        return {
+            "id": f"fake-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+def make_handler(llm: FakeLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            if not llm.args.quiet:
+                super().log_message(format, *args)
+
+        def _send_json(self, status_code: int, payload: dict, headers: dict = None):
+            body = json.dumps(payload).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send_json(200, llm.snapshot())
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if self.path not in COMPLETION_PATHS:
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+
+            llm.count("requests")
+            api_key = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            time.sleep(llm.sample_latency())
+
+            if llm.rate_limited(api_key):
+                llm.count("rate_limited")
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                    headers={"Retry-After": "1"},
+                )
+                return
+
+            try:
+                body = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+                return
+
+            self._send_json(200, llm.complete(body))
+
+    return Handler
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "exponential", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=1000, help="Mean response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal tail width")
+    parser.add_argument("--rate-limit-rpm", type=int, default=0, help="Requests per minute per API key (0 = off)")
+    parser.add_argument("--error-429-rate", type=float, default=0.0, help="Probability of a random 429")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Probability of finish_reason=length")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Probability of non-JSON output")
+    parser.add_argument("--max-issues-per-file", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(FakeLLM(args)))
+    print(f"Fake LLM server listening on http://{args.host}:{args.port} (paths: {', '.join(COMPLETION_PATHS)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()